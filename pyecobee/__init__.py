@@ -1,20 +1,32 @@
 """ Python Code for Communication with the Ecobee Thermostat """
 import base64
+import contextlib
 import datetime
 import hashlib
+import inspect
+import itertools
+import logging
 import re
 import secrets
+import threading
+import time
+from concurrent.futures import Future
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+from urllib.parse import urlsplit
 
 import requests
-from requests.exceptions import HTTPError, RequestException, Timeout
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectTimeout, HTTPError, RequestException, Timeout
+from urllib3.exceptions import NewConnectionError
 
 try:
     import simplejson as json
 except ImportError:
     import json
 
+from .cadence import PollScheduler
 from .const import (
     _LOGGER,
     ECOBEE_ACCESS_TOKEN,
@@ -25,31 +37,112 @@ from .const import (
     ECOBEE_AUTH_BASE_URL,
     ECOBEE_AUTHORIZATION_CODE,
     ECOBEE_BASE_URL,
-    ECOBEE_CONFIG_FILENAME,
+    ECOBEE_DEFAULT_CONNECT_TIMEOUT,
+    ECOBEE_DEFAULT_POOL_SIZE,
+    ECOBEE_DEFAULT_REFRESH_SKEW,
     ECOBEE_DEFAULT_TIMEOUT,
+    ECOBEE_DEFAULT_WATCH_INTERVAL,
     ECOBEE_ENDPOINT_AUTH,
+    ECOBEE_ENDPOINT_RUNTIME_REPORT,
     ECOBEE_ENDPOINT_THERMOSTAT,
+    ECOBEE_ENDPOINT_THERMOSTAT_SUMMARY,
     ECOBEE_ENDPOINT_TOKEN,
+    ECOBEE_EXPIRES_AT,
+    ECOBEE_MAX_SELECTION_MATCH,
     ECOBEE_MFA_OTP_CHALLENGE_PATH,
     ECOBEE_MFA_SMS_CHALLENGE_PATH,
     ECOBEE_OAUTH_TOKEN_URL,
     ECOBEE_OPTIONS_NOTIFICATIONS,
     ECOBEE_PASSWORD,
+    ECOBEE_PROFILE_FULL,
     ECOBEE_REDIRECT_URI,
+    ECOBEE_REFRESH_RETRY_DELAY,
     ECOBEE_REFRESH_TOKEN,
+    ECOBEE_REVISION_SECTIONS,
+    ECOBEE_RUNTIME_REPORT_COLUMNS,
+    ECOBEE_SECTION_TTLS,
+    ECOBEE_SELECTION_FULL,
+    ECOBEE_SELECTION_PROFILES,
+    ECOBEE_STREAM_CHUNK_SIZE,
     ECOBEE_USERNAME,
     ECOBEE_WEB_CLIENT_ID,
     ECOBEE_WEB_SCOPE,
 )
+from .deadline import check as check_deadline, remaining, with_deadline
 from .errors import (
     EcobeeAuthFailedError,
+    EcobeeError,
     EcobeeAuthMfaRequiredError,
     EcobeeAuthUnknownError,
+    EcobeeCircuitOpenError,
+    EcobeeDeadlineError,
     ExpiredTokenError,
     InvalidSensorError,
+    InvalidThermostatError,
     InvalidTokenError,
 )
-from .util import config_from_file, convert_to_bool
+from .models import Thermostat
+from .runtime_report import (
+    ReportRow,
+    RuntimeReport,
+    RuntimeReportParser,
+    collect as collect_report,
+    report_params,
+    report_windows,
+)
+from .scheduler import POLL, WRITE, RequestScheduler, is_transient, retry_after
+from .token_store import FileTokenStore, TokenStore
+from .util import convert_to_bool, deep_update
+from .watch import ChangeEvent, change_events
+
+# Ecobee write methods that only build a request body and pass it to
+# _post_thermostat. They can be batched, and AsyncEcobee awaits them. They
+# return None, or a Future for the merged request while coalesce_window is set.
+_WRITE_METHODS = (
+    "set_hvac_mode",
+    "set_fan_min_on_time",
+    "set_fan_mode",
+    "set_hold_temp",
+    "set_climate_hold",
+    "create_vacation",
+    "delete_vacation",
+    "resume_program",
+    "send_message",
+    "set_dehumidifier_mode",
+    "set_dehumidifier_level",
+    "set_humidifier_mode",
+    "set_humidity",
+    "set_mic_mode",
+    "set_occupancy_modes",
+    "set_dst_mode",
+    "set_vent_mode",
+    "set_ventilator_min_on_time",
+    "set_ventilator_min_on_time_home",
+    "set_ventilator_min_on_time_away",
+    "set_ventilator_timer",
+    "set_aux_cutover_threshold",
+    "set_aux_maxtemp_threshold",
+    "update_climate_sensors",
+)
+
+# Fleet variants of write methods; they send one request per chunk of
+# ECOBEE_MAX_SELECTION_MATCH thermostats.
+_FLEET_WRITE_METHODS = (
+    "set_hvac_mode_many",
+    "resume_program_many",
+    "set_climate_hold_many",
+)
+
+# The batch, if any, that write methods on this thread/task should record into.
+_active_batch: ContextVar[Optional["ThermostatBatch"]] = ContextVar(
+    "pyecobee_active_batch", default=None
+)
+
+
+# Sections a thermostatSummary revision vouches for; see get_changed_thermostats.
+_REVISED_INCLUDES = tuple(
+    include for includes in ECOBEE_REVISION_SECTIONS.values() for include in includes
+)
 
 
 def _state_from_url(url: str) -> str:
@@ -76,6 +169,47 @@ def _final_url(resp: "requests.Response") -> str:
     return resp.url
 
 
+def _redirect_target(url: str, status_code: int, location: Optional[str]) -> Optional[str]:
+    """Return the absolute URL a response redirects to, or None if it is not a redirect.
+
+    Transport-agnostic so the sync and async Auth0 flows walk redirect chains
+    the same way.
+    """
+    if location is None or status_code not in requests.sessions.REDIRECT_STATI:
+        return None
+    return requests.compat.urljoin(url, location)
+
+
+def _authorize_params(challenge: str) -> dict:
+    """Return the query parameters for the Auth0 ``/authorize`` call."""
+    return {
+        "response_type": "code",
+        "client_id": ECOBEE_WEB_CLIENT_ID,
+        "redirect_uri": ECOBEE_REDIRECT_URI,
+        "audience": ECOBEE_AUDIENCE,
+        "scope": ECOBEE_WEB_SCOPE,
+        "code_challenge": challenge,
+        "code_challenge_method": "S256",
+    }
+
+
+def _check_identifier_landing(url: str) -> None:
+    """Raise unless the ``/authorize`` call landed on the identifier step."""
+    if "/u/login/identifier" not in url:
+        raise EcobeeAuthUnknownError(
+            f"ecobee Auth0 did not redirect to the identifier step "
+            f"(landed at {url}); login URL may have changed."
+        )
+
+
+def _check_password_landing(url: str) -> None:
+    """Raise unless the username POST landed on the password step."""
+    if "/u/login/password" not in url:
+        raise EcobeeAuthFailedError(
+            f"ecobee did not accept the username (landed at {url})"
+        )
+
+
 def _generate_pkce_pair() -> tuple[str, str]:
     """Return ``(verifier, challenge)`` for OAuth2 PKCE.
 
@@ -106,11 +240,393 @@ class MfaChallenge:
     code_verifier: str = ""
 
 
+@dataclass(frozen=True)
+class ThermostatRevision:
+    """Revision values for one thermostat, as reported by ``thermostatSummary``.
+
+    ecobee bumps ``thermostat`` when the program, HVAC mode, settings or
+    configuration change, ``alerts`` when alerts change, and ``runtime``
+    whenever the thermostat reports new runtime data (every 3 minutes).
+    """
+
+    identifier: str
+    name: str
+    connected: bool
+    thermostat: str
+    alerts: str
+    runtime: str
+    interval: str
+
+    @classmethod
+    def from_summary(cls, revision: str) -> "ThermostatRevision":
+        """Parses one colon-separated ``revisionList`` entry."""
+        parts = revision.split(":")
+        return cls(
+            identifier=parts[0],
+            # The name may itself contain colons; the tail fields never do.
+            name=":".join(parts[1:-5]),
+            connected=parts[-5] == "true",
+            thermostat=parts[-4],
+            alerts=parts[-3],
+            runtime=parts[-2],
+            interval=parts[-1],
+        )
+
+
+@dataclass
+class ThermostatChanges:
+    """What one read changed on a cached thermostat; see ``Ecobee.last_changes``.
+
+    ``runtime`` and ``settings`` map each changed key to an ``(old, new)``
+    pair, ``equipment_status`` is an ``(old, new)`` pair or None, and
+    ``sensors`` maps a sensor id to ``{capability type: (old, new)}``.
+    Sections the read did not include are never reported.
+    """
+
+    identifier: str
+    added: bool = False
+    removed: bool = False
+    runtime: dict = field(default_factory=dict)
+    settings: dict = field(default_factory=dict)
+    equipment_status: Optional[tuple] = None
+    sensors: dict = field(default_factory=dict)
+    events_added: list = field(default_factory=list)
+    events_removed: list = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.added
+            or self.removed
+            or self.runtime
+            or self.settings
+            or self.equipment_status
+            or self.sensors
+            or self.events_added
+            or self.events_removed
+        )
+
+    @classmethod
+    def between(cls, old: dict, new: dict) -> "ThermostatChanges":
+        """Diffs the sections present in ``new`` against the cached ``old``."""
+        changes = cls(new["identifier"])
+        for section in ("runtime", "settings"):
+            if section in new:
+                setattr(changes, section, _changed_values(old.get(section) or {}, new[section]))
+        if "equipmentStatus" in new and old.get("equipmentStatus") != new["equipmentStatus"]:
+            changes.equipment_status = (old.get("equipmentStatus"), new["equipmentStatus"])
+        if "remoteSensors" in new:
+            old_readings = _sensor_readings(old.get("remoteSensors") or ())
+            new_readings = _sensor_readings(new["remoteSensors"])
+            for sensor_id in old_readings.keys() | new_readings.keys():
+                changed = _changed_values(
+                    old_readings.get(sensor_id, {}), new_readings.get(sensor_id, {}), removed=True
+                )
+                if changed:
+                    changes.sensors[sensor_id] = changed
+        if "events" in new:
+            old_events = old.get("events") or []
+            changes.events_added = [event for event in new["events"] if event not in old_events]
+            changes.events_removed = [event for event in old_events if event not in new["events"]]
+        return changes
+
+
+def _changed_values(old: dict, new: dict, removed: bool = False) -> dict:
+    changed = {key: (old.get(key), value) for key, value in new.items() if old.get(key) != value}
+    if removed:
+        changed.update((key, (value, None)) for key, value in old.items() if key not in new)
+    return changed
+
+
+def _sensor_readings(sensors: Iterable[dict]) -> dict:
+    return {
+        sensor["id"]: {
+            capability["type"]: capability.get("value")
+            for capability in sensor.get("capability", ())
+        }
+        for sensor in sensors
+    }
+
+
+def _merge_section(thermostat: dict, key: str, value) -> None:
+    """Replaces one section of a cached thermostat, keeping dict sections' identity."""
+    section = thermostat.get(key)
+    if isinstance(section, dict) and isinstance(value, dict):
+        section.clear()
+        section.update(value)
+    else:
+        thermostat[key] = value
+
+
+def _provisional_set_hold(thermostat: dict, params: dict) -> set:
+    """Puts a provisional hold on top of the cached events, replacing any other hold."""
+    climate_ref = params.get("holdClimateRef")
+    heat, cool = params.get("heatHoldTemp"), params.get("coolHoldTemp")
+    if climate_ref:
+        for climate in thermostat.get("program", {}).get("climates", ()):
+            if climate.get("climateRef") == climate_ref:
+                heat, cool = climate.get("heatTemp", heat), climate.get("coolTemp", cool)
+    event = {
+        "type": "hold",
+        "name": "auto",
+        "running": True,
+        "holdClimateRef": climate_ref or "",
+        "provisional": True,
+    }
+    runtime = thermostat.setdefault("runtime", {})
+    if heat is not None:
+        event["heatHoldTemp"] = runtime["desiredHeat"] = heat
+    if cool is not None:
+        event["coolHoldTemp"] = runtime["desiredCool"] = cool
+    if "fan" in params:
+        event["fan"] = runtime["desiredFanMode"] = params["fan"]
+    thermostat["events"] = [event] + [
+        existing for existing in thermostat.get("events", ()) if existing.get("type") != "hold"
+    ]
+    return {"events", "runtime"}
+
+
+def _provisional_resume_program(thermostat: dict, params: dict) -> set:
+    events = list(thermostat.get("events", ()))
+    holds = [event for event in events if event.get("type") == "hold" and event.get("running")]
+    for event in holds if params.get("resumeAll") else holds[:1]:
+        events.remove(event)
+    thermostat["events"] = events
+    return {"events"}
+
+
+def _provisional_create_vacation(thermostat: dict, params: dict) -> set:
+    event = {
+        "type": "vacation",
+        "name": params.get("name"),
+        "running": False,
+        "heatHoldTemp": params.get("heatHoldTemp"),
+        "coolHoldTemp": params.get("coolHoldTemp"),
+        "startDate": params.get("startDate"),
+        "startTime": params.get("startTime"),
+        "endDate": params.get("endDate"),
+        "endTime": params.get("endTime"),
+        "fan": params.get("fan"),
+        "provisional": True,
+    }
+    thermostat["events"] = list(thermostat.get("events", ())) + [event]
+    return {"events"}
+
+
+def _provisional_delete_vacation(thermostat: dict, params: dict) -> set:
+    thermostat["events"] = [
+        event
+        for event in thermostat.get("events", ())
+        if not (event.get("type") == "vacation" and event.get("name") == params.get("name"))
+    ]
+    return {"events"}
+
+
+# Known local effect of each function, applied by optimistic updates.
+_PROVISIONAL_FUNCTIONS = {
+    "setHold": _provisional_set_hold,
+    "resumeProgram": _provisional_resume_program,
+    "createVacation": _provisional_create_vacation,
+    "deleteVacation": _provisional_delete_vacation,
+}
+
+
+class ThermostatBatch:
+    """Collects several writes to one thermostat and sends them as one request.
+
+    Returned by :meth:`Ecobee.batch`. Inside the ``with`` block, call any
+    ``Ecobee`` write method on the batch without the ``index`` argument::
+
+        with ecobee.batch(0) as batch:
+            batch.set_hvac_mode("cool")
+            batch.set_humidity(40)
+            batch.resume_program()
+
+    Settings patches are merged (a later value for the same setting wins)
+    and functions are kept in call order. The merged request is sent when
+    the block exits without an exception, and discarded otherwise. With
+    :class:`~pyecobee.aio.AsyncEcobee` use ``async with`` instead.
+    """
+
+    def __init__(self, ecobee: "Ecobee", index: Union[int, str]):
+        self._ecobee = ecobee
+        self._index = index
+        self._actions = []
+        self._thermostat = {}
+        self._functions = []
+
+    def __getattr__(self, name: str):
+        if name not in _WRITE_METHODS:
+            raise AttributeError(f"{name!r} cannot be batched")
+        method = getattr(Ecobee, name)
+
+        def record(*args, **kwargs) -> None:
+            token = _active_batch.set(self)
+            try:
+                method(self._ecobee, self._index, *args, **kwargs)
+            finally:
+                _active_batch.reset(token)
+
+        return record
+
+    def add(self, log_msg_action: str, body: dict) -> None:
+        """Merges one write's request body into the batch."""
+        self._actions.append(log_msg_action)
+        deep_update(self._thermostat, body.get("thermostat", {}))
+        self._functions.extend(body.get("functions", []))
+
+    def body(self) -> Optional[dict]:
+        """Returns the merged request body, or None if nothing was recorded."""
+        if not self._actions:
+            return None
+        body = {
+            "selection": {
+                "selectionType": "thermostats",
+                "selectionMatch": self._ecobee._identifier(self._index),
+            },
+        }
+        if self._thermostat:
+            body["thermostat"] = self._thermostat
+        if self._functions:
+            body["functions"] = self._functions
+        return body
+
+    def flush(self):
+        """Sends the merged request now; returns an awaitable for async clients."""
+        body = self.body()
+        log_msg_action = "batch: " + ", ".join(self._actions)
+        self._actions, self._thermostat, self._functions = [], {}, []
+        if body is None:
+            return None
+        return self._ecobee._send_thermostat_update(log_msg_action, body)
+
+    def __enter__(self) -> "ThermostatBatch":
+        if inspect.iscoroutinefunction(self._ecobee._send_thermostat_update):
+            raise TypeError("Use 'async with' to batch writes on an AsyncEcobee client")
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.flush()
+
+    async def __aenter__(self) -> "ThermostatBatch":
+        return self
+
+    async def __aexit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            pending = self.flush()
+            if pending is not None:
+                await pending
+
+
+class _CoalescedWrites(ThermostatBatch):
+    """Writes to one thermostat waiting out ``Ecobee.coalesce_window``.
+
+    Like a batch, except that a ``setHold`` directly following another
+    pending ``setHold`` is folded into it, and every caller gets a future
+    for the outcome of the one combined request.
+    """
+
+    def __init__(self, ecobee: "Ecobee", identifier: str):
+        super().__init__(ecobee, identifier)
+        self.futures = []
+
+    def add(self, log_msg_action: str, body: dict) -> None:
+        functions = body.get("functions", [])
+        if (
+            functions
+            and self._functions
+            and functions[0]["type"] == "setHold"
+            and self._functions[-1]["type"] == "setHold"
+        ):
+            params = dict(self._functions[-1]["params"])
+            update = functions[0]["params"]
+            # A climate hold and a temperature hold are alternatives.
+            if "holdClimateRef" in update:
+                params.pop("heatHoldTemp", None)
+                params.pop("coolHoldTemp", None)
+            if "heatHoldTemp" in update or "coolHoldTemp" in update:
+                params.pop("holdClimateRef", None)
+            params.update(update)
+            if params.get("holdType") != "holdHours":
+                params.pop("holdHours", None)
+            self._functions[-1] = dict(self._functions[-1], params=params)
+            body = dict(body, functions=functions[1:])
+        super().add(log_msg_action, body)
+
+    def action(self) -> str:
+        return "coalesced: " + ", ".join(self._actions)
+
+    def settle(self, response: Optional[dict], error: Optional[BaseException] = None) -> None:
+        """Resolves every caller's future with the combined request's outcome."""
+        if error is None and response is None:
+            error = EcobeeError(f"ecobee did not accept {self.action()}")
+        for future in self.futures:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(response)
+            else:
+                future.set_exception(error)
+
+    def cancel(self) -> None:
+        """Cancels every caller's future, for a flush that was itself cancelled."""
+        for future in self.futures:
+            future.cancel()
+
+
 class Ecobee(object):
-    """Class for communicating with the ecobee API."""
+    """Class for communicating with the ecobee API.
+
+    Every HTTP call goes through one ``requests.Session`` so connections to
+    api.ecobee.com and auth.ecobee.com are pooled and kept alive between
+    calls. Pass ``session`` to share a pool between several clients; a
+    session supplied by the caller is not closed by :meth:`close`.
+    """
+
+    def __init__(
+        self,
+        config_filename: str = None,
+        config: dict = None,
+        session: Optional[requests.Session] = None,
+        pool_maxsize: int = ECOBEE_DEFAULT_POOL_SIZE,
+        timeout: float = ECOBEE_DEFAULT_TIMEOUT,
+        refresh_skew: float = ECOBEE_DEFAULT_REFRESH_SKEW,
+        token_store: Optional[TokenStore] = None,
+        optimistic: bool = False,
+        coalesce_window: Optional[float] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        connect_timeout: float = ECOBEE_DEFAULT_CONNECT_TIMEOUT,
+    ):
+        # Read timeout; connections get connect_timeout. Both are per request,
+        # while pyecobee.deadline bounds a whole operation.
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.scheduler = scheduler or RequestScheduler()
+        self._account_budget = self.scheduler.account_bucket()
+        self._init_transport(session, pool_maxsize)
+        self.refresh_skew = refresh_skew
+        self._refresh_timer = None
+        self._refresh_lock = threading.Lock()
+        # Merges mutate the cached list in place; serialise threads doing so.
+        self._cache_lock = threading.RLock()
 
-    def __init__(self, config_filename: str = None, config: dict = None):
         self.thermostats = None
+        self._models = {}
+        self._reindex()
+        self.last_changes = {}
+        self.revisions = {}
+        self.selection_profiles = dict(ECOBEE_SELECTION_PROFILES)
+        self.section_ttls = dict(ECOBEE_SECTION_TTLS)
+        # {identifier: {include flag: epoch seconds the section was last read}}
+        self.fetched_at = {}
+        self._fetch_lock = threading.Lock()
+        self.optimistic = optimistic
+        # {identifier: sections patched locally since the last read}
+        self.provisional = {}
+        # Seconds to hold writes so rapid ones go out merged; None sends at once.
+        self.coalesce_window = coalesce_window
+        self._pending_writes = {}
+        self._pending_lock = threading.Lock()
         self.config_filename = config_filename
         self.config = config
         self.api_key = None
@@ -118,12 +634,14 @@ class Ecobee(object):
         self.authorization_code = None
         self.access_token = None
         self.refresh_token = None
+        self.expires_at = None
         self.username = None
         self.password = None
         self.auth0_token = None
         self.include_notifications = False
+        self.token_store = token_store
 
-        if self.config_filename is None and self.config is None:
+        if self.config_filename is None and self.config is None and token_store is None:
             _LOGGER.error("No ecobee credentials supplied, unable to continue")
             return
 
@@ -136,6 +654,8 @@ class Ecobee(object):
                 self.authorization_code = self.config[ECOBEE_AUTHORIZATION_CODE]
             if ECOBEE_REFRESH_TOKEN in self.config:
                 self.refresh_token = self.config[ECOBEE_REFRESH_TOKEN]
+            if self.config.get(ECOBEE_EXPIRES_AT) is not None:
+                self.expires_at = float(self.config[ECOBEE_EXPIRES_AT])
             if ECOBEE_USERNAME in self.config:
                 self.username = self.config[ECOBEE_USERNAME]
             if ECOBEE_PASSWORD in self.config:
@@ -146,11 +666,81 @@ class Ecobee(object):
                 self.include_notifications = convert_to_bool(self.config[ECOBEE_OPTIONS_NOTIFICATIONS])
         else:
             self._file_based_config = True
+            if self.token_store is None:
+                self.token_store = FileTokenStore(self.config_filename)
+
+    def _init_transport(self, session: Optional[requests.Session], pool_maxsize: int) -> None:
+        self._owns_session = session is None
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+        self._session = session
+
+    def __enter__(self) -> "Ecobee":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes pooled connections, unless the session was supplied by the caller.
+
+        Writes still waiting out ``coalesce_window`` are sent first.
+        """
+        self.flush_writes()
+        self.stop_token_refresh_timer()
+        if self._owns_session:
+            self._session.close()
+
+    def _send(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends one HTTP request, failing fast while its host's circuit is open.
+
+        Every request to ecobee goes through here. Raises
+        :class:`EcobeeCircuitOpenError` without sending anything while
+        api.ecobee.com or auth.ecobee.com, whichever ``url`` is on, is
+        considered down, and :class:`EcobeeDeadlineError` once the current
+        :func:`~pyecobee.deadline.deadline` has passed.
+        """
+        left = check_deadline(f"{method} {url}")
+        breaker = self.scheduler.breaker(urlsplit(url).hostname)
+        breaker.before_request()
+        try:
+            response = session.request(method, url, timeout=self._timeouts(left), **kwargs)
+        except RequestException as err:
+            if left is not None and remaining() <= 0:
+                # Cut short by the deadline; that says nothing about the host.
+                breaker.abandon()
+                raise EcobeeDeadlineError(f"Deadline passed during {method} {url}") from err
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.abandon()
+            raise
+        breaker.record(response.status_code)
+        return response
+
+    def _timeouts(self, left: Optional[float]) -> tuple:
+        """Returns the (connect, read) timeouts, shortened to fit what is left of a deadline."""
+        if left is None:
+            return self.connect_timeout, self.timeout
+        return min(self.connect_timeout, left), min(self.timeout, left)
+
+    def _new_auth_session(self) -> requests.Session:
+        """Returns a session with its own cookie jar that shares this client's pools.
+
+        The Auth0 web login relies on per-login cookies, so it cannot use the
+        shared session directly, but it can reuse its connection adapters.
+        """
+        session = requests.Session()
+        for prefix, adapter in self._session.adapters.items():
+            session.mount(prefix, adapter)
+        return session
 
     def read_config_from_file(self) -> None:
-        """Reads config info from passed-in config filename."""
+        """Reads config info from passed-in config filename (or token store)."""
         if self._file_based_config:
-            self.config = config_from_file(self.config_filename)
+            self.config = self.token_store.load()
             self.api_key = self.config[ECOBEE_API_KEY]
             if ECOBEE_ACCESS_TOKEN in self.config:
                 self.access_token = self.config[ECOBEE_ACCESS_TOKEN]
@@ -158,6 +748,8 @@ class Ecobee(object):
                 self.authorization_code = self.config[ECOBEE_AUTHORIZATION_CODE]
             if ECOBEE_REFRESH_TOKEN in self.config:
                 self.refresh_token = self.config[ECOBEE_REFRESH_TOKEN]
+            if self.config.get(ECOBEE_EXPIRES_AT) is not None:
+                self.expires_at = float(self.config[ECOBEE_EXPIRES_AT])
             if ECOBEE_USERNAME in self.config:
                 self.username = self.config[ECOBEE_USERNAME]
             if ECOBEE_PASSWORD in self.config:
@@ -168,38 +760,59 @@ class Ecobee(object):
                 self.include_notifications = convert_to_bool(self.config[ECOBEE_OPTIONS_NOTIFICATIONS])
 
     def _write_config(self) -> None:
-        """Writes API tokens to a file or self.config if self.file_based_config is False."""
+        """Writes API tokens to the token store, and to self.config if self.file_based_config is False."""
         config = dict()
         config[ECOBEE_API_KEY] = self.api_key
         config[ECOBEE_ACCESS_TOKEN] = self.access_token
         config[ECOBEE_REFRESH_TOKEN] = self.refresh_token
+        config[ECOBEE_EXPIRES_AT] = self.expires_at
         config[ECOBEE_USERNAME] = self.username
         config[ECOBEE_PASSWORD] = self.password
         config[ECOBEE_AUTH0_TOKEN] = self.auth0_token
         config[ECOBEE_AUTHORIZATION_CODE] = self.authorization_code
         config[ECOBEE_OPTIONS_NOTIFICATIONS] = str(self.include_notifications)
-        if self._file_based_config:
-            config_from_file(self.config_filename, config)
-        else:
+        if not self._file_based_config:
             self.config = config
+        if self.token_store is not None:
+            self.token_store.save(config)
+
+    def _adopt_stored_tokens(self) -> None:
+        """Picks up tokens another process saved to the token store since we last read it."""
+        if self.token_store is None or not self.token_store.changed():
+            return
+        config = self.token_store.load()
+        _LOGGER.debug("Token store changed on disk; reloading tokens")
+        self.config = config
+        self.access_token = config.get(ECOBEE_ACCESS_TOKEN, self.access_token)
+        self.refresh_token = config.get(ECOBEE_REFRESH_TOKEN, self.refresh_token)
+        expires_at = config.get(ECOBEE_EXPIRES_AT)
+        self.expires_at = float(expires_at) if expires_at is not None else None
+
+    def _token_store_lock(self):
+        if self.token_store is None:
+            return contextlib.nullcontext()
+        return self.token_store.lock()
 
     def request_pin(self) -> bool:
         """Requests a PIN from ecobee for authorization on ecobee.com."""
-        params = {
-            "response_type": "ecobeePin",
-            "client_id": self.api_key,
-            "scope": "smartWrite",
-        }
-        log_msg_action = "request pin"
-
         response = self._request(
             "GET",
             ECOBEE_ENDPOINT_AUTH,
-            log_msg_action,
-            params=params,
+            "request pin",
+            params=self._pin_request_params(),
             auth_request=True,
         )
+        return self._store_pin(response)
+
+    def _pin_request_params(self) -> dict:
+        return {
+            "response_type": "ecobeePin",
+            "client_id": self.api_key,
+            "scope": "smartWrite",
+        }
 
+    def _store_pin(self, response: Optional[dict]) -> bool:
+        """Stores the authorization code and PIN from a request pin response."""
         try:
             self.authorization_code = response["code"]
             self.pin = response["ecobeePin"]
@@ -214,29 +827,34 @@ class Ecobee(object):
             _LOGGER.debug(f"Error obtaining PIN code from ecobee: {err}")
             return False
 
+    @with_deadline
     def request_tokens(self) -> bool:
         """Requests API tokens from ecobee."""
         if self.auth0_token is not None:
             return self.request_tokens_web()
-        
-        params = {
-            "grant_type": "ecobeePin",
-            "code": self.authorization_code,
-            "client_id": self.api_key,
-        }
-        log_msg_action = "request tokens"
 
         response = self._request(
             "POST",
             ECOBEE_ENDPOINT_TOKEN,
-            log_msg_action,
-            params=params,
+            "request tokens",
+            params=self._pin_token_params(),
             auth_request=True,
         )
+        return self._store_pin_tokens(response)
 
+    def _pin_token_params(self) -> dict:
+        return {
+            "grant_type": "ecobeePin",
+            "code": self.authorization_code,
+            "client_id": self.api_key,
+        }
+
+    def _store_pin_tokens(self, response: Optional[dict]) -> bool:
+        """Stores the tokens from a PIN-flow token response."""
         try:
             self.access_token = response["access_token"]
             self.refresh_token = response["refresh_token"]
+            self._store_expiry(response)
             self._write_config()
             self.pin = None
             _LOGGER.debug(f"Obtained tokens from ecobee: access {self.access_token}, "
@@ -246,6 +864,7 @@ class Ecobee(object):
             _LOGGER.debug(f"Error obtaining tokens from ecobee: {err}")
             return False
 
+    @with_deadline
     def request_tokens_web(self) -> bool:
         """Log in via the ecobee web flow and obtain access + refresh tokens.
 
@@ -264,21 +883,14 @@ class Ecobee(object):
           unexpected response shape from Auth0.
         """
         verifier, challenge = _generate_pkce_pair()
-        session = requests.Session()
+        session = self._new_auth_session()
 
         try:
-            resp = session.get(
+            resp = self._send(
+                session,
+                "GET",
                 f"{ECOBEE_AUTH_BASE_URL}/{ECOBEE_ENDPOINT_AUTH}",
-                params={
-                    "response_type": "code",
-                    "client_id": ECOBEE_WEB_CLIENT_ID,
-                    "redirect_uri": ECOBEE_REDIRECT_URI,
-                    "audience": ECOBEE_AUDIENCE,
-                    "scope": ECOBEE_WEB_SCOPE,
-                    "code_challenge": challenge,
-                    "code_challenge_method": "S256",
-                },
-                timeout=ECOBEE_DEFAULT_TIMEOUT,
+                params=_authorize_params(challenge),
             )
             resp.raise_for_status()
         except RequestException as err:
@@ -286,35 +898,31 @@ class Ecobee(object):
                 f"Failed to start ecobee Auth0 login: {err}"
             ) from err
 
-        if "/u/login/identifier" not in resp.url:
-            raise EcobeeAuthUnknownError(
-                f"ecobee Auth0 did not redirect to the identifier step "
-                f"(landed at {resp.url}); login URL may have changed."
-            )
+        _check_identifier_landing(resp.url)
 
         # Auth0 Universal Login: identifier-first, then password.
         identifier_url = resp.url
         try:
-            resp = session.post(
+            resp = self._send(
+                session,
+                "POST",
                 identifier_url,
                 data={"state": _state_from_url(identifier_url), "username": self.username},
-                timeout=ECOBEE_DEFAULT_TIMEOUT,
             )
             resp.raise_for_status()
         except RequestException as err:
             raise EcobeeAuthUnknownError(f"Failed to submit username: {err}") from err
 
-        if "/u/login/password" not in resp.url:
-            raise EcobeeAuthFailedError(
-                f"ecobee did not accept the username (landed at {resp.url})"
-            )
+        _check_password_landing(resp.url)
 
         password_url = resp.url
         try:
             # Don't follow the final redirect into authCallback — we want to
             # read the ``code`` out of the Location header, not actually load
             # the external ecobee.com page.
-            resp = session.post(
+            resp = self._send(
+                session,
+                "POST",
                 password_url,
                 data={
                     "state": _state_from_url(password_url),
@@ -322,7 +930,6 @@ class Ecobee(object):
                     "password": self.password,
                 },
                 allow_redirects=False,
-                timeout=ECOBEE_DEFAULT_TIMEOUT,
             )
         except RequestException as err:
             raise EcobeeAuthUnknownError(f"Failed to submit password: {err}") from err
@@ -331,7 +938,9 @@ class Ecobee(object):
         # following Auth0's redirects (which may bounce through /authorize/resume
         # and then either to /u/mfa-otp-challenge or to the authCallback).
         landed_url = self._resolve_post_login_redirect(session, resp)
-        self._handle_post_password_response(landed_url, verifier, session)
+        self._handle_post_password_response(
+            landed_url, verifier, session.cookies.get_dict()
+        )
         return self._exchange_code_for_tokens(_code_from_url(landed_url), verifier)
 
     def _resolve_post_login_redirect(
@@ -347,21 +956,17 @@ class Ecobee(object):
         actually requested.
         """
         for _ in range(10):
-            if not (resp.is_redirect or resp.is_permanent_redirect):
-                return resp.url
-            next_url = requests.compat.urljoin(
-                resp.url, resp.headers.get("Location", "")
+            next_url = _redirect_target(
+                resp.url, resp.status_code, resp.headers.get("Location")
             )
+            if next_url is None:
+                return resp.url
             if not next_url.startswith(ECOBEE_AUTH_BASE_URL):
                 # About to leave auth.ecobee.com — return that URL without
                 # actually fetching it. This is where the authCallback lives.
                 return next_url
             try:
-                resp = session.get(
-                    next_url,
-                    allow_redirects=False,
-                    timeout=ECOBEE_DEFAULT_TIMEOUT,
-                )
+                resp = self._send(session, "GET", next_url, allow_redirects=False)
             except RequestException as err:
                 raise EcobeeAuthUnknownError(
                     f"Failed while following Auth0 redirect to {next_url}: {err}"
@@ -370,6 +975,7 @@ class Ecobee(object):
             "Auth0 redirect chain exceeded 10 hops; aborting."
         )
 
+    @with_deadline
     def submit_mfa_code(self, challenge: MfaChallenge, code: str) -> bool:
         """Complete an MFA-gated login by submitting the user's OTP code.
 
@@ -379,16 +985,17 @@ class Ecobee(object):
         :class:`EcobeeAuthFailedError` for a rejected code, or
         :class:`EcobeeAuthUnknownError` for any other problem.
         """
-        session = requests.Session()
+        session = self._new_auth_session()
         for name, value in challenge.cookies.items():
             session.cookies.set(name, value)
 
         try:
-            resp = session.post(
+            resp = self._send(
+                session,
+                "POST",
                 challenge.challenge_url,
                 data={"state": challenge.state, "code": code},
                 allow_redirects=False,
-                timeout=ECOBEE_DEFAULT_TIMEOUT,
             )
         except RequestException as err:
             raise EcobeeAuthUnknownError(f"Failed to submit OTP code: {err}") from err
@@ -399,6 +1006,18 @@ class Ecobee(object):
             raise EcobeeAuthFailedError("The MFA code was not accepted by ecobee.")
 
         landed_url = self._resolve_post_login_redirect(session, resp)
+        return self._exchange_code_for_tokens(
+            self._code_after_mfa(landed_url), challenge.code_verifier
+        )
+
+    @staticmethod
+    def _code_after_mfa(landed_url: str) -> str:
+        """Return the auth code Auth0 issued after an MFA submission.
+
+        Raises :class:`EcobeeAuthFailedError` if Auth0 bounced back to the
+        challenge page, :class:`EcobeeAuthUnknownError` for anything else
+        without a code.
+        """
         if ECOBEE_MFA_OTP_CHALLENGE_PATH in landed_url or ECOBEE_MFA_SMS_CHALLENGE_PATH in landed_url:
             raise EcobeeAuthFailedError("The MFA code was not accepted by ecobee.")
 
@@ -407,13 +1026,13 @@ class Ecobee(object):
             raise EcobeeAuthUnknownError(
                 f"Unexpected response after MFA submission (landed at {landed_url})"
             )
-        return self._exchange_code_for_tokens(code_value, challenge.code_verifier)
+        return code_value
 
     def _handle_post_password_response(
         self,
         landed_url: str,
         verifier: str,
-        session: "requests.Session",
+        cookies: dict,
     ) -> None:
         """Branch on the URL Auth0 ultimately redirects to after the password POST.
 
@@ -427,7 +1046,7 @@ class Ecobee(object):
                     challenge_url=landed_url,
                     state=_state_from_url(landed_url),
                     mfa_type="otp",
-                    cookies=session.cookies.get_dict(),
+                    cookies=cookies,
                     code_verifier=verifier,
                 )
             )
@@ -437,7 +1056,7 @@ class Ecobee(object):
                     challenge_url=landed_url,
                     state=_state_from_url(landed_url),
                     mfa_type="sms",
-                    cookies=session.cookies.get_dict(),
+                    cookies=cookies,
                     code_verifier=verifier,
                 )
             )
@@ -460,16 +1079,11 @@ class Ecobee(object):
     def _exchange_code_for_tokens(self, code: str, verifier: str) -> bool:
         """Exchange an authorization code for access + refresh tokens."""
         try:
-            resp = requests.post(
+            resp = self._send(
+                self._session,
+                "POST",
                 ECOBEE_OAUTH_TOKEN_URL,
-                data={
-                    "grant_type": "authorization_code",
-                    "code": code,
-                    "code_verifier": verifier,
-                    "client_id": ECOBEE_WEB_CLIENT_ID,
-                    "redirect_uri": ECOBEE_REDIRECT_URI,
-                },
-                timeout=ECOBEE_DEFAULT_TIMEOUT,
+                data=self._code_exchange_data(code, verifier),
             )
             resp.raise_for_status()
             payload = resp.json()
@@ -477,7 +1091,20 @@ class Ecobee(object):
             raise EcobeeAuthUnknownError(
                 f"Failed to exchange authorization code for tokens: {err}"
             ) from err
+        return self._store_exchanged_tokens(payload)
+
+    @staticmethod
+    def _code_exchange_data(code: str, verifier: str) -> dict:
+        return {
+            "grant_type": "authorization_code",
+            "code": code,
+            "code_verifier": verifier,
+            "client_id": ECOBEE_WEB_CLIENT_ID,
+            "redirect_uri": ECOBEE_REDIRECT_URI,
+        }
 
+    def _store_exchanged_tokens(self, payload: dict) -> bool:
+        """Stores the tokens from an authorization code exchange response."""
         try:
             self.access_token = payload["access_token"]
         except KeyError as err:
@@ -494,12 +1121,7 @@ class Ecobee(object):
                 "The Auth0 client_id may not have offline_access enabled."
             ) from err
 
-        if "expires_in" in payload:
-            expires_at = datetime.datetime.now() + datetime.timedelta(
-                seconds=int(payload["expires_in"])
-            )
-            _LOGGER.debug(f"Access token expires at {expires_at}")
-
+        self._store_expiry(payload)
         self._write_config()
         return True
 
@@ -511,35 +1133,48 @@ class Ecobee(object):
         any rotated refresh_token returned by Auth0.
         """
         try:
-            resp = requests.post(
-                ECOBEE_OAUTH_TOKEN_URL,
-                data={
-                    "grant_type": "refresh_token",
-                    "refresh_token": self.refresh_token,
-                    "client_id": ECOBEE_WEB_CLIENT_ID,
-                },
-                timeout=ECOBEE_DEFAULT_TIMEOUT,
+            resp = self._send(
+                self._session, "POST", ECOBEE_OAUTH_TOKEN_URL, data=self._refresh_grant_data()
             )
             resp.raise_for_status()
             payload = resp.json()
         except (RequestException, ValueError) as err:
+            error_payload = {}
             if (
                 isinstance(err, RequestException)
                 and err.response is not None
                 and err.response.status_code == 400
             ):
                 try:
-                    payload = err.response.json()
+                    error_payload = err.response.json()
                 except ValueError:
-                    payload = {}
-                if payload.get("error") == "invalid_grant":
-                    raise InvalidTokenError(
-                        "ecobee tokens invalid; re-authentication required"
-                    ) from err
-            raise EcobeeAuthUnknownError(
-                f"Failed to refresh ecobee tokens: {err}"
+                    pass
+            self._raise_refresh_failure(err, error_payload)
+        return self._store_refreshed_tokens(payload)
+
+    def _refresh_grant_data(self) -> dict:
+        return {
+            "grant_type": "refresh_token",
+            "refresh_token": self.refresh_token,
+            "client_id": ECOBEE_WEB_CLIENT_ID,
+        }
+
+    @staticmethod
+    def _raise_refresh_failure(err: Exception, error_payload: dict) -> None:
+        """Maps a failed refresh grant onto the library's token errors.
+
+        ``error_payload`` is the decoded body of a 400 response, if any.
+        """
+        if error_payload.get("error") == "invalid_grant":
+            raise InvalidTokenError(
+                "ecobee tokens invalid; re-authentication required"
             ) from err
+        raise EcobeeAuthUnknownError(
+            f"Failed to refresh ecobee tokens: {err}"
+        ) from err
 
+    def _store_refreshed_tokens(self, payload: dict) -> bool:
+        """Stores the tokens from a refresh grant response."""
         try:
             self.access_token = payload["access_token"]
         except KeyError as err:
@@ -551,9 +1186,91 @@ class Ecobee(object):
         if "refresh_token" in payload:
             self.refresh_token = payload["refresh_token"]
 
+        self._store_expiry(payload)
         self._write_config()
         return True
 
+    def _store_expiry(self, payload: dict) -> None:
+        """Records when the access token from a token response expires."""
+        if "expires_in" in payload:
+            self.expires_at = time.time() + int(payload["expires_in"])
+            _LOGGER.debug(
+                "Access token expires at %s",
+                datetime.datetime.fromtimestamp(self.expires_at),
+            )
+        else:
+            self.expires_at = None
+
+    def token_expiring(self) -> bool:
+        """Returns True if the access token expires within ``refresh_skew`` seconds.
+
+        Always False when the expiry is unknown (tokens from an older config);
+        those still get refreshed after ecobee reports them expired.
+        """
+        return (
+            self.expires_at is not None
+            and time.time() >= self.expires_at - self.refresh_skew
+        )
+
+    def start_token_refresh_timer(self) -> None:
+        """Refreshes the access token on a background timer shortly before it expires.
+
+        The timer re-arms itself after every refresh, so requests never see an
+        expired token. Stopped by :meth:`stop_token_refresh_timer` or :meth:`close`.
+        """
+        if self.expires_at is None:
+            _LOGGER.debug("Access token expiry unknown; not starting refresh timer")
+            return
+        self._schedule_token_refresh(self.expires_at - self.refresh_skew - time.time())
+
+    def stop_token_refresh_timer(self) -> None:
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+    def _schedule_token_refresh(self, delay: float) -> None:
+        self.stop_token_refresh_timer()
+        self._refresh_timer = threading.Timer(max(0.0, delay), self._refresh_on_timer)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _refresh_single_flight(self, stale_token: Optional[str] = None) -> None:
+        """Refreshes tokens at most once across threads that need it at the same time.
+
+        Callers queue on a lock, which the token store extends across
+        processes. Whoever holds it first refreshes; the rest reload the
+        store, find the access token no longer equal to ``stale_token`` (the
+        one their request was rejected with) or, without ``stale_token``, no
+        longer expiring, and return without refreshing again.
+        """
+        with self._refresh_lock, self._token_store_lock():
+            # Another process may have refreshed while we waited for the lock.
+            self._adopt_stored_tokens()
+            if stale_token is None:
+                if self.token_expiring():
+                    self.refresh_tokens()
+            elif self.access_token == stale_token:
+                self.refresh_tokens()
+
+    def _refresh_on_timer(self) -> None:
+        try:
+            with self._refresh_lock, self._token_store_lock():
+                self._adopt_stored_tokens()
+                refreshed = not self.token_expiring() or self.refresh_tokens()
+        except InvalidTokenError as err:
+            _LOGGER.error(f"Background token refresh stopped: {err}")
+            self._refresh_timer = None
+            return
+        except EcobeeError as err:
+            _LOGGER.error(f"Background token refresh failed: {err}")
+            refreshed = False
+
+        if refreshed:
+            self.start_token_refresh_timer()
+        else:
+            self._schedule_token_refresh(ECOBEE_REFRESH_RETRY_DELAY)
+
+    @with_deadline
     def refresh_tokens(self) -> bool:
         """Refresh the access token.
 
@@ -570,26 +1287,14 @@ class Ecobee(object):
            entries that pre-date refresh_token storage.
         """
         if self.api_key:
-            params = {
-                "grant_type": "refresh_token",
-                "refresh_token": self.refresh_token,
-                "client_id": self.api_key,
-            }
             response = self._request(
                 "POST",
                 ECOBEE_ENDPOINT_TOKEN,
                 "refresh tokens",
-                params=params,
+                params=self._pin_refresh_params(),
                 auth_request=True,
             )
-            try:
-                self.access_token = response["access_token"]
-                self.refresh_token = response["refresh_token"]
-                self._write_config()
-                return True
-            except (KeyError, TypeError) as err:
-                _LOGGER.debug(f"Error refreshing tokens from ecobee: {err}")
-                return False
+            return self._store_pin_refreshed_tokens(response)
 
         if self.refresh_token:
             return self._refresh_with_refresh_token()
@@ -601,95 +1306,674 @@ class Ecobee(object):
             "No refresh_token, credentials, or API key available to refresh."
         )
 
-    def get_thermostats(self) -> bool:
-        """Gets a json-list of thermostats from ecobee and caches in self.thermostats."""
-        param_string = {
-            "selection": {
-                "selectionType": "registered",
-                "includeRuntime": "true",
-                "includeSensors": "true",
-                "includeProgram": "true",
-                "includeEquipmentStatus": "true",
-                "includeEvents": "true",
-                "includeWeather": "true",
-                "includeSettings": "true",
-                "includeLocation": "true",
-            }
+    def _pin_refresh_params(self) -> dict:
+        return {
+            "grant_type": "refresh_token",
+            "refresh_token": self.refresh_token,
+            "client_id": self.api_key,
         }
-        if self.include_notifications:
-            param_string["selection"]["includeNotificationSettings"] = self.include_notifications
-        params = {"json": json.dumps(param_string)}
-        log_msg_action = "get thermostats"
 
+    def _store_pin_refreshed_tokens(self, response: Optional[dict]) -> bool:
+        """Stores the tokens from a PIN-flow refresh response."""
+        try:
+            self.access_token = response["access_token"]
+            self.refresh_token = response["refresh_token"]
+            self._store_expiry(response)
+            self._write_config()
+            return True
+        except (KeyError, TypeError) as err:
+            _LOGGER.debug(f"Error refreshing tokens from ecobee: {err}")
+            return False
+
+    @with_deadline
+    def get_thermostats(self, profile: str = ECOBEE_PROFILE_FULL) -> bool:
+        """Gets a json-list of thermostats from ecobee and caches in self.thermostats.
+
+        ``profile`` names an entry of ``self.selection_profiles`` (by default
+        "full", "runtime-only", "config" and "weather"). Anything short of the
+        full profile is merged into the cached thermostats, keeping the
+        sections it did not ask for.
+
+        Returns False if the request fails, but raises
+        :class:`~pyecobee.errors.EcobeeCircuitOpenError` without sending it
+        while api.ecobee.com's circuit breaker is open.
+        """
+        includes = self._profile_includes(profile)
         response = self._request_with_refresh(
-            "GET", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, params=params
+            "GET",
+            ECOBEE_ENDPOINT_THERMOSTAT,
+            "get thermostats",
+            params=self._thermostats_params(includes),
+        )
+        return self._store_thermostats(
+            response, merge=profile != ECOBEE_PROFILE_FULL, includes=includes
         )
 
+    def _profile_includes(self, profile: str) -> tuple:
         try:
-            self.thermostats = response["thermostatList"]
-            return True
+            return self.selection_profiles[profile]
+        except KeyError:
+            raise ValueError(
+                f"Unknown selection profile {profile!r}; "
+                f"expected one of {sorted(self.selection_profiles)}"
+            ) from None
+
+    def _thermostats_params(
+        self,
+        includes: Iterable[str] = ECOBEE_SELECTION_FULL,
+        identifiers: Iterable[str] = None,
+    ) -> dict:
+        """Returns the query parameters for a thermostat read.
+
+        Reads every registered thermostat unless ``identifiers`` narrows the
+        selection down to specific ones.
+        """
+        if identifiers is None:
+            selection = {"selectionType": "registered"}
+        else:
+            selection = {
+                "selectionType": "thermostats",
+                "selectionMatch": ",".join(identifiers),
+            }
+        for include in includes:
+            selection[include] = "true"
+        if self.include_notifications and "includeSettings" in includes:
+            selection["includeNotificationSettings"] = self.include_notifications
+        return {"json": json.dumps({"selection": selection})}
+
+    def _store_thermostats(
+        self,
+        response: Optional[dict],
+        merge: bool = False,
+        includes: Iterable[str] = ECOBEE_SELECTION_FULL,
+    ) -> bool:
+        """Caches the thermostat list from a read of every registered thermostat.
+
+        The response is merged into the existing cache in place, so cached
+        dicts keep their identity across polls and ``self.last_changes``
+        reports what moved. Thermostats absent from the response are
+        dropped. Unless ``merge`` is set (a partial read), sections the
+        response no longer has are dropped too, and the cache is put back
+        into the order of the response.
+        """
+        try:
+            thermostat_list = response["thermostatList"]
         except (KeyError, TypeError):
             return False
 
-    def get_thermostat(self, index: int) -> str:
-        """Returns a single thermostat based on list index of self.thermostats."""
-        return self.thermostats[index]
+        with self._cache_lock:
+            if self.thermostats is None:
+                self.thermostats = thermostat_list
+                self.last_changes = {
+                    thermostat["identifier"]: ThermostatChanges(thermostat["identifier"], added=True)
+                    for thermostat in thermostat_list
+                }
+                self.provisional = {}
+                self._reindex()
+                self._record_fetch(
+                    [thermostat["identifier"] for thermostat in thermostat_list], includes
+                )
+                return True
+            self.last_changes = {}
+            self._merge_thermostats(response, includes, replace=not merge)
+            identifiers = [thermostat["identifier"] for thermostat in thermostat_list]
+            self._drop_unregistered(set(identifiers))
+            if not merge:
+                order = {identifier: i for i, identifier in enumerate(identifiers)}
+                self.thermostats.sort(key=lambda thermostat: order[thermostat["identifier"]])
+                self._reindex()
+        return True
+
+    def get_thermostat_summary(self) -> Optional[dict]:
+        """Returns a :class:`ThermostatRevision` per registered thermostat, keyed by identifier.
+
+        ``thermostatSummary`` is a few hundred bytes regardless of how much
+        data the thermostats hold, so it is cheap enough to call every poll.
+        Returns None if the request fails; raises EcobeeCircuitOpenError
+        while the circuit is open, as :meth:`get_thermostats` does.
+        """
+        response = self._request_with_refresh(
+            "GET",
+            ECOBEE_ENDPOINT_THERMOSTAT_SUMMARY,
+            "get thermostat summary",
+            params=self._summary_params(),
+        )
+        return self._parse_summary(response)
+
+    @staticmethod
+    def _summary_params() -> dict:
+        return {
+            "json": json.dumps(
+                {"selection": {"selectionType": "registered", "selectionMatch": ""}}
+            )
+        }
+
+    @staticmethod
+    def _parse_summary(response: Optional[dict]) -> Optional[dict]:
+        try:
+            revisions = [
+                ThermostatRevision.from_summary(revision)
+                for revision in response["revisionList"]
+            ]
+        except (KeyError, TypeError, IndexError):
+            return None
+        return {revision.identifier: revision for revision in revisions}
+
+    @with_deadline
+    def get_changed_thermostats(self) -> bool:
+        """Re-fetches only the thermostats, and sections, whose revisions moved.
+
+        Compares a fresh ``thermostatSummary`` against the revisions seen on
+        the previous call and requests just the sections that correspond to
+        the revisions that changed (see ``ECOBEE_REVISION_SECTIONS``). When
+        nothing changed this costs a single summary request. Thermostats
+        that are new to the account are fetched in full; thermostats no
+        longer registered are dropped from ``self.thermostats``. Weather has
+        no revision, so it is re-read once older than its ``section_ttls``
+        entry. Returns
+        False if a request fails; raises EcobeeCircuitOpenError while the
+        circuit is open, as :meth:`get_thermostats` does.
+        """
+        revisions = self.get_thermostat_summary()
+        if revisions is None:
+            return False
+
+        if self.thermostats is None:
+            if not self.get_thermostats():
+                return False
+        else:
+            self.last_changes = {}
+            for includes, identifiers in self._changed_selections(revisions):
+                response = self._request_with_refresh(
+                    "GET",
+                    ECOBEE_ENDPOINT_THERMOSTAT,
+                    "get changed thermostats",
+                    params=self._thermostats_params(includes, identifiers),
+                )
+                if not self._merge_thermostats(response, includes):
+                    return False
+            self._drop_unregistered(revisions)
 
-    def get_remote_sensors(self, index: int) -> str:
-        """Returns remote sensors from a thermostat based on list index of self.thermostats."""
-        return self.thermostats[index]["remoteSensors"]
+        # Sections whose revision did not move are as fresh as the summary.
+        self._record_fetch(revisions, _REVISED_INCLUDES)
+        self.revisions = revisions
+        return True
+
+    def _changed_selections(self, revisions: dict) -> Iterator[tuple]:
+        """Yields ``(includes, identifiers)`` for each request get_changed_thermostats needs.
 
-    def get_equipment_notifications(self, index: int) -> str:
-        """Returns equipment notifications from a thermostat based on list index of self.thermostats."""
-        return self.thermostats[index]["notificationSettings"]["equipment"]
+        Thermostats that need the same sections share a request. No revision
+        covers weather, so it is re-read along with them once it is older
+        than its entry in ``section_ttls``.
+        """
+        now = time.time()
+        weather_ttl = self.section_ttls.get("includeWeather")
+        cached = {thermostat["identifier"] for thermostat in self.thermostats}
+        selections = {}
+        for identifier, revision in revisions.items():
+            previous = self.revisions.get(identifier)
+            if previous is None or identifier not in cached:
+                includes = ECOBEE_SELECTION_FULL
+            else:
+                includes = tuple(
+                    include
+                    for field, section_includes in ECOBEE_REVISION_SECTIONS.items()
+                    if getattr(revision, field) != getattr(previous, field)
+                    for include in section_includes
+                )
+                fetched = self.fetched_at.get(identifier, {}).get("includeWeather", 0)
+                if weather_ttl is not None and now - fetched > weather_ttl:
+                    includes += ("includeWeather",)
+            if includes:
+                selections.setdefault(includes, []).append(identifier)
+        return self._chunked(selections)
+
+    @staticmethod
+    def _chunked(selections: dict) -> Iterator[tuple]:
+        """Splits ``{includes: identifiers}`` into requests of at most 25 thermostats."""
+        for includes, identifiers in selections.items():
+            for start in range(0, len(identifiers), ECOBEE_MAX_SELECTION_MATCH):
+                yield includes, identifiers[start:start + ECOBEE_MAX_SELECTION_MATCH]
+
+    def _merge_thermostats(
+        self, response: Optional[dict], includes: Iterable[str] = (), replace: bool = False
+    ) -> bool:
+        """Merges a partial thermostat read into ``self.thermostats`` by identifier.
+
+        Sections absent from the response are left as they were, unless
+        ``replace`` is set for a full read, which drops them. What changed
+        is recorded in ``self.last_changes``, keyed by identifier, and the
+        ``includes`` that were read are stamped in ``self.fetched_at``.
+        """
+        try:
+            thermostat_list = response["thermostatList"]
+        except (KeyError, TypeError):
+            return False
+
+        with self._cache_lock:
+            cached = {thermostat["identifier"]: thermostat for thermostat in self.thermostats}
+            for thermostat in thermostat_list:
+                identifier = thermostat["identifier"]
+                existing = cached.get(identifier)
+                if existing is None:
+                    self.thermostats.append(thermostat)
+                    self.last_changes[identifier] = ThermostatChanges(identifier, added=True)
+                    continue
+                changes = ThermostatChanges.between(existing, thermostat)
+                if changes:
+                    self.last_changes[identifier] = changes
+                if replace:
+                    for key in existing.keys() - thermostat.keys():
+                        del existing[key]
+                for key, value in thermostat.items():
+                    _merge_section(existing, key, value)
+                if identifier in self.provisional:
+                    self.provisional[identifier].difference_update(thermostat)
+                    if not self.provisional[identifier]:
+                        del self.provisional[identifier]
+            self._reindex()
+            self._record_fetch(
+                [thermostat["identifier"] for thermostat in thermostat_list], includes
+            )
+        return True
 
-    def update(self) -> bool:
-        """Gets new thermostat data from ecobee; wrapper for get_thermostats."""
+    def _drop_unregistered(self, identifiers: Iterable[str]) -> None:
+        with self._cache_lock:
+            kept = []
+            for thermostat in self.thermostats:
+                if thermostat["identifier"] in identifiers:
+                    kept.append(thermostat)
+                else:
+                    self.last_changes[thermostat["identifier"]] = ThermostatChanges(
+                        thermostat["identifier"], removed=True
+                    )
+                    self.fetched_at.pop(thermostat["identifier"], None)
+                    self.provisional.pop(thermostat["identifier"], None)
+            self.thermostats[:] = kept
+            self._reindex()
+
+    def _record_fetch(self, identifiers: Iterable[str], includes: Iterable[str]) -> None:
+        fetched = dict.fromkeys(includes, time.time())
+        for identifier in identifiers:
+            self.fetched_at.setdefault(identifier, {}).update(fetched)
+
+    def section_age(self, index: Union[int, str], include: str) -> Optional[float]:
+        """Seconds since a section (an include flag) of a thermostat was read, or None."""
+        fetched = self.fetched_at.get(self._identifier(index), {}).get(include)
+        return None if fetched is None else time.time() - fetched
+
+    def refresh_stale(
+        self,
+        index: Union[int, str, None] = None,
+        max_age: Union[float, Dict[str, float], None] = None,
+        sections: Iterable[str] = ECOBEE_SELECTION_FULL,
+    ) -> bool:
+        """Re-reads the cached sections that are older than allowed.
+
+        ``max_age`` is one age in seconds for every section, a dict of
+        include flag to seconds, or None to use ``self.section_ttls``. Only
+        the stale sections of the stale thermostats (``index``, or all of
+        them) are requested. Concurrent callers queue on one lock and check
+        ages again once they hold it, so a burst of them costs one fetch.
+        Returns False if a fetch failed.
+        """
+        with self._fetch_lock:
+            if self.thermostats is None:
+                return self.get_thermostats()
+            self.last_changes = {}
+            for includes, identifiers in self._stale_selections(index, max_age, sections):
+                response = self._request_with_refresh(
+                    "GET",
+                    ECOBEE_ENDPOINT_THERMOSTAT,
+                    "refresh stale thermostats",
+                    params=self._thermostats_params(includes, identifiers),
+                )
+                if not self._merge_thermostats(response, includes):
+                    return False
+            return True
+
+    def _stale_selections(
+        self,
+        index: Union[int, str, None],
+        max_age: Union[float, Dict[str, float], None],
+        sections: Iterable[str],
+    ) -> Iterator[tuple]:
+        """Yields ``(includes, identifiers)`` for each request refresh_stale needs."""
+        now = time.time()
+        thermostats = self.thermostats if index is None else [self.get_thermostat(index)]
+        selections = {}
+        for thermostat in thermostats:
+            fetched = self.fetched_at.get(thermostat["identifier"], {})
+            includes = tuple(
+                include
+                for include in sections
+                if now - fetched.get(include, 0) > self._max_age(include, max_age)
+            )
+            if includes:
+                selections.setdefault(includes, []).append(thermostat["identifier"])
+        yield from self._chunked(selections)
+
+    def _max_age(self, include: str, max_age: Union[float, Dict[str, float], None]) -> float:
+        if isinstance(max_age, dict):
+            return max_age.get(include, self.section_ttls.get(include, 0))
+        if max_age is None:
+            return self.section_ttls.get(include, 0)
+        return max_age
+
+    def _reindex(self) -> None:
+        """Rebuilds the thermostat lookups after ``self.thermostats`` changes.
+
+        Sensor and climate lookups are built per thermostat on first use and
+        thrown away here, so each is built at most once per fetch. Models
+        read the cached dicts live, so only those of thermostats no longer
+        cached are dropped.
+        """
+        thermostats = self.thermostats or []
+        self._indexed_thermostats = self.thermostats
+        self._by_identifier = {}
+        self._by_name = {}
+        for position, thermostat in enumerate(thermostats):
+            self._by_identifier[thermostat["identifier"]] = position
+            self._by_name.setdefault(thermostat.get("name"), position)
+        self._sensor_indexes = {}
+        self._climate_indexes = {}
+        self._models = {
+            identifier: model
+            for identifier, model in self._models.items()
+            if identifier in self._by_identifier
+        }
+
+    def _ensure_index(self) -> None:
+        # Catches self.thermostats being reassigned from outside the library.
+        if self._indexed_thermostats is not self.thermostats:
+            self._reindex()
+
+    def _position(self, index: Union[int, str]) -> int:
+        """Resolves a list index, identifier or thermostat name to a list index."""
+        if not isinstance(index, str):
+            return index
+        self._ensure_index()
+        position = self._by_identifier.get(index)
+        if position is None:
+            position = self._by_name.get(index)
+        if position is None:
+            raise InvalidThermostatError(f"no thermostat with identifier or name {index}")
+        return position
+
+    def _sensor_index(self, index: Union[int, str]) -> tuple:
+        """Returns ``(by_id, by_name)`` for a thermostat's remote sensors.
+
+        ``by_name`` maps to a list as sensor names are not unique.
+        """
+        thermostat = self.get_thermostat(index)
+        sensor_index = self._sensor_indexes.get(thermostat["identifier"])
+        if sensor_index is None:
+            by_id, by_name = {}, {}
+            for sensor in thermostat.get("remoteSensors", ()):
+                by_id[sensor["id"]] = sensor
+                by_name.setdefault(sensor["name"], []).append(sensor)
+            sensor_index = self._sensor_indexes[thermostat["identifier"]] = (by_id, by_name)
+        return sensor_index
+
+    def _climate_index(self, index: Union[int, str]) -> tuple:
+        """Returns ``(by_ref, by_name)`` for a thermostat's program climates."""
+        thermostat = self.get_thermostat(index)
+        climate_index = self._climate_indexes.get(thermostat["identifier"])
+        if climate_index is None:
+            by_ref, by_name = {}, {}
+            for climate in thermostat.get("program", {}).get("climates", ()):
+                by_ref[climate["climateRef"]] = climate
+                by_name[climate["name"]] = climate
+            climate_index = self._climate_indexes[thermostat["identifier"]] = (by_ref, by_name)
+        return climate_index
+
+    def get_thermostat(
+        self,
+        index: Union[int, str],
+        max_age: Union[float, Dict[str, float], None] = None,
+    ) -> dict:
+        """Returns a single thermostat by list index, identifier or name.
+
+        With ``max_age`` set, sections older than that are re-read first;
+        see :meth:`refresh_stale`. Pass ``self.section_ttls`` to use the
+        per-section defaults.
+        """
+        if max_age is not None:
+            self.refresh_stale(index, max_age)
+        return self.thermostats[self._position(index)]
+
+    def get_thermostat_model(self, index: Union[int, str]) -> Thermostat:
+        """Returns a :class:`~pyecobee.models.Thermostat` view of a cached thermostat.
+
+        The view wraps the same dict :meth:`get_thermostat` returns, so it
+        sees merges and optimistic writes, and is reused until a fetch
+        replaces that dict.
+        """
+        thermostat = self.get_thermostat(index)
+        model = self._models.get(thermostat["identifier"])
+        if model is None or model.raw is not thermostat:
+            model = self._models[thermostat["identifier"]] = Thermostat(thermostat)
+        return model
+
+    def get_remote_sensors(
+        self,
+        index: Union[int, str],
+        max_age: Union[float, Dict[str, float], None] = None,
+    ) -> list:
+        """Returns remote sensors from a thermostat by list index, identifier or name.
+
+        ``max_age`` works as for :meth:`get_thermostat`, for the sensors only.
+        """
+        if max_age is not None:
+            self.refresh_stale(index, max_age, ("includeSensors",))
+        return self.get_thermostat(index)["remoteSensors"]
+
+    def get_remote_sensor(self, index: Union[int, str], sensor: str) -> dict:
+        """Returns one remote sensor by sensor id or, failing that, by name."""
+        by_id, by_name = self._sensor_index(index)
+        if sensor in by_id:
+            return by_id[sensor]
+        try:
+            return by_name[sensor][0]
+        except KeyError:
+            raise InvalidSensorError(f"no sensor with id or name {sensor} on thermostat") from None
+
+    def get_climate(self, index: Union[int, str], climate: str) -> Optional[dict]:
+        """Returns one program climate by climateRef or name, or None."""
+        by_ref, by_name = self._climate_index(index)
+        return by_ref.get(climate, by_name.get(climate))
+
+    def get_equipment_notifications(self, index: Union[int, str]) -> str:
+        """Returns equipment notifications from a thermostat by list index, identifier or name."""
+        return self.get_thermostat(index)["notificationSettings"]["equipment"]
+
+    @with_deadline
+    def update(self, changed_only: bool = False) -> bool:
+        """Gets new thermostat data from ecobee; wrapper for get_thermostats.
+
+        With ``changed_only`` set, wraps :meth:`get_changed_thermostats` instead.
+        Returns False on failure, and raises EcobeeCircuitOpenError while
+        the circuit is open, as those do.
+        """
+        if changed_only:
+            return self.get_changed_thermostats()
         return self.get_thermostats()
 
-    def set_hvac_mode(self, index: int, hvac_mode: str) -> None:
+    def watch(
+        self,
+        interval: float = ECOBEE_DEFAULT_WATCH_INTERVAL,
+        stop: Optional[threading.Event] = None,
+        aligned: bool = False,
+    ) -> Iterator[ChangeEvent]:
+        """Polls every ``interval`` seconds and yields what changed.
+
+        Yields :mod:`pyecobee.watch` events (setpoint, HVAC mode, equipment
+        status, occupancy and new events) until ``stop`` is set or the
+        generator is closed. Each poll is :meth:`get_changed_thermostats`,
+        so a quiet account costs one ``thermostatSummary`` request per poll.
+        The first poll only primes the cache and yields nothing.
+
+        With ``aligned`` set, polls are timed by a
+        :class:`~pyecobee.cadence.PollScheduler` to land just after the
+        thermostats are expected to report, instead of every ``interval``.
+        While api.ecobee.com's circuit breaker is open, waits until it lets
+        a probe through instead of polling.
+        """
+        stop = stop or threading.Event()
+        poll_scheduler = PollScheduler(interval) if aligned else None
+        primed = self.thermostats is not None
+        while not stop.is_set():
+            try:
+                polled = self.get_changed_thermostats()
+            except EcobeeCircuitOpenError as err:
+                _LOGGER.warning(f"ecobee watch paused: {err}")
+                stop.wait(err.retry_in or interval)
+                continue
+            if polled:
+                if primed:
+                    for changes in self.last_changes.values():
+                        yield from change_events(changes)
+                primed = True
+            else:
+                _LOGGER.warning(f"ecobee watch poll failed; retrying in {interval} seconds")
+            stop.wait(self._watch_wait(interval, poll_scheduler))
+
+    def _watch_wait(self, interval: float, poll_scheduler: Optional[PollScheduler]) -> float:
+        """Returns the seconds :meth:`watch` sleeps after a poll."""
+        if poll_scheduler is None:
+            return interval
+        return max(0.0, poll_scheduler.observe(self, self) - time.time())
+
+    def iter_runtime_report(
+        self,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        columns: Sequence[str] = ECOBEE_RUNTIME_REPORT_COLUMNS,
+        include_sensors: bool = False,
+    ) -> Iterator[ReportRow]:
+        """Streams 5-minute runtime history as :class:`~pyecobee.runtime_report.ReportRow` objects.
+
+        ``start_date`` and ``end_date`` are inclusive. The range is split into
+        31-day requests of up to 25 thermostats each, and every response is
+        parsed as it downloads, so memory use does not grow with the range.
+        Raises :class:`EcobeeError` if a window cannot be fetched rather than
+        leaving a silent gap.
+        """
+        for identifiers, window_start, window_end in self._report_requests(
+            targets, start_date, end_date
+        ):
+            response = self._request_with_refresh(
+                "GET",
+                ECOBEE_ENDPOINT_RUNTIME_REPORT,
+                "get runtime report",
+                params=report_params(
+                    identifiers, window_start, window_end, columns, include_sensors
+                ),
+                stream=True,
+            )
+            if response is None:
+                raise EcobeeError(
+                    f"Unable to fetch runtime report for {window_start} to {window_end}"
+                )
+            parser = RuntimeReportParser()
+            with response:
+                for chunk in response.iter_content(ECOBEE_STREAM_CHUNK_SIZE):
+                    yield from parser.feed(chunk)
+                yield from parser.close()
+
+    @with_deadline
+    def get_runtime_report(
+        self,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        columns: Sequence[str] = ECOBEE_RUNTIME_REPORT_COLUMNS,
+        include_sensors: bool = False,
+    ) -> Dict[str, RuntimeReport]:
+        """Returns columnar runtime history per thermostat; see :meth:`iter_runtime_report`."""
+        return collect_report(
+            self.iter_runtime_report(targets, start_date, end_date, columns, include_sensors)
+        )
+
+    def get_runtime_history(
+        self,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        columns: Sequence[str] = ECOBEE_RUNTIME_REPORT_COLUMNS,
+        include_sensors: bool = False,
+    ) -> dict:
+        """Returns a NumPy-backed :class:`~pyecobee.history.RuntimeHistory` per thermostat.
+
+        Requires ``numpy``; see :meth:`get_runtime_report` for the download.
+        With ``include_sensors`` each history also holds the sensor columns,
+        keyed by sensor id and encoded by their ``sensorType``.
+        """
+        return self._histories(
+            self.get_runtime_report(targets, start_date, end_date, columns, include_sensors),
+            include_sensors,
+        )
+
+    @staticmethod
+    def _histories(reports: Dict[str, RuntimeReport], include_sensors: bool) -> dict:
+        from .history import RuntimeHistory
+
+        histories = {}
+        for identifier, report in reports.items():
+            history = RuntimeHistory.from_report(report)
+            if include_sensors:
+                history = history.join(RuntimeHistory.from_report(report, sensors=True))
+            histories[identifier] = history
+        return histories
+
+    def _report_requests(
+        self,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> Iterator[tuple]:
+        """Yields ``(identifiers, window_start, window_end)`` per runtimeReport request."""
+        if isinstance(targets, (int, str)):
+            targets = [targets]
+        identifiers = [self._identifier(target) for target in targets]
+        for window_start, window_end in report_windows(start_date, end_date):
+            for start in range(0, len(identifiers), ECOBEE_MAX_SELECTION_MATCH):
+                yield identifiers[start:start + ECOBEE_MAX_SELECTION_MATCH], window_start, window_end
+
+    def set_hvac_mode(self, index: Union[int, str], hvac_mode: str) -> Optional[Future]:
         """Sets the HVAC mode (auto, auxHeatOnly, cool, heat, off)."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"hvacMode": hvac_mode}},
         }
         log_msg_action = "set HVAC mode"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_fan_min_on_time(self, index: int, fan_min_on_time: int) -> None:
+    def set_fan_min_on_time(self, index: Union[int, str], fan_min_on_time: int) -> Optional[Future]:
         """Sets the minimum time, in minutes, to run the fan each hour (1 to 60)."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"fanMinOnTime": fan_min_on_time}},
         }
         log_msg_action = "set fan minimum on time"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
     def set_fan_mode(
         self,
-        index: int,
+        index: Union[int, str],
         fan_mode: str,
         hold_type: str,
         **optional_arg,
-    ) -> None:
+    ) -> Optional[Future]:
         """
         Sets the fan mode (auto, minontime, on).
             valid optional_arg
@@ -700,7 +1984,7 @@ class Ecobee(object):
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "functions": [
                 {
@@ -725,27 +2009,22 @@ class Ecobee(object):
 
         log_msg_action = "set fan mode"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
     def set_hold_temp(
         self,
-        index: int,
+        index: Union[int, str],
         cool_temp: float,
         heat_temp: float,
         hold_type: str = "nextTransition",
         hold_hours: str = "2",
-    ) -> None:
+    ) -> Optional[Future]:
         """Sets a hold temperature."""
         if hold_type == "holdHours":
             body = {
                 "selection": {
                     "selectionType": "thermostats",
-                    "selectionMatch": self.thermostats[index]["identifier"],
+                    "selectionMatch": self._identifier(index),
                 },
                 "functions": [
                     {
@@ -763,7 +2042,7 @@ class Ecobee(object):
             body = {
                 "selection": {
                     "selectionType": "thermostats",
-                    "selectionMatch": self.thermostats[index]["identifier"],
+                    "selectionMatch": self._identifier(index),
                 },
                 "functions": [
                     {
@@ -778,21 +2057,16 @@ class Ecobee(object):
             }
         log_msg_action = "set hold temp"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
     def set_climate_hold(
-        self, index: int, climate: str, hold_type: str = "nextTransition", hold_hours: int = None
-    ) -> None:
+        self, index: Union[int, str], climate: str, hold_type: str = "nextTransition", hold_hours: int = None
+    ) -> Optional[Future]:
         """Sets a climate hold (away, home, sleep)."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "functions": [
                 {
@@ -807,16 +2081,11 @@ class Ecobee(object):
 
         log_msg_action = "set climate hold"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
     def create_vacation(
         self,
-        index: int,
+        index: Union[int, str],
         vacation_name: str,
         cool_temp: float,
         heat_temp: float,
@@ -826,12 +2095,12 @@ class Ecobee(object):
         end_time: str = None,
         fan_mode: str = "auto",
         fan_min_on_time: str = "0",
-    ) -> None:
+    ) -> Optional[Future]:
         """Creates a vacation."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "functions": [
                 {
@@ -852,37 +2121,27 @@ class Ecobee(object):
         }
         log_msg_action = "create a vacation"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def delete_vacation(self, index: int, vacation: str) -> None:
+    def delete_vacation(self, index: Union[int, str], vacation: str) -> Optional[Future]:
         """Deletes a vacation."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "functions": [{"type": "deleteVacation", "params": {"name": vacation}}],
         }
         log_msg_action = "delete a vacation"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def resume_program(self, index: int, resume_all: bool = False) -> None:
+    def resume_program(self, index: Union[int, str], resume_all: bool = False) -> Optional[Future]:
         """Resumes the currently scheduled program."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "functions": [
                 {"type": "resumeProgram", "params": {"resumeAll": resume_all}}
@@ -890,14 +2149,9 @@ class Ecobee(object):
         }
         log_msg_action = "resume program"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def send_message(self, index: int, message: str = None) -> None:
+    def send_message(self, index: Union[int, str], message: str = None) -> Optional[Future]:
         """Sends the first 500 characters of a message to the thermostat."""
         if message is None:
             message = "Hello from pyecobee!"
@@ -905,117 +2159,87 @@ class Ecobee(object):
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "functions": [{"type": "sendMessage", "params": {"text": message[0:500]}}],
         }
         log_msg_action = "send message"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_dehumidifier_mode(self, index: int, dehumidifier_mode: str) -> None:
+    def set_dehumidifier_mode(self, index: Union[int, str], dehumidifier_mode: str) -> Optional[Future]:
         """Sets the dehumidifier mode (on, off)."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"dehumidifierMode": dehumidifier_mode}},
         }
         log_msg_action = "set dehumidifier mode"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_dehumidifier_level(self, index: int, dehumidifier_level: int) -> None:
+    def set_dehumidifier_level(self, index: Union[int, str], dehumidifier_level: int) -> Optional[Future]:
         """Sets the dehumidification set point in percentage."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"dehumidifierLevel": dehumidifier_level}}
         }
         log_msg_action = "set dehumidifier level"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_humidifier_mode(self, index: int, humidifier_mode: str) -> None:
+    def set_humidifier_mode(self, index: Union[int, str], humidifier_mode: str) -> Optional[Future]:
         """Sets the humidifier mode (auto, off, manual)."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"humidifierMode": humidifier_mode}},
         }
         log_msg_action = "set humidifier mode"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_humidity(self, index: int, humidity: str) -> None:
+    def set_humidity(self, index: Union[int, str], humidity: str) -> Optional[Future]:
         """Sets target humidity level."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"humidity": str(humidity)}},
         }
         log_msg_action = "set humidity level"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_mic_mode(self, index: int, mic_enabled: bool) -> None:
+    def set_mic_mode(self, index: Union[int, str], mic_enabled: bool) -> Optional[Future]:
         """Enables/Disables Alexa microphone (only for ecobee4)."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"audio": {"microphoneEnabled": mic_enabled}},
         }
         log_msg_action = "set mic mode"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
     def set_occupancy_modes(
-        self, index: int, auto_away: bool = None, follow_me: bool = None
-    ) -> None:
+        self, index: Union[int, str], auto_away: bool = None, follow_me: bool = None
+    ) -> Optional[Future]:
         """Enables/Disables Smart Home/Away and Follow Me modes."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {
                 "settings": {"autoAway": auto_away, "followMeComfort": follow_me}
@@ -1023,159 +2247,114 @@ class Ecobee(object):
         }
         log_msg_action = "set occupancy modes"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_dst_mode(self, index: int, enable_dst: bool) -> None:
+    def set_dst_mode(self, index: Union[int, str], enable_dst: bool) -> Optional[Future]:
         """Enables/Disables daylight savings time."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"location": {"isDaylightSaving": enable_dst}},
         }
         log_msg_action = "set dst mode"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_vent_mode(self, index: int, vent_mode: str) -> None:
+    def set_vent_mode(self, index: Union[int, str], vent_mode: str) -> Optional[Future]:
         """Sets the ventilator mode. Values: auto, minontime, on, off."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"vent": vent_mode}},
         }
         log_msg_action = "set vent mode"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_ventilator_min_on_time(self, index: int, ventilator_min_on_time: int) -> None:
+    def set_ventilator_min_on_time(self, index: Union[int, str], ventilator_min_on_time: int) -> Optional[Future]:
         """Sets the minimum time in minutes the ventilator is configured to run."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"ventilatorMinOnTime": ventilator_min_on_time}},
         }
         log_msg_action = "set ventilator minimum on time"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_ventilator_min_on_time_home(self, index: int, ventilator_min_on_time_home: int) -> None:
+    def set_ventilator_min_on_time_home(self, index: Union[int, str], ventilator_min_on_time_home: int) -> Optional[Future]:
         """Sets the number of minutes to run ventilator per hour when home."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"ventilatorMinOnTimeHome": ventilator_min_on_time_home}},
         }
         log_msg_action = "set ventilator minimum on time when homw"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_ventilator_min_on_time_away(self, index: int, ventilator_min_on_time_away: int) -> None:
+    def set_ventilator_min_on_time_away(self, index: Union[int, str], ventilator_min_on_time_away: int) -> Optional[Future]:
         """Sets the number of minutes to run ventilator per hour when away."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"ventilatorMinOnTimeAway": ventilator_min_on_time_away}},
         }
         log_msg_action = "set ventilator minimum on time when away"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_ventilator_timer(self, index: int, ventilator_on: bool) -> None:
+    def set_ventilator_timer(self, index: Union[int, str], ventilator_on: bool) -> Optional[Future]:
         """Sets whether the ventilator timer is on or off."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"isVentilatorTimerOn": ventilator_on}},
         }
         log_msg_action = "set ventilator timer"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_aux_cutover_threshold(self, index: int, threshold: int) -> None:
+    def set_aux_cutover_threshold(self, index: Union[int, str], threshold: int) -> Optional[Future]:
         """Set the threshold for outdoor temp below which alt heat will be used."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"compressorProtectionMinTemp": int(threshold * 10)}},
         }
         log_msg_action = "set outdoor temp threshold for aux"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
-    def set_aux_maxtemp_threshold(self, index: int, threshold: int) -> None:
+    def set_aux_maxtemp_threshold(self, index: Union[int, str], threshold: int) -> Optional[Future]:
         """Set the threshold for outdoor temp above which alt heat will not be used."""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {"settings": {"auxMaxOutdoorTemp": int(threshold * 10)}},
         }
         log_msg_action = "set max outdoor temp threshold for aux"
 
-        try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
-            )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+        return self._post_thermostat(log_msg_action, body)
 
     
-    def update_climate_sensors(self, index: int, climate_name: str, sensor_names: Optional[list]=None, sensor_ids: Optional[list]=None) -> None:
+    def update_climate_sensors(self, index: Union[int, str], climate_name: str, sensor_names: Optional[list]=None, sensor_ids: Optional[list]=None) -> Optional[Future]:
         """Get current climate program. Must provide either `sensor_names` or `ids`."""
         # Ensure only either `sensor_names` or `ids` was provided.
         if sensor_names is None and sensor_ids is None:
@@ -1183,48 +2362,43 @@ class Ecobee(object):
         if sensor_names and sensor_ids:
             raise ValueError("Either `sensor_names` or `ids` should be provided, not both.")
 
-        programs: dict = self.thermostats[index]["program"]
+        programs: dict = self.get_thermostat(index)["program"]
         # Remove currentClimateRef key.
         programs.pop("currentClimateRef", None)
 
-        for i, climate in enumerate(programs["climates"]):
-            if climate["name"] == climate_name:
-                climate_index = i
-        sensors = self.get_remote_sensors(index)
+        climate = self._climate_index(index)[1].get(climate_name)
+        sensors_by_id, sensors_by_name = self._sensor_index(index)
         sensor_list = []
 
         if sensor_ids:
             """Update climate sensors with sensor_ids list."""
             for id in sensor_ids:
-                for sensor in sensors:
-                    if sensor["id"] == id:
-                        sensor_list.append(
-                            {"id": "{}:1".format(id), "name": sensor["name"]})
+                sensor = sensors_by_id.get(id)
+                if sensor is not None:
+                    sensor_list.append(
+                        {"id": "{}:1".format(id), "name": sensor["name"]})
 
         if sensor_names:
             """Update climate sensors with sensor_names list."""
             for name in sensor_names:
                 """Find the sensor id from the name."""
-                for sensor in sensors:
-                    if sensor["name"] == name:
-                        sensor_list.append(
-                            {"id": "{}:1".format(sensor["id"]), "name": name})
+                for sensor in sensors_by_name.get(name, ()):
+                    sensor_list.append(
+                        {"id": "{}:1".format(sensor["id"]), "name": name})
 
         if len(sensor_list) == 0:
             raise InvalidSensorError("no sensor matching provided ids or names on thermostat")
 
-        try:
-            programs["climates"][climate_index]["sensors"] = sensor_list
-        except UnboundLocalError:
-            """This would occur if the climate_index was not assigned
-                because the climate name does not exist in the program climates."""
+        if climate is None:
+            """The climate name does not exist in the program climates."""
             return
+        climate["sensors"] = sensor_list
 
         """Updates Climate"""
         body = {
             "selection": {
                 "selectionType": "thermostats",
-                "selectionMatch": self.thermostats[index]["identifier"],
+                "selectionMatch": self._identifier(index),
             },
             "thermostat": {
                 "program": programs
@@ -1232,12 +2406,184 @@ class Ecobee(object):
         }
         log_msg_action = "upate climate sensors"
 
+        return self._post_thermostat(log_msg_action, body)
+
+    def set_hvac_mode_many(self, targets: Sequence[Union[int, str]], hvac_mode: str) -> None:
+        """Sets the HVAC mode on many thermostats; see :meth:`set_hvac_mode`."""
+        return self._write_many(targets, "set_hvac_mode", hvac_mode)
+
+    def resume_program_many(
+        self, targets: Sequence[Union[int, str]], resume_all: bool = False
+    ) -> None:
+        """Resumes the scheduled program on many thermostats; see :meth:`resume_program`."""
+        return self._write_many(targets, "resume_program", resume_all)
+
+    def set_climate_hold_many(
+        self,
+        targets: Sequence[Union[int, str]],
+        climate: str,
+        hold_type: str = "nextTransition",
+        hold_hours: int = None,
+    ) -> None:
+        """Sets a climate hold on many thermostats; see :meth:`set_climate_hold`."""
+        return self._write_many(targets, "set_climate_hold", climate, hold_type, hold_hours)
+
+    def _write_many(self, targets: Sequence[Union[int, str]], method_name: str, *args):
+        """Runs one write method's body builder once and sends it to every target.
+
+        ``targets`` may mix list indexes and thermostat identifiers. The API
+        accepts up to ECOBEE_MAX_SELECTION_MATCH comma-joined identifiers per
+        selection, so one request goes out per chunk of that size.
+        """
+        identifiers = [self._identifier(target) for target in targets]
+        if not identifiers:
+            return None
+        batch = ThermostatBatch(self, identifiers[0])
+        getattr(batch, method_name)(*args)
+        log_msg_action = batch._actions[0]
+        body = batch.body()
+
+        chunks = []
+        for start in range(0, len(identifiers), ECOBEE_MAX_SELECTION_MATCH):
+            chunk = identifiers[start:start + ECOBEE_MAX_SELECTION_MATCH]
+            chunk_body = dict(
+                body,
+                selection={
+                    "selectionType": "thermostats",
+                    "selectionMatch": ",".join(chunk),
+                },
+            )
+            chunks.append(
+                (f"{log_msg_action} on {len(chunk)} thermostats", chunk_body)
+            )
+        return self._send_thermostat_updates(chunks)
+
+    def _send_thermostat_updates(self, updates: List[tuple]) -> None:
+        """Sends several ``(log_msg_action, body)`` thermostat updates in turn."""
+        for log_msg_action, body in updates:
+            self._send_thermostat_update(log_msg_action, body)
+
+    def _identifier(self, index: Union[int, str]) -> str:
+        """Returns the thermostat identifier for a list index, identifier or name.
+
+        Strings that match no cached thermostat are passed through as
+        identifiers, so writes work before the first read.
+        """
+        if isinstance(index, str):
+            try:
+                return self.get_thermostat(index)["identifier"]
+            except InvalidThermostatError:
+                return index
+        return self.thermostats[index]["identifier"]
+
+    def batch(self, index: Union[int, str]) -> ThermostatBatch:
+        """Returns a :class:`ThermostatBatch` that sends several writes as one request."""
+        return ThermostatBatch(self, index)
+
+    def _post_thermostat(self, log_msg_action: str, body: dict) -> Optional[Future]:
+        """Sends a write, or records it if it was made through a batch.
+
+        Returns a Future while ``coalesce_window`` is set, otherwise None.
+        AsyncEcobee overrides the senders with coroutines, which its write
+        methods await, so its callers never see them.
+        """
+        batch = _active_batch.get()
+        if batch is not None:
+            batch.add(log_msg_action, body)
+            return None
+        if self.coalesce_window is not None:
+            return self._queue_write(log_msg_action, body)
+        return self._send_thermostat_update(log_msg_action, body)
+
+    def _queue_write(self, log_msg_action: str, body: dict) -> Future:
+        """Holds a write for ``coalesce_window`` seconds, merged with any that follow.
+
+        The window starts with the first write to a thermostat and is not
+        extended by later ones, so a stream of slider ticks goes out at
+        most once per window. Settings patches are merged with the later
+        value winning, consecutive ``setHold`` calls are folded into one,
+        and other functions keep their order. Returns a
+        ``concurrent.futures.Future`` that resolves to the API response of
+        the combined request, or raises :class:`EcobeeError` if it failed.
+        """
+        identifier = body["selection"]["selectionMatch"]
+        future = Future()
+        with self._pending_lock:
+            pending = self._pending_writes.get(identifier)
+            if pending is None:
+                pending = self._pending_writes[identifier] = _CoalescedWrites(self, identifier)
+                timer = threading.Timer(self.coalesce_window, self._flush_writes, (identifier,))
+                timer.daemon = True
+                timer.start()
+            pending.add(log_msg_action, body)
+            pending.futures.append(future)
+        return future
+
+    def _flush_writes(self, identifier: str) -> None:
+        with self._pending_lock:
+            pending = self._pending_writes.pop(identifier, None)
+        if pending is None:
+            return
         try:
-            self._request_with_refresh(
-                "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
+            body = pending.body()
+            response = self._request_with_refresh(
+                "POST", ECOBEE_ENDPOINT_THERMOSTAT, pending.action(), body=body
             )
-        except (ExpiredTokenError, InvalidTokenError) as err:
-            raise err
+            self._apply_if_optimistic(response, body)
+        except EcobeeError as err:
+            pending.settle(None, err)
+            return
+        except BaseException as err:
+            # Settle before re-raising, or every caller waits forever.
+            pending.settle(None, err)
+            raise
+        pending.settle(response)
+
+    def flush_writes(self) -> None:
+        """Sends every write waiting out ``coalesce_window`` now."""
+        for identifier in list(self._pending_writes):
+            self._flush_writes(identifier)
+
+    def _send_thermostat_update(self, log_msg_action: str, body: dict) -> None:
+        """Sends a thermostat update (settings patch and/or functions) to ecobee."""
+        response = self._request_with_refresh(
+            "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
+        )
+        self._apply_if_optimistic(response, body)
+
+    def _apply_if_optimistic(self, response: Optional[dict], body: dict) -> None:
+        """Applies a write to the cache if ``self.optimistic`` and ecobee accepted it.
+
+        Settings and other ``thermostat`` patches are merged into the cached
+        thermostat; ``setHold``, ``resumeProgram`` and vacation functions
+        have their known effect on the cached events and runtime, and the
+        events they create carry ``"provisional": True``. The touched
+        sections are listed in ``self.provisional`` until a read replaces
+        them.
+        """
+        if not self.optimistic or response is None:
+            return
+        if response.get("status", {}).get("code", 0) != 0:
+            return
+        patch = body.get("thermostat", {})
+        with self._cache_lock:
+            for identifier in body["selection"]["selectionMatch"].split(","):
+                try:
+                    thermostat = self.get_thermostat(identifier)
+                except (InvalidThermostatError, TypeError):
+                    continue
+                sections = self.provisional.setdefault(identifier, set())
+                for section, values in patch.items():
+                    if isinstance(values, dict) and isinstance(thermostat.get(section), dict):
+                        deep_update(thermostat[section], values)
+                    else:
+                        thermostat[section] = values
+                    sections.add(section)
+                for function in body.get("functions", ()):
+                    apply = _PROVISIONAL_FUNCTIONS.get(function["type"])
+                    if apply is not None:
+                        sections |= apply(thermostat, function.get("params", {}))
+            self._reindex()
 
     def _request_with_refresh(
         self,
@@ -1247,6 +2593,7 @@ class Ecobee(object):
         params: dict = None,
         body: dict = None,
         auth_request: bool = False,
+        stream: bool = False,
     ) -> Optional[str]:
         """
         Wrapper around _request, to refresh tokens if needed.
@@ -1255,15 +2602,20 @@ class Ecobee(object):
         """
         response = None
         refreshed = False
+        if not auth_request and self.token_expiring():
+            # Refresh ahead of expiry rather than paying for a failed request.
+            self._refresh_single_flight()
+            refreshed = True
         for _ in range(0, 2):
+            access_token = self.access_token
             try:
                 response = self._request(
-                    method, endpoint, log_msg_action, params, body, auth_request
+                    method, endpoint, log_msg_action, params, body, auth_request, stream
                 )
             except ExpiredTokenError:
                 if not refreshed:
                     # Refresh tokens and try again
-                    self.refresh_tokens()
+                    self._refresh_single_flight(access_token)
                     refreshed = True
                     continue
                 else:
@@ -1277,6 +2629,18 @@ class Ecobee(object):
 
         return response
 
+    def _request_url_and_headers(self, endpoint: str, auth_request: bool) -> tuple[str, dict]:
+        """Returns the URL and headers for a request to the ecobee API."""
+        if auth_request:
+            return f"{ECOBEE_BASE_URL}/{endpoint}", dict()
+        return (
+            f"{ECOBEE_BASE_URL}/{ECOBEE_API_VERSION}/{endpoint}",
+            {
+                "Content-Type": "application/json;charset=UTF-8",
+                "Authorization": f"Bearer {self.access_token}",
+            },
+        )
+
     def _request(
         self,
         method: str,
@@ -1285,37 +2649,119 @@ class Ecobee(object):
         params: dict = None,
         body: dict = None,
         auth_request: bool = False,
+        stream: bool = False,
     ) -> Optional[str]:
-        """Makes a request to the ecobee API."""
-        url = f"{ECOBEE_BASE_URL}/{endpoint}"
-        headers = dict()
+        """Makes a request to the ecobee API.
 
-        if not auth_request:
-            url = f"{ECOBEE_BASE_URL}/{ECOBEE_API_VERSION}/{endpoint}"
-            headers = {
-                "Content-Type": "application/json;charset=UTF-8",
-                "Authorization": f"Bearer {self.access_token}",
-            }
+        With ``stream`` set, a successful response is returned unread so the
+        caller can consume it with ``iter_content`` and must close it.
+        """
+        url, headers = self._request_url_and_headers(endpoint, auth_request)
 
-        _LOGGER.debug(
-            f"Making request to {endpoint} endpoint to {log_msg_action}: "
-            f"url: {url}, headers: {headers}, params: {params}, body: {body}"
-        )
+        self._log_request(endpoint, log_msg_action, url, headers, params, body)
 
-        try:
-            response = requests.request(
-                method, url, headers=headers, params=params, json=body, timeout=ECOBEE_DEFAULT_TIMEOUT
+        budgets = self._budgets()
+        priority = WRITE if method == "POST" else POLL
+        for attempt in itertools.count():
+            self.scheduler.acquire(budgets, priority, check_deadline(log_msg_action))
+            try:
+                response = self._send(
+                    self._session,
+                    method,
+                    url,
+                    headers=headers,
+                    params=params,
+                    json=body,
+                    stream=stream,
+                )
+            except RequestException as err:
+                # A write that may have reached ecobee is not sent twice.
+                delay = (
+                    self.scheduler.retry_delay(attempt)
+                    if priority == POLL or self._never_sent(err)
+                    else None
+                )
+                if delay is None:
+                    self._log_transport_error(err, log_msg_action)
+                    return None
+                self._check_retry_fits(delay, log_msg_action)
+                _LOGGER.warning(f"Retrying {log_msg_action} in {delay:.1f}s: {err}")
+                self.scheduler.backoff_wait(delay)
+                continue
+            wait = retry_after(response.headers.get("Retry-After"))
+            if not response.ok and is_transient(
+                response.status_code, self._error_payload(response), priority == WRITE, wait
+            ):
+                delay = self.scheduler.retry_delay(attempt, wait, budgets)
+                if delay is not None:
+                    self._check_retry_fits(delay, log_msg_action)
+                    _LOGGER.warning(
+                        f"Retrying {log_msg_action} in {delay:.1f}s: HTTP {response.status_code}"
+                    )
+                    response.close()
+                    self.scheduler.backoff_wait(delay)
+                    continue
+            return self._handle_response(response, log_msg_action, auth_request, stream)
+
+    @staticmethod
+    def _never_sent(err: Exception) -> bool:
+        """Returns True if a request failed before any of it could reach ecobee."""
+        if isinstance(err, ConnectTimeout):
+            return True
+        reason = getattr(err.args[0] if err.args else None, "reason", None)
+        return isinstance(err, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+    @staticmethod
+    def _check_retry_fits(delay: float, log_msg_action: str) -> None:
+        """Raises EcobeeDeadlineError if waiting ``delay`` to retry would pass the deadline."""
+        left = remaining()
+        if left is not None and delay >= left:
+            raise EcobeeDeadlineError(
+                f"No time left to retry {log_msg_action} before the deadline"
             )
 
-            try:
-                log_msg = response.json()
-            except:
-                log_msg = response.text
-            _LOGGER.debug(
-                f"Request response: {response.status_code}: {log_msg}"
+    def _budgets(self) -> tuple:
+        """Returns the rate budgets a request from this client draws on."""
+        return self._account_budget, self.scheduler.key_bucket(self.api_key)
+
+    @staticmethod
+    def _error_payload(response: requests.Response) -> Optional[dict]:
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _log_transport_error(err: Exception, log_msg_action: str) -> None:
+        if isinstance(err, (Timeout, TimeoutError)):
+            _LOGGER.error(
+                f"Connection to ecobee timed out while attempting to {log_msg_action}. "
+                f"Possible connectivity outage."
+            )
+        else:
+            _LOGGER.error(
+                f"Error connecting to ecobee while attempting to {log_msg_action}. "
+                f"Possible connectivity outage.\n"
+                f"{err}"
             )
 
+    def _handle_response(
+        self,
+        response: requests.Response,
+        log_msg_action: str,
+        auth_request: bool,
+        stream: bool,
+    ) -> Optional[dict]:
+        """Returns a response's JSON (or the response itself when streaming); logs or raises errors."""
+        try:
+            if stream:
+                _LOGGER.debug("Request response: %s: <streamed>", response.status_code)
+            elif _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Request response: %s: %s", response.status_code, response.text)
+
             response.raise_for_status()
+            if stream:
+                return response
             return response.json()
         except HTTPError:
             json_payload = {}
@@ -1323,53 +2769,79 @@ class Ecobee(object):
                 json_payload = response.json()
             except json.decoder.JSONDecodeError:
                 _LOGGER.debug("Invalid JSON payload received")
-
-            if auth_request:
-                if (
-                    response.status_code == 400
-                    and json_payload.get("error") == "invalid_grant"
-                ):
-                    raise InvalidTokenError(
-                        "ecobee tokens invalid; re-authentication required"
-                    )
-                else:
-                    _LOGGER.error(
-                        f"Error requesting authorization from ecobee: "
-                        f"{response.status_code}: {json_payload}"
-                    )
-            elif response.status_code == 500:
-                code = json_payload.get("status", {}).get("code")
-                if code in [1, 16]:
-                    raise InvalidTokenError(
-                        "ecobee tokens invalid; re-authentication required"
-                    )
-                elif code == 14:
-                    raise ExpiredTokenError(
-                        "ecobee access token expired; token refresh required"
-                    )
-                else:
-                    _LOGGER.error(
-                        f"Error from ecobee while attempting to {log_msg_action}: "
-                        f"{code}: {json_payload.get('status', {}).get('message', 'Unknown error')}"
-                    )
-            else:
-                _LOGGER.error(
-                    f"Error from ecobee while attempting to {log_msg_action}: "
-                    f"{response.status_code}: {json_payload}"
-                )
-        except Timeout:
-            _LOGGER.error(
-                f"Connection to ecobee timed out while attempting to {log_msg_action}. "
-                f"Possible connectivity outage."
+            self._handle_error_response(
+                response.status_code, json_payload, log_msg_action, auth_request
             )
         except json.decoder.JSONDecodeError:
             _LOGGER.error(
                 f"Error decoding response from ecobee while attempting to {log_msg_action}. "
             )
         except RequestException as err:
+            self._log_transport_error(err, log_msg_action)
+        return None
+
+    @staticmethod
+    def _log_request(
+        endpoint: str,
+        log_msg_action: str,
+        url: str,
+        headers: dict,
+        params: Optional[dict],
+        body: Optional[dict],
+    ) -> None:
+        """Logs an outgoing request at DEBUG, without formatting anything otherwise.
+
+        The bearer token is left out of the logged headers.
+        """
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return
+        if "Authorization" in headers:
+            headers = dict(headers, Authorization="Bearer <redacted>")
+        _LOGGER.debug(
+            "Making request to %s endpoint to %s: url: %s, headers: %s, params: %s, body: %s",
+            endpoint,
+            log_msg_action,
+            url,
+            headers,
+            params,
+            body,
+        )
+
+    @staticmethod
+    def _handle_error_response(
+        status_code: int, json_payload: dict, log_msg_action: str, auth_request: bool
+    ) -> None:
+        """Raises token errors for an error response from ecobee, logs anything else."""
+        if auth_request:
+            if (
+                status_code == 400
+                and json_payload.get("error") == "invalid_grant"
+            ):
+                raise InvalidTokenError(
+                    "ecobee tokens invalid; re-authentication required"
+                )
+            else:
+                _LOGGER.error(
+                    f"Error requesting authorization from ecobee: "
+                    f"{status_code}: {json_payload}"
+                )
+        elif status_code == 500:
+            code = json_payload.get("status", {}).get("code")
+            if code in [1, 16]:
+                raise InvalidTokenError(
+                    "ecobee tokens invalid; re-authentication required"
+                )
+            elif code == 14:
+                raise ExpiredTokenError(
+                    "ecobee access token expired; token refresh required"
+                )
+            else:
+                _LOGGER.error(
+                    f"Error from ecobee while attempting to {log_msg_action}: "
+                    f"{code}: {json_payload.get('status', {}).get('message', 'Unknown error')}"
+                )
+        else:
             _LOGGER.error(
-                f"Error connecting to ecobee while attempting to {log_msg_action}. "
-                f"Possible connectivity outage.\n"
-                f"{err}"
+                f"Error from ecobee while attempting to {log_msg_action}: "
+                f"{status_code}: {json_payload}"
             )
-        return None
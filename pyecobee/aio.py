@@ -0,0 +1,825 @@
+"""Asyncio client for the ecobee API.
+
+Requires ``aiohttp`` (``pip install python-ecobee-api[async]``). Request
+building, token handling and error mapping are inherited from
+:class:`pyecobee.Ecobee`; only the I/O is reimplemented here.
+"""
+import asyncio
+import contextlib
+import datetime
+import functools
+import itertools
+import time
+from typing import AsyncIterator, Dict, Iterable, NamedTuple, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+from yarl import URL
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from . import (
+    Ecobee,
+    MfaChallenge,
+    _CoalescedWrites,
+    _FLEET_WRITE_METHODS,
+    _REVISED_INCLUDES,
+    _WRITE_METHODS,
+    _authorize_params,
+    _check_identifier_landing,
+    _check_password_landing,
+    _code_from_url,
+    _generate_pkce_pair,
+    _redirect_target,
+    _state_from_url,
+)
+from .cadence import PollScheduler
+from .const import (
+    _LOGGER,
+    ECOBEE_AUTH_BASE_URL,
+    ECOBEE_DEFAULT_WATCH_INTERVAL,
+    ECOBEE_ENDPOINT_AUTH,
+    ECOBEE_ENDPOINT_RUNTIME_REPORT,
+    ECOBEE_ENDPOINT_THERMOSTAT,
+    ECOBEE_ENDPOINT_THERMOSTAT_SUMMARY,
+    ECOBEE_ENDPOINT_TOKEN,
+    ECOBEE_OAUTH_TOKEN_URL,
+    ECOBEE_PROFILE_FULL,
+    ECOBEE_REFRESH_RETRY_DELAY,
+    ECOBEE_RUNTIME_REPORT_COLUMNS,
+    ECOBEE_SELECTION_FULL,
+    ECOBEE_STREAM_CHUNK_SIZE,
+)
+from .deadline import check as check_deadline, remaining, with_deadline
+from .errors import (
+    EcobeeAuthFailedError,
+    EcobeeAuthUnknownError,
+    EcobeeCircuitOpenError,
+    EcobeeDeadlineError,
+    EcobeeError,
+    ExpiredTokenError,
+    InvalidTokenError,
+)
+from .runtime_report import ReportRow, RuntimeReport, RuntimeReportParser, report_params
+from .scheduler import POLL, WRITE, is_transient, retry_after
+from .watch import ChangeEvent, change_events
+
+
+# Failures that happen before a request is sent. aiohttp before 3.10 has no
+# separate connect timeout error, so there only refused connections count.
+_CONNECT_ERRORS = (
+    aiohttp.ClientConnectorError,
+    getattr(aiohttp, "ConnectionTimeoutError", aiohttp.ClientConnectorError),
+)
+
+
+class _Hop(NamedTuple):
+    """The parts of an Auth0 response needed to walk a redirect chain."""
+
+    url: str
+    status_code: int
+    location: Optional[str]
+
+
+def _async_write(name: str):
+    """Wraps a sync write method so its pending request is awaited.
+
+    A write held for ``coalesce_window`` returns the API response of the
+    combined request it went out in; other writes return None.
+    """
+    sync_method = getattr(Ecobee, name)
+
+    @functools.wraps(sync_method)
+    async def method(self, *args, **kwargs) -> Optional[dict]:
+        pending = sync_method(self, *args, **kwargs)
+        if pending is not None:
+            return await pending
+        return None
+
+    return method
+
+
+def _cookie_dict(session: aiohttp.ClientSession) -> dict:
+    return {cookie.key: cookie.value for cookie in session.cookie_jar}
+
+
+class AsyncEcobee(Ecobee):
+    """Asyncio client for the ecobee API.
+
+    Same surface as :class:`~pyecobee.Ecobee`, but every method that talks to
+    ecobee is a coroutine. All calls share one ``aiohttp.ClientSession``,
+    created lazily on first use so the client can be built outside a running
+    event loop. Pass ``session`` to share a connection pool between clients;
+    a session supplied by the caller is not closed by :meth:`close`.
+    """
+
+    def _init_transport(
+        self, session: Optional[aiohttp.ClientSession], pool_maxsize: int
+    ) -> None:
+        self._owns_session = session is None
+        self._session = session
+        self._pool_maxsize = pool_maxsize
+        self._async_refresh_lock = asyncio.Lock()
+        self._async_fetch_lock = asyncio.Lock()
+        self._flush_tasks = set()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self._pool_maxsize),
+                timeout=self._timeouts(None),
+            )
+        return self._session
+
+    async def __aenter__(self) -> "AsyncEcobee":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes pooled connections, unless the session was supplied by the caller.
+
+        Writes still waiting out ``coalesce_window`` are sent first.
+        """
+        await self.flush_writes()
+        self.stop_token_refresh_timer()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _send(
+        self, session: aiohttp.ClientSession, method: str, url: str, **kwargs
+    ) -> aiohttp.ClientResponse:
+        """Sends one HTTP request through its host's circuit breaker; see :meth:`Ecobee._send`."""
+        left = check_deadline(f"{method} {url}")
+        breaker = self.scheduler.breaker(urlsplit(url).hostname)
+        breaker.before_request()
+        try:
+            response = await session.request(method, url, timeout=self._timeouts(left), **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            if left is not None and remaining() <= 0:
+                breaker.abandon()
+                raise EcobeeDeadlineError(f"Deadline passed during {method} {url}") from err
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.abandon()
+            raise
+        breaker.record(response.status)
+        return response
+
+    @staticmethod
+    def _never_sent(err: Exception) -> bool:
+        """Returns True if a request failed while connecting; see :meth:`Ecobee._never_sent`."""
+        return isinstance(err, _CONNECT_ERRORS)
+
+    def _timeouts(self, left: Optional[float]) -> aiohttp.ClientTimeout:
+        """Returns connect and read timeouts, with what is left of a deadline as the total."""
+        if left is None:
+            return aiohttp.ClientTimeout(
+                total=None, sock_connect=self.connect_timeout, sock_read=self.timeout
+            )
+        return aiohttp.ClientTimeout(
+            total=left,
+            sock_connect=min(self.connect_timeout, left),
+            sock_read=min(self.timeout, left),
+        )
+
+    def _new_auth_session(self) -> aiohttp.ClientSession:
+        """Returns a session with its own cookie jar that shares this client's pool."""
+        return aiohttp.ClientSession(
+            connector=self._get_session().connector,
+            connector_owner=False,
+            timeout=self._timeouts(None),
+        )
+
+    async def request_pin(self) -> bool:
+        """Requests a PIN from ecobee for authorization on ecobee.com."""
+        response = await self._request(
+            "GET",
+            ECOBEE_ENDPOINT_AUTH,
+            "request pin",
+            params=self._pin_request_params(),
+            auth_request=True,
+        )
+        return self._store_pin(response)
+
+    @with_deadline
+    async def request_tokens(self) -> bool:
+        """Requests API tokens from ecobee."""
+        if self.auth0_token is not None:
+            return await self.request_tokens_web()
+
+        response = await self._request(
+            "POST",
+            ECOBEE_ENDPOINT_TOKEN,
+            "request tokens",
+            params=self._pin_token_params(),
+            auth_request=True,
+        )
+        return self._store_pin_tokens(response)
+
+    @with_deadline
+    async def request_tokens_web(self) -> bool:
+        """Log in via the ecobee web flow; see :meth:`Ecobee.request_tokens_web`."""
+        verifier, challenge = _generate_pkce_pair()
+
+        async with self._new_auth_session() as session:
+            try:
+                async with await self._send(
+                    session,
+                    "GET",
+                    f"{ECOBEE_AUTH_BASE_URL}/{ECOBEE_ENDPOINT_AUTH}",
+                    params=_authorize_params(challenge),
+                ) as resp:
+                    resp.raise_for_status()
+                    identifier_url = str(resp.url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                raise EcobeeAuthUnknownError(
+                    f"Failed to start ecobee Auth0 login: {err}"
+                ) from err
+
+            _check_identifier_landing(identifier_url)
+
+            try:
+                async with await self._send(
+                    session,
+                    "POST",
+                    identifier_url,
+                    data={"state": _state_from_url(identifier_url), "username": self.username},
+                ) as resp:
+                    resp.raise_for_status()
+                    password_url = str(resp.url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                raise EcobeeAuthUnknownError(f"Failed to submit username: {err}") from err
+
+            _check_password_landing(password_url)
+
+            try:
+                hop = await self._fetch_hop(
+                    session,
+                    "POST",
+                    password_url,
+                    data={
+                        "state": _state_from_url(password_url),
+                        "username": self.username,
+                        "password": self.password,
+                    },
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                raise EcobeeAuthUnknownError(f"Failed to submit password: {err}") from err
+
+            landed_url = await self._resolve_post_login_redirect(session, hop)
+            self._handle_post_password_response(
+                landed_url, verifier, _cookie_dict(session)
+            )
+        return await self._exchange_code_for_tokens(_code_from_url(landed_url), verifier)
+
+    async def _fetch_hop(
+        self, session: aiohttp.ClientSession, method: str, url: str, **kwargs
+    ) -> _Hop:
+        async with await self._send(session, method, url, allow_redirects=False, **kwargs) as resp:
+            return _Hop(str(resp.url), resp.status, resp.headers.get("Location"))
+
+    async def _resolve_post_login_redirect(
+        self, session: aiohttp.ClientSession, hop: _Hop
+    ) -> str:
+        """Walk Auth0's post-login redirect chain to its terminal URL."""
+        for _ in range(10):
+            next_url = _redirect_target(hop.url, hop.status_code, hop.location)
+            if next_url is None:
+                return hop.url
+            if not next_url.startswith(ECOBEE_AUTH_BASE_URL):
+                return next_url
+            try:
+                hop = await self._fetch_hop(session, "GET", next_url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                raise EcobeeAuthUnknownError(
+                    f"Failed while following Auth0 redirect to {next_url}: {err}"
+                ) from err
+        raise EcobeeAuthUnknownError(
+            "Auth0 redirect chain exceeded 10 hops; aborting."
+        )
+
+    @with_deadline
+    async def submit_mfa_code(self, challenge: MfaChallenge, code: str) -> bool:
+        """Complete an MFA-gated login; see :meth:`Ecobee.submit_mfa_code`."""
+        async with self._new_auth_session() as session:
+            session.cookie_jar.update_cookies(challenge.cookies, URL(ECOBEE_AUTH_BASE_URL))
+            try:
+                hop = await self._fetch_hop(
+                    session,
+                    "POST",
+                    challenge.challenge_url,
+                    data={"state": challenge.state, "code": code},
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                raise EcobeeAuthUnknownError(f"Failed to submit OTP code: {err}") from err
+
+            if hop.status_code == 400:
+                raise EcobeeAuthFailedError("The MFA code was not accepted by ecobee.")
+
+            landed_url = await self._resolve_post_login_redirect(session, hop)
+        return await self._exchange_code_for_tokens(
+            self._code_after_mfa(landed_url), challenge.code_verifier
+        )
+
+    async def _exchange_code_for_tokens(self, code: str, verifier: str) -> bool:
+        """Exchange an authorization code for access + refresh tokens."""
+        try:
+            async with await self._send(
+                self._get_session(),
+                "POST",
+                ECOBEE_OAUTH_TOKEN_URL,
+                data=self._code_exchange_data(code, verifier),
+            ) as resp:
+                resp.raise_for_status()
+                payload = json.loads(await resp.text())
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            raise EcobeeAuthUnknownError(
+                f"Failed to exchange authorization code for tokens: {err}"
+            ) from err
+        return self._store_exchanged_tokens(payload)
+
+    async def _refresh_with_refresh_token(self) -> bool:
+        """Refresh the access token via the OAuth2 refresh_token grant."""
+        error_payload = {}
+        try:
+            async with await self._send(
+                self._get_session(), "POST", ECOBEE_OAUTH_TOKEN_URL, data=self._refresh_grant_data()
+            ) as resp:
+                text = await resp.text()
+                if resp.status == 400:
+                    try:
+                        error_payload = json.loads(text)
+                    except ValueError:
+                        pass
+                resp.raise_for_status()
+                payload = json.loads(text)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            self._raise_refresh_failure(err, error_payload)
+        return self._store_refreshed_tokens(payload)
+
+    @with_deadline
+    async def refresh_tokens(self) -> bool:
+        """Refresh the access token; see :meth:`Ecobee.refresh_tokens`."""
+        if self.api_key:
+            response = await self._request(
+                "POST",
+                ECOBEE_ENDPOINT_TOKEN,
+                "refresh tokens",
+                params=self._pin_refresh_params(),
+                auth_request=True,
+            )
+            return self._store_pin_refreshed_tokens(response)
+
+        if self.refresh_token:
+            return await self._refresh_with_refresh_token()
+
+        if self.username and self.password:
+            return await self.request_tokens_web()
+
+        raise EcobeeAuthUnknownError(
+            "No refresh_token, credentials, or API key available to refresh."
+        )
+
+    def start_token_refresh_timer(self) -> None:
+        """Refreshes the access token from a task on the running loop before it expires."""
+        if self.expires_at is None:
+            _LOGGER.debug("Access token expiry unknown; not starting refresh timer")
+            return
+        self.stop_token_refresh_timer()
+        self._refresh_timer = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        delay = self.expires_at - self.refresh_skew - time.time()
+        while True:
+            await asyncio.sleep(max(0.0, delay))
+            try:
+                async with self._async_refresh_lock, self._async_token_store_lock():
+                    self._adopt_stored_tokens()
+                    refreshed = not self.token_expiring() or await self.refresh_tokens()
+            except InvalidTokenError as err:
+                _LOGGER.error(f"Background token refresh stopped: {err}")
+                return
+            except EcobeeError as err:
+                _LOGGER.error(f"Background token refresh failed: {err}")
+                refreshed = False
+
+            if refreshed and self.expires_at is not None:
+                delay = self.expires_at - self.refresh_skew - time.time()
+            else:
+                delay = ECOBEE_REFRESH_RETRY_DELAY
+
+    @with_deadline
+    async def get_thermostats(self, profile: str = ECOBEE_PROFILE_FULL) -> bool:
+        """Gets a json-list of thermostats; see :meth:`Ecobee.get_thermostats`."""
+        includes = self._profile_includes(profile)
+        response = await self._request_with_refresh(
+            "GET",
+            ECOBEE_ENDPOINT_THERMOSTAT,
+            "get thermostats",
+            params=self._thermostats_params(includes),
+        )
+        return self._store_thermostats(
+            response, merge=profile != ECOBEE_PROFILE_FULL, includes=includes
+        )
+
+    async def get_thermostat_summary(self) -> Optional[dict]:
+        """Returns a :class:`ThermostatRevision` per registered thermostat, keyed by identifier."""
+        response = await self._request_with_refresh(
+            "GET",
+            ECOBEE_ENDPOINT_THERMOSTAT_SUMMARY,
+            "get thermostat summary",
+            params=self._summary_params(),
+        )
+        return self._parse_summary(response)
+
+    @with_deadline
+    async def get_changed_thermostats(self) -> bool:
+        """Re-fetches only what moved; see :meth:`Ecobee.get_changed_thermostats`."""
+        revisions = await self.get_thermostat_summary()
+        if revisions is None:
+            return False
+
+        if self.thermostats is None:
+            if not await self.get_thermostats():
+                return False
+        else:
+            self.last_changes = {}
+            for includes, identifiers in self._changed_selections(revisions):
+                response = await self._request_with_refresh(
+                    "GET",
+                    ECOBEE_ENDPOINT_THERMOSTAT,
+                    "get changed thermostats",
+                    params=self._thermostats_params(includes, identifiers),
+                )
+                if not self._merge_thermostats(response, includes):
+                    return False
+            self._drop_unregistered(revisions)
+
+        self._record_fetch(revisions, _REVISED_INCLUDES)
+        self.revisions = revisions
+        return True
+
+    async def refresh_stale(
+        self,
+        index: Union[int, str, None] = None,
+        max_age: Union[float, Dict[str, float], None] = None,
+        sections: Iterable[str] = ECOBEE_SELECTION_FULL,
+    ) -> bool:
+        """Re-reads cached sections older than allowed; see :meth:`Ecobee.refresh_stale`."""
+        async with self._async_fetch_lock:
+            if self.thermostats is None:
+                return await self.get_thermostats()
+            self.last_changes = {}
+            for includes, identifiers in self._stale_selections(index, max_age, sections):
+                response = await self._request_with_refresh(
+                    "GET",
+                    ECOBEE_ENDPOINT_THERMOSTAT,
+                    "refresh stale thermostats",
+                    params=self._thermostats_params(includes, identifiers),
+                )
+                if not self._merge_thermostats(response, includes):
+                    return False
+            return True
+
+    def get_thermostat(
+        self,
+        index: Union[int, str],
+        max_age: Union[float, Dict[str, float], None] = None,
+    ):
+        """Returns a cached thermostat; see :meth:`Ecobee.get_thermostat`.
+
+        With ``max_age`` set this returns an awaitable, as stale sections
+        may have to be fetched first.
+        """
+        if max_age is None:
+            return super().get_thermostat(index)
+        return self._get_fresh(index, max_age, ECOBEE_SELECTION_FULL, super().get_thermostat)
+
+    def get_remote_sensors(
+        self,
+        index: Union[int, str],
+        max_age: Union[float, Dict[str, float], None] = None,
+    ):
+        """Returns a thermostat's remote sensors; awaitable when ``max_age`` is set."""
+        if max_age is None:
+            return super().get_remote_sensors(index)
+        return self._get_fresh(index, max_age, ("includeSensors",), super().get_remote_sensors)
+
+    async def _get_fresh(self, index, max_age, sections, accessor):
+        await self.refresh_stale(index, max_age, sections)
+        return accessor(index)
+
+    @with_deadline
+    async def update(self, changed_only: bool = False) -> bool:
+        """Gets new thermostat data from ecobee; wrapper for get_thermostats."""
+        if changed_only:
+            return await self.get_changed_thermostats()
+        return await self.get_thermostats()
+
+    async def watch(
+        self, interval: float = ECOBEE_DEFAULT_WATCH_INTERVAL, aligned: bool = False
+    ) -> AsyncIterator[ChangeEvent]:
+        """Async iterator of change events; see :meth:`Ecobee.watch`.
+
+        Stops when the consuming task is cancelled or the iterator is closed.
+        """
+        poll_scheduler = PollScheduler(interval) if aligned else None
+        primed = self.thermostats is not None
+        while True:
+            try:
+                polled = await self.get_changed_thermostats()
+            except EcobeeCircuitOpenError as err:
+                _LOGGER.warning(f"ecobee watch paused: {err}")
+                await asyncio.sleep(err.retry_in or interval)
+                continue
+            if polled:
+                if primed:
+                    for changes in self.last_changes.values():
+                        for event in change_events(changes):
+                            yield event
+                primed = True
+            else:
+                _LOGGER.warning(f"ecobee watch poll failed; retrying in {interval} seconds")
+            await asyncio.sleep(self._watch_wait(interval, poll_scheduler))
+
+    async def iter_runtime_report(
+        self,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        columns: Sequence[str] = ECOBEE_RUNTIME_REPORT_COLUMNS,
+        include_sensors: bool = False,
+    ) -> AsyncIterator[ReportRow]:
+        """Streams runtime history rows; see :meth:`Ecobee.iter_runtime_report`."""
+        for identifiers, window_start, window_end in self._report_requests(
+            targets, start_date, end_date
+        ):
+            response = await self._request_with_refresh(
+                "GET",
+                ECOBEE_ENDPOINT_RUNTIME_REPORT,
+                "get runtime report",
+                params=report_params(
+                    identifiers, window_start, window_end, columns, include_sensors
+                ),
+                stream=True,
+            )
+            if response is None:
+                raise EcobeeError(
+                    f"Unable to fetch runtime report for {window_start} to {window_end}"
+                )
+            parser = RuntimeReportParser()
+            async with response:
+                async for chunk in response.content.iter_chunked(ECOBEE_STREAM_CHUNK_SIZE):
+                    for row in parser.feed(chunk):
+                        yield row
+                for row in parser.close():
+                    yield row
+
+    @with_deadline
+    async def get_runtime_report(
+        self,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        columns: Sequence[str] = ECOBEE_RUNTIME_REPORT_COLUMNS,
+        include_sensors: bool = False,
+    ) -> Dict[str, RuntimeReport]:
+        """Returns columnar runtime history per thermostat; see :meth:`Ecobee.get_runtime_report`."""
+        reports: Dict[str, RuntimeReport] = {}
+        async for row in self.iter_runtime_report(
+            targets, start_date, end_date, columns, include_sensors
+        ):
+            report = reports.get(row.identifier)
+            if report is None:
+                report = reports[row.identifier] = RuntimeReport(row.identifier)
+            report.append(row)
+        return reports
+
+    async def get_runtime_history(
+        self,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        columns: Sequence[str] = ECOBEE_RUNTIME_REPORT_COLUMNS,
+        include_sensors: bool = False,
+    ) -> dict:
+        """Returns a RuntimeHistory per thermostat; see :meth:`Ecobee.get_runtime_history`."""
+        return self._histories(
+            await self.get_runtime_report(targets, start_date, end_date, columns, include_sensors),
+            include_sensors,
+        )
+
+    async def _send_thermostat_update(self, log_msg_action: str, body: dict) -> None:
+        """Sends a thermostat update (settings patch and/or functions) to ecobee."""
+        response = await self._request_with_refresh(
+            "POST", ECOBEE_ENDPOINT_THERMOSTAT, log_msg_action, body=body
+        )
+        self._apply_if_optimistic(response, body)
+
+    def _queue_write(self, log_msg_action: str, body: dict) -> asyncio.Future:
+        """Holds a write for ``coalesce_window``; see :meth:`Ecobee._queue_write`.
+
+        Returns an asyncio future, which the write method awaits.
+        """
+        identifier = body["selection"]["selectionMatch"]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending_writes.get(identifier)
+        if pending is None:
+            pending = self._pending_writes[identifier] = _CoalescedWrites(self, identifier)
+            loop.call_later(self.coalesce_window, self._start_flush, identifier)
+        pending.add(log_msg_action, body)
+        pending.futures.append(future)
+        return future
+
+    def _start_flush(self, identifier: str) -> None:
+        task = asyncio.ensure_future(self._flush_writes(identifier))
+        # Keep a reference so the task is not collected before it finishes.
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_writes(self, identifier: str) -> None:
+        pending = self._pending_writes.pop(identifier, None)
+        if pending is None:
+            return
+        try:
+            body = pending.body()
+            response = await self._request_with_refresh(
+                "POST", ECOBEE_ENDPOINT_THERMOSTAT, pending.action(), body=body
+            )
+            self._apply_if_optimistic(response, body)
+        except EcobeeError as err:
+            pending.settle(None, err)
+            return
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except BaseException as err:
+            # Settle before re-raising, or every caller waits forever.
+            pending.settle(None, err)
+            raise
+        pending.settle(response)
+
+    async def flush_writes(self) -> None:
+        """Sends every write waiting out ``coalesce_window`` now."""
+        for identifier in list(self._pending_writes):
+            await self._flush_writes(identifier)
+
+    async def _send_thermostat_updates(self, updates: list) -> None:
+        """Sends several ``(log_msg_action, body)`` thermostat updates concurrently."""
+        await asyncio.gather(
+            *(self._send_thermostat_update(log_msg_action, body) for log_msg_action, body in updates)
+        )
+
+    async def _refresh_single_flight(self, stale_token: Optional[str] = None) -> None:
+        """Refreshes tokens at most once across tasks; see :meth:`Ecobee._refresh_single_flight`."""
+        async with self._async_refresh_lock, self._async_token_store_lock():
+            self._adopt_stored_tokens()
+            if stale_token is None:
+                if self.token_expiring():
+                    await self.refresh_tokens()
+            elif self.access_token == stale_token:
+                await self.refresh_tokens()
+
+    @contextlib.asynccontextmanager
+    async def _async_token_store_lock(self):
+        """Holds the token store's lock, waiting for it off the event loop."""
+        if self.token_store is None:
+            yield
+            return
+        acquiring = asyncio.get_running_loop().run_in_executor(None, self.token_store.acquire)
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The executor thread still takes the lock; give it back once it has.
+            acquiring.add_done_callback(self._release_token_store)
+            raise
+        try:
+            yield
+        finally:
+            self.token_store.release()
+
+    def _release_token_store(self, acquiring: asyncio.Future) -> None:
+        if not acquiring.cancelled() and acquiring.exception() is None:
+            self.token_store.release()
+
+    async def _request_with_refresh(
+        self,
+        method: str,
+        endpoint: str,
+        log_msg_action: str,
+        params: dict = None,
+        body: dict = None,
+        auth_request: bool = False,
+        stream: bool = False,
+    ) -> Optional[dict]:
+        """Wrapper around _request that refreshes tokens once on ExpiredTokenError."""
+        response = None
+        refreshed = False
+        if not auth_request and self.token_expiring():
+            await self._refresh_single_flight()
+            refreshed = True
+        for _ in range(0, 2):
+            access_token = self.access_token
+            try:
+                response = await self._request(
+                    method, endpoint, log_msg_action, params, body, auth_request, stream
+                )
+            except ExpiredTokenError:
+                if not refreshed:
+                    await self._refresh_single_flight(access_token)
+                    refreshed = True
+                    continue
+                raise
+            except InvalidTokenError:
+                raise
+            break
+
+        return response
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        log_msg_action: str,
+        params: dict = None,
+        body: dict = None,
+        auth_request: bool = False,
+        stream: bool = False,
+    ) -> Optional[dict]:
+        """Makes a request to the ecobee API; see :meth:`Ecobee._request`."""
+        url, headers = self._request_url_and_headers(endpoint, auth_request)
+
+        self._log_request(endpoint, log_msg_action, url, headers, params, body)
+
+        budgets = self._budgets()
+        priority = WRITE if method == "POST" else POLL
+        for attempt in itertools.count():
+            await self.scheduler.acquire_async(budgets, priority, check_deadline(log_msg_action))
+            try:
+                response = await self._send(
+                    self._get_session(), method, url, headers=headers, params=params, json=body
+                )
+                if stream and response.status < 400:
+                    _LOGGER.debug("Request response: %s: <streamed>", response.status)
+                    return response
+                async with response:
+                    text = await response.text()
+                    status_code = response.status
+            except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+                delay = (
+                    self.scheduler.retry_delay(attempt)
+                    if priority == POLL or self._never_sent(err)
+                    else None
+                )
+                if delay is None:
+                    self._log_transport_error(err, log_msg_action)
+                    return None
+                self._check_retry_fits(delay, log_msg_action)
+                _LOGGER.warning(f"Retrying {log_msg_action} in {delay:.1f}s: {err!r}")
+                await self.scheduler.backoff_wait_async(delay)
+                continue
+
+            _LOGGER.debug("Request response: %s: %s", status_code, text)
+
+            try:
+                json_payload = json.loads(text)
+            except ValueError:
+                json_payload = None
+
+            wait = retry_after(response.headers.get("Retry-After"))
+            if status_code >= 400 and is_transient(
+                status_code, json_payload, priority == WRITE, wait
+            ):
+                delay = self.scheduler.retry_delay(attempt, wait, budgets)
+                if delay is not None:
+                    self._check_retry_fits(delay, log_msg_action)
+                    _LOGGER.warning(f"Retrying {log_msg_action} in {delay:.1f}s: HTTP {status_code}")
+                    await self.scheduler.backoff_wait_async(delay)
+                    continue
+            break
+
+        if status_code >= 400:
+            if json_payload is None:
+                _LOGGER.debug("Invalid JSON payload received")
+            self._handle_error_response(
+                status_code, json_payload or {}, log_msg_action, auth_request
+            )
+            return None
+        if json_payload is None:
+            _LOGGER.error(
+                f"Error decoding response from ecobee while attempting to {log_msg_action}. "
+            )
+        return json_payload
+
+
+for _name in _WRITE_METHODS + _FLEET_WRITE_METHODS:
+    setattr(AsyncEcobee, _name, _async_write(_name))
+del _name
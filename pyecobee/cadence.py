@@ -0,0 +1,228 @@
+"""Poll timing aligned to when thermostats actually report.
+
+A thermostat sends ecobee new runtime data every 3 minutes, each at its
+own fixed offset (its phase) within that period. Polling at an arbitrary
+time finds data that is, on average, half a period old, and polling
+faster than the period mostly finds nothing new. :class:`UpdateCadence`
+learns each thermostat's phase from the report times it is shown (the
+``runtime`` revision in ``thermostatSummary`` and
+``runtime.lastStatusModified``). :class:`PollScheduler` uses it to time
+each account's next poll just after its thermostats are expected to
+report, and spreads accounts whose phase is not known yet evenly over
+the period.
+"""
+import math
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from .const import (
+    ECOBEE_CADENCE_SAMPLES,
+    ECOBEE_DEFAULT_WATCH_INTERVAL,
+    ECOBEE_POLL_JITTER,
+    ECOBEE_POLL_MARGIN,
+    ECOBEE_RUNTIME_UPDATE_PERIOD,
+)
+
+
+def _utc_timestamp(value: Optional[str], fmt: str) -> Optional[float]:
+    try:
+        return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def report_times(ecobee) -> Dict[str, List[float]]:
+    """Returns the report times (epoch seconds) a client has seen, per thermostat.
+
+    Revisions are ``YYMMDDHHMMSS`` and ``lastStatusModified`` is
+    ``YYYY-MM-DD HH:MM:SS``, both in UTC.
+    """
+    times: Dict[str, List[float]] = {}
+    for identifier, revision in ecobee.revisions.items():
+        reported_at = _utc_timestamp(revision.runtime, "%y%m%d%H%M%S")
+        if reported_at is not None:
+            times.setdefault(identifier, []).append(reported_at)
+    for thermostat in ecobee.thermostats or ():
+        reported_at = _utc_timestamp(
+            thermostat.get("runtime", {}).get("lastStatusModified"), "%Y-%m-%d %H:%M:%S"
+        )
+        if reported_at is not None:
+            times.setdefault(thermostat["identifier"], []).append(reported_at)
+    return times
+
+
+class UpdateCadence:
+    """The phase at which each thermostat reports, learned from report times."""
+
+    def __init__(
+        self,
+        period: float = ECOBEE_RUNTIME_UPDATE_PERIOD,
+        samples: int = ECOBEE_CADENCE_SAMPLES,
+    ):
+        self.period = period
+        self.samples = samples
+        self._phases: Dict[str, deque] = {}
+        self._last: Dict[str, float] = {}
+
+    def observe(self, identifier: str, reported_at: float) -> bool:
+        """Records one report time; returns False if it was already seen."""
+        last = self._last.get(identifier)
+        if last is not None and abs(reported_at - last) < 1:
+            return False
+        self._last[identifier] = reported_at
+        phases = self._phases.get(identifier)
+        if phases is None:
+            phases = self._phases[identifier] = deque(maxlen=self.samples)
+        phases.append(reported_at % self.period)
+        return True
+
+    def phase(self, identifier: str) -> Optional[float]:
+        """Returns the thermostat's phase in seconds, or None until it has reported.
+
+        The circular mean of the recent phases, so 179 s and 1 s average
+        to 0 s rather than 90 s.
+        """
+        phases = self._phases.get(identifier)
+        if not phases:
+            return None
+        scale = 2 * math.pi / self.period
+        angle = math.atan2(
+            sum(math.sin(phase * scale) for phase in phases),
+            sum(math.cos(phase * scale) for phase in phases),
+        )
+        return (angle / scale) % self.period
+
+    def next_report(self, identifier: str, after: float) -> Optional[float]:
+        """Returns when the thermostat should next report after ``after``, or None."""
+        phase = self.phase(identifier)
+        return None if phase is None else _next_at(phase, after, self.period)
+
+
+def _next_at(phase: float, after: float, period: float) -> float:
+    """Returns the first time after ``after`` at ``phase`` within the period."""
+    return phase + period * (math.floor((after - phase) / period) + 1)
+
+
+class PollScheduler:
+    """Decides when each account polls next.
+
+    Register accounts with :meth:`add`, call :meth:`observe` with the
+    account's client after every poll, and poll the accounts :meth:`due`
+    returns. An account polls ``margin`` seconds (plus jitter) after the
+    report time that costs its thermostats the least staleness in total,
+    and no more often than every ``interval`` seconds rounded to the
+    report period; it never polls faster than its thermostats report.
+    Accounts are any hashable key, such as an :class:`~pyecobee.fleet.EcobeeFleet`
+    account name.
+    """
+
+    def __init__(
+        self,
+        interval: float = ECOBEE_DEFAULT_WATCH_INTERVAL,
+        margin: float = ECOBEE_POLL_MARGIN,
+        jitter: float = ECOBEE_POLL_JITTER,
+        period: float = ECOBEE_RUNTIME_UPDATE_PERIOD,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.interval = interval
+        self.margin = margin
+        self.jitter = jitter
+        self.cadence = UpdateCadence(period)
+        self._clock = clock
+        self._created = clock()
+        self._identifiers: Dict[Hashable, List[str]] = {}
+        # Registration order of each account, for spreading unpolled ones.
+        self._positions: Dict[Hashable, int] = {}
+        self._last_poll: Dict[Hashable, float] = {}
+        self._next: Dict[Hashable, float] = {}
+
+    @property
+    def period(self) -> float:
+        return self.cadence.period
+
+    def add(self, account: Hashable) -> None:
+        """Registers an account; does nothing if it is already registered."""
+        if account not in self._identifiers:
+            self._identifiers[account] = []
+            self._positions[account] = len(self._positions)
+
+    def discard(self, account: Hashable) -> None:
+        for state in (self._identifiers, self._last_poll, self._next):
+            state.pop(account, None)
+        if self._positions.pop(account, None) is not None:
+            self._positions = {
+                account: position for position, account in enumerate(self._identifiers)
+            }
+
+    def observe(self, account: Hashable, ecobee, polled_at: Optional[float] = None) -> float:
+        """Learns from a client that just polled; returns when it should poll next."""
+        self.add(account)
+        times = report_times(ecobee)
+        for identifier, reported in times.items():
+            for reported_at in reported:
+                self.cadence.observe(identifier, reported_at)
+        if times:
+            self._identifiers[account] = list(times)
+        polled_at = self._clock() if polled_at is None else polled_at
+        self._last_poll[account] = polled_at
+        self._next[account] = self._schedule(account, polled_at)
+        return self._next[account]
+
+    def next_poll(self, account: Hashable) -> float:
+        """Returns when the account should poll next, in epoch seconds."""
+        self.add(account)
+        scheduled = self._next.get(account)
+        if scheduled is None:
+            # Not polled yet: start at the account's slot in the spread.
+            return self._created + self._slot(account)
+        return scheduled
+
+    def due(self, now: Optional[float] = None) -> List[Hashable]:
+        """Returns the accounts whose next poll time has come, earliest first."""
+        now = self._clock() if now is None else now
+        times = {account: self.next_poll(account) for account in self._identifiers}
+        return sorted((account for account, at in times.items() if at <= now), key=times.get)
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """Returns the seconds until the next account is due; 0 if one is.
+
+        With no accounts registered it returns the report period, so a
+        caller waiting on it does not spin.
+        """
+        if not self._identifiers:
+            return self.period
+        now = self._clock() if now is None else now
+        return max(0.0, min(self.next_poll(account) for account in self._identifiers) - now)
+
+    def _slot(self, account: Hashable) -> float:
+        """Spreads accounts with no known phase evenly over the period, in registration order."""
+        return self._positions[account] * self.period / len(self._positions)
+
+    def _best_phase(self, phases: Iterable[float]) -> float:
+        """Returns the report phase to poll after that leaves the least total staleness.
+
+        Data from a thermostat that reported at phase ``p`` is
+        ``(target - p) % period`` old when polled at ``target``; the best
+        target is always one of the phases themselves.
+        """
+        phases = list(phases)
+        return min(
+            phases,
+            key=lambda target: sum((target - phase) % self.period for phase in phases),
+        )
+
+    def _schedule(self, account: Hashable, polled_at: float) -> float:
+        phases = [
+            phase
+            for phase in map(self.cadence.phase, self._identifiers[account])
+            if phase is not None
+        ]
+        if phases:
+            target = self._best_phase(phases) + self.margin
+        else:
+            target = (self._created + self._slot(account)) % self.period
+        earliest = max(polled_at, polled_at + self.interval - self.period)
+        return _next_at(target % self.period, earliest, self.period) + random.uniform(0, self.jitter)
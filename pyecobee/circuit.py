@@ -0,0 +1,124 @@
+"""Per-host circuit breakers for api.ecobee.com and auth.ecobee.com.
+
+While a host is down every request to it would wait out the full
+timeout. After ``failure_threshold`` consecutive failures (connection
+errors, timeouts, HTTP 502/503/504) its circuit opens, and requests raise
+:class:`~pyecobee.errors.EcobeeCircuitOpenError` at once. After
+``reset_timeout`` seconds the circuit is half-open: one request is let
+through as a probe, and its outcome closes the circuit or opens it again.
+"""
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from .const import _LOGGER
+from .errors import EcobeeCircuitOpenError
+
+CLOSED: str = "closed"
+OPEN: str = "open"
+HALF_OPEN: str = "half-open"
+
+# Any other response, errors included, shows the host is up.
+_OUTAGE_STATUSES = (502, 503, 504)
+
+
+class CircuitState(NamedTuple):
+    """A snapshot of one :class:`CircuitBreaker`."""
+
+    host: str
+    state: str
+    failures: int
+    retry_in: float  # Seconds until a probe is let through; 0 unless open.
+
+
+class CircuitBreaker:
+    """Tracks consecutive failures of one host; thread-safe."""
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if now - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(self._clock())
+
+    def snapshot(self) -> CircuitState:
+        with self._lock:
+            now = self._clock()
+            state = self._state(now)
+            retry_in = self._opened_at + self.reset_timeout - now if state == OPEN else 0.0
+            return CircuitState(self.host, state, self._failures, retry_in)
+
+    def before_request(self) -> None:
+        """Raises EcobeeCircuitOpenError unless a request may go out now."""
+        with self._lock:
+            now = self._clock()
+            state = self._state(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                _LOGGER.debug(f"Probing {self.host} after {self._failures} failures")
+                return
+            if state == OPEN:
+                retry_in = self._opened_at + self.reset_timeout - now
+                raise EcobeeCircuitOpenError(
+                    f"{self.host} is unavailable after {self._failures} failures; "
+                    f"retrying in {retry_in:.0f}s",
+                    retry_in,
+                )
+            raise EcobeeCircuitOpenError(f"{self.host} is unavailable; a probe is in flight")
+
+    def record(self, status_code: int) -> None:
+        """Records the HTTP status of a response from the host."""
+        if status_code in _OUTAGE_STATUSES:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                _LOGGER.info(f"{self.host} is reachable again; closing its circuit")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                if self._opened_at is None:
+                    _LOGGER.warning(
+                        f"{self.host} failed {self._failures} times in a row; "
+                        f"failing fast for {self.reset_timeout:.0f}s"
+                    )
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def abandon(self) -> None:
+        """Gives up a request without an outcome, such as a cancelled one."""
+        with self._lock:
+            self._probing = False
@@ -1,6 +1,6 @@
 """Constants used in this library."""
 import logging
-from typing import Dict, Final
+from typing import Dict, Final, Tuple
 
 _LOGGER: Final[logging.Logger] = logging.getLogger("pyecobee")
 
@@ -12,13 +12,107 @@ ECOBEE_API_KEY: Final[str] = "API_KEY"
 ECOBEE_AUTHORIZATION_CODE: Final[str] = "AUTHORIZATION_CODE"
 ECOBEE_REFRESH_TOKEN: Final[str] = "REFRESH_TOKEN"
 ECOBEE_AUTH0_TOKEN: Final[str] = "AUTH0_TOKEN"
+ECOBEE_EXPIRES_AT: Final[str] = "EXPIRES_AT"
 
 ECOBEE_CONFIG_FILENAME: Final[str] = "ecobee.conf"
 
+# Seconds to wait for a response (read timeout) and to open a connection.
 ECOBEE_DEFAULT_TIMEOUT: Final[int] = 30
+ECOBEE_DEFAULT_CONNECT_TIMEOUT: Final[int] = 10
+ECOBEE_DEFAULT_POOL_SIZE: Final[int] = 10
+# Accounts an EcobeeFleet works on at once.
+ECOBEE_DEFAULT_FLEET_WORKERS: Final[int] = 16
+# Seconds before expiry at which an access token is refreshed proactively.
+ECOBEE_DEFAULT_REFRESH_SKEW: Final[int] = 60
+# Seconds to wait before retrying a failed background token refresh.
+ECOBEE_REFRESH_RETRY_DELAY: Final[int] = 30
+# Thermostats report runtime every 3 minutes; polling faster finds nothing new.
+ECOBEE_DEFAULT_WATCH_INTERVAL: Final[int] = 180
+# Aligned polling: thermostats report every ECOBEE_RUNTIME_UPDATE_PERIOD
+# seconds, each at its own phase. Polls go ECOBEE_POLL_MARGIN seconds after
+# an expected report, plus up to ECOBEE_POLL_JITTER seconds, with the phase
+# learned from the last ECOBEE_CADENCE_SAMPLES reports seen.
+ECOBEE_RUNTIME_UPDATE_PERIOD: Final[int] = 180
+ECOBEE_POLL_MARGIN: Final[int] = 20
+ECOBEE_POLL_JITTER: Final[int] = 5
+ECOBEE_CADENCE_SAMPLES: Final[int] = 10
+
+# Request budgets (requests per second, and burst size) per account and per
+# API key; the key budget is shared by every account using that key.
+ECOBEE_DEFAULT_ACCOUNT_RATE: Final[float] = 1.0
+ECOBEE_DEFAULT_ACCOUNT_BURST: Final[int] = 10
+ECOBEE_DEFAULT_KEY_RATE: Final[float] = 10.0
+ECOBEE_DEFAULT_KEY_BURST: Final[int] = 50
+# Retries of transient failures, with jittered backoff starting at
+# ECOBEE_DEFAULT_BACKOFF seconds and doubling up to ECOBEE_MAX_BACKOFF.
+ECOBEE_DEFAULT_RETRIES: Final[int] = 3
+ECOBEE_DEFAULT_BACKOFF: Final[float] = 1.0
+ECOBEE_MAX_BACKOFF: Final[float] = 60.0
+ECOBEE_RETRY_HTTP_STATUSES: Final[Tuple[int, ...]] = (429, 502, 503, 504)
+# ecobee status codes sent with HTTP 500 that are worth retrying (3: processing error).
+ECOBEE_RETRY_STATUS_CODES: Final[Tuple[int, ...]] = (3,)
+# Consecutive failures after which a host's circuit opens, and the seconds
+# before a single probe request is let through to test it again.
+ECOBEE_CIRCUIT_FAILURES: Final[int] = 5
+ECOBEE_CIRCUIT_RESET: Final[float] = 30.0
 
 ECOBEE_OPTIONS_NOTIFICATIONS: Final[str] = "INCLUDE_NOTIFICATIONS"
 
+ECOBEE_SELECTION_FULL: Final[Tuple[str, ...]] = (
+    "includeRuntime",
+    "includeSensors",
+    "includeProgram",
+    "includeEquipmentStatus",
+    "includeEvents",
+    "includeWeather",
+    "includeSettings",
+    "includeLocation",
+)
+ECOBEE_SELECTION_RUNTIME: Final[Tuple[str, ...]] = (
+    "includeRuntime",
+    "includeSensors",
+    "includeEquipmentStatus",
+)
+ECOBEE_SELECTION_CONFIG: Final[Tuple[str, ...]] = (
+    "includeSettings",
+    "includeProgram",
+    "includeEvents",
+    "includeLocation",
+)
+
+# How long each section may be served from cache before refresh_stale re-reads it.
+ECOBEE_SECTION_TTLS: Final[Dict[str, int]] = {
+    "includeRuntime": 180,
+    "includeSensors": 180,
+    "includeEquipmentStatus": 180,
+    "includeEvents": 600,
+    "includeSettings": 600,
+    "includeWeather": 1800,
+    "includeProgram": 3600,
+    "includeLocation": 3600,
+    "includeAlerts": 3600,
+}
+
+ECOBEE_PROFILE_FULL: Final[str] = "full"
+ECOBEE_PROFILE_RUNTIME: Final[str] = "runtime-only"
+ECOBEE_PROFILE_CONFIG: Final[str] = "config"
+ECOBEE_PROFILE_WEATHER: Final[str] = "weather"
+
+# Named selections accepted by Ecobee.get_thermostats(profile=...).
+ECOBEE_SELECTION_PROFILES: Final[Dict[str, Tuple[str, ...]]] = {
+    ECOBEE_PROFILE_FULL: ECOBEE_SELECTION_FULL,
+    ECOBEE_PROFILE_RUNTIME: ECOBEE_SELECTION_RUNTIME,
+    ECOBEE_PROFILE_CONFIG: ECOBEE_SELECTION_CONFIG,
+    ECOBEE_PROFILE_WEATHER: ("includeWeather",),
+}
+
+# Selection flags to re-read when the matching thermostatSummary revision moves.
+ECOBEE_REVISION_SECTIONS: Final[Dict[str, Tuple[str, ...]]] = {
+    "thermostat": ECOBEE_SELECTION_CONFIG,
+    "alerts": ("includeAlerts",),
+    "runtime": ECOBEE_SELECTION_RUNTIME,
+}
+
 ECOBEE_STATE_UNKNOWN: Final[int] = -5002
 ECOBEE_STATE_CALIBRATING: Final[int] = -5003
 ECOBEE_VALUE_UNKNOWN: Final[str] = "unknown"
@@ -28,7 +122,63 @@ ECOBEE_AUTH_BASE_URL: Final[str] = "https://auth.ecobee.com"
 ECOBEE_ENDPOINT_AUTH: Final[str] = "authorize"
 ECOBEE_ENDPOINT_TOKEN: Final[str] = "token"
 ECOBEE_ENDPOINT_THERMOSTAT: Final[str] = "thermostat"
+ECOBEE_ENDPOINT_THERMOSTAT_SUMMARY: Final[str] = "thermostatSummary"
+ECOBEE_ENDPOINT_RUNTIME_REPORT: Final[str] = "runtimeReport"
 ECOBEE_API_VERSION: Final[str] = "1"
+# Most identifiers the API accepts in one comma-separated selectionMatch.
+ECOBEE_MAX_SELECTION_MATCH: Final[int] = 25
+
+# runtimeReport returns 5-minute intervals for at most 31 days per request.
+ECOBEE_RUNTIME_REPORT_MAX_DAYS: Final[int] = 31
+ECOBEE_RUNTIME_REPORT_INTERVALS: Final[int] = 288
+ECOBEE_RUNTIME_REPORT_COLUMNS: Final[Tuple[str, ...]] = (
+    "zoneAveTemp",
+    "zoneHeatTemp",
+    "zoneCoolTemp",
+    "zoneHumidity",
+    "outdoorTemp",
+    "hvacMode",
+    "compCool1",
+    "compHeat1",
+    "auxHeat1",
+    "fan",
+)
+# Report columns holding text; every other column is numeric.
+ECOBEE_RUNTIME_REPORT_TEXT_COLUMNS: Final[Tuple[str, ...]] = (
+    "hvacMode",
+    "zoneCalendarEvent",
+    "zoneClimate",
+    "zoneHvacMode",
+)
+# Report columns holding degrees F, and equipment runtime seconds per interval.
+ECOBEE_RUNTIME_REPORT_TEMPERATURE_COLUMNS: Final[Tuple[str, ...]] = (
+    "zoneAveTemp",
+    "zoneCoolTemp",
+    "zoneHeatTemp",
+    "outdoorTemp",
+)
+ECOBEE_RUNTIME_REPORT_EQUIPMENT_COLUMNS: Final[Tuple[str, ...]] = (
+    "auxHeat1",
+    "auxHeat2",
+    "auxHeat3",
+    "compCool1",
+    "compCool2",
+    "compHeat1",
+    "compHeat2",
+    "dehumidifier",
+    "economizer",
+    "fan",
+    "humidifier",
+    "ventilator",
+)
+ECOBEE_RUNTIME_INTERVAL_SECONDS: Final[int] = 300
+# Days at the end of a synced range that HistoryCache.sync fetches again:
+# report dates are UTC while rows are local time.
+ECOBEE_RUNTIME_REPORT_LAG_DAYS: Final[int] = 1
+# Days before the end of the last sync that HistoryCache.sync fetches
+# again, so data a thermostat uploads after being offline is picked up.
+ECOBEE_RUNTIME_BACKFILL_DAYS: Final[int] = 7
+ECOBEE_STREAM_CHUNK_SIZE: Final[int] = 64 * 1024
 
 ECOBEE_WEB_CLIENT_ID: Final[str] = "183eORFPlXyz9BbDZwqexHPBQoVjgadh"
 ECOBEE_REDIRECT_URI: Final[str] = "https://www.ecobee.com/home/authCallback"
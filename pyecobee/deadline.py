@@ -0,0 +1,88 @@
+"""Overall deadlines for operations that take several HTTP requests.
+
+A web login walks up to a dozen Auth0 hops and a poll may retry, so a
+per-request timeout alone does not bound how long either takes. Inside
+``with deadline(seconds):`` every request, retry wait and rate-limit wait
+is cut short so the whole block finishes in time, or raises
+:class:`~pyecobee.errors.EcobeeDeadlineError`. Deadlines nest; the
+earliest one wins. Methods decorated with :func:`with_deadline` take the
+same as a ``deadline`` keyword argument.
+"""
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional
+
+from .errors import EcobeeDeadlineError
+
+# time.monotonic() by which the current operation must finish.
+_deadline_at: ContextVar[Optional[float]] = ContextVar("pyecobee_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Bounds everything in the block to ``seconds``; None leaves it unbounded.
+
+    Yields the ``time.monotonic()`` value of the deadline in effect.
+    """
+    if seconds is None:
+        yield _deadline_at.get()
+        return
+    at = time.monotonic() + seconds
+    current = _deadline_at.get()
+    if current is not None:
+        at = min(at, current)
+    token = _deadline_at.set(at)
+    try:
+        yield at
+    finally:
+        _deadline_at.reset(token)
+
+
+# with_deadline's keyword argument shadows the name ``deadline``.
+_deadline_scope = deadline
+
+
+def remaining() -> Optional[float]:
+    """Returns the seconds left before the current deadline, or None if there is none."""
+    at = _deadline_at.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check(action: str) -> Optional[float]:
+    """Returns :func:`remaining`, raising EcobeeDeadlineError if nothing is left."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise EcobeeDeadlineError(f"Deadline passed while attempting to {action}")
+    return left
+
+
+async def _within(awaitable: Awaitable, at: Optional[float]):
+    token = _deadline_at.set(at)
+    try:
+        return await awaitable
+    finally:
+        _deadline_at.reset(token)
+
+
+def with_deadline(method):
+    """Adds a ``deadline`` keyword argument (seconds) to a client method.
+
+    Works for coroutine methods too: the deadline starts when the method
+    is called and applies while its result is awaited.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, deadline: Optional[float] = None, **kwargs):
+        if deadline is None:
+            return method(self, *args, **kwargs)
+        with _deadline_scope(deadline) as at:
+            result = method(self, *args, **kwargs)
+        if inspect.isawaitable(result):
+            return _within(result, at)
+        return result
+
+    return wrapper
+
@@ -35,3 +35,25 @@ class EcobeeAuthMfaRequiredError(EcobeeError):
 # Sensor errors
 class InvalidSensorError(EcobeeError):
     """Raised when remote sensor not present on thermostat."""
+
+
+# Thermostat errors
+class InvalidThermostatError(EcobeeError):
+    """Raised when no cached thermostat matches the given identifier or name."""
+
+
+# Transport errors
+class EcobeeCircuitOpenError(EcobeeError):
+    """Raised instead of sending a request while its host's circuit breaker is open.
+
+    ``retry_in`` is the seconds until the breaker lets a probe request
+    through; 0 when a probe is already in flight.
+    """
+
+    def __init__(self, message: str, retry_in: float = 0.0):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+class EcobeeDeadlineError(EcobeeError):
+    """Raised when an operation runs past the deadline set for it."""
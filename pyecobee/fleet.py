@@ -0,0 +1,231 @@
+"""Driving many ecobee accounts from one process.
+
+An :class:`EcobeeFleet` owns one :class:`~pyecobee.Ecobee` client per
+account. The clients share one ``requests.Session`` (so one connection
+pool to api.ecobee.com) and one :class:`~pyecobee.scheduler.RequestScheduler`
+(so one API-key budget and one set of circuit breakers), and the fleet
+runs an operation across accounts on a bounded thread pool.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import Ecobee
+from .cadence import PollScheduler
+from .const import _LOGGER, ECOBEE_DEFAULT_FLEET_WORKERS
+from .deadline import deadline as deadline_scope
+from .scheduler import RequestScheduler
+
+
+class AccountResult(NamedTuple):
+    """The outcome of one account's part of :meth:`EcobeeFleet.run`."""
+
+    name: str
+    value: Any
+    error: Optional[BaseException]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        """False if the operation raised, or returned False as ``update`` does on failure."""
+        return self.error is None and self.value is not False
+
+
+class FleetResult(Dict[str, AccountResult]):
+    """:class:`AccountResult` per account name, in the order the accounts were run."""
+
+    @property
+    def succeeded(self) -> List[str]:
+        return [name for name, result in self.items() if result.ok]
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, result in self.items() if not result.ok]
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        return {name: result.error for name, result in self.items() if result.error is not None}
+
+
+class EcobeeFleet:
+    """Many ecobee accounts sharing one connection pool and request budget.
+
+    ``configs`` maps an account name of your choosing to the ``config``
+    dict for its client; ``client_kwargs`` go to every client. At most
+    ``max_workers`` accounts are worked on at once. ``clock`` and ``sleep``
+    pace the spread of :meth:`run` and can be replaced in tests::
+
+        with EcobeeFleet(configs, max_workers=32) as fleet:
+            result = fleet.update(spread=60)
+            for name, error in result.errors.items():
+                ...
+    """
+
+    def __init__(
+        self,
+        configs: Optional[Dict[str, dict]] = None,
+        max_workers: int = ECOBEE_DEFAULT_FLEET_WORKERS,
+        scheduler: Optional[RequestScheduler] = None,
+        session: Optional[requests.Session] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        **client_kwargs,
+    ):
+        self.max_workers = max_workers
+        self._clock = clock
+        self._sleep = sleep
+        self.scheduler = scheduler or RequestScheduler()
+        self._owns_session = session is None
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=max_workers))
+        self._session = session
+        self._client_kwargs = client_kwargs
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="pyecobee-fleet")
+        self.accounts: Dict[str, Ecobee] = {}
+        for name, config in (configs or {}).items():
+            self.add(name, config)
+
+    def add(self, name: str, config: Optional[dict] = None, **kwargs) -> Ecobee:
+        """Adds an account; ``kwargs`` override the fleet's ``client_kwargs`` for it."""
+        if name in self.accounts:
+            raise ValueError(f"Account {name!r} is already in the fleet")
+        client = Ecobee(
+            config=config,
+            session=self._session,
+            scheduler=self.scheduler,
+            **dict(self._client_kwargs, **kwargs),
+        )
+        self.accounts[name] = client
+        return client
+
+    def remove(self, name: str) -> None:
+        """Removes an account and closes its client."""
+        self.accounts.pop(name).close()
+
+    def __getitem__(self, name: str) -> Ecobee:
+        return self.accounts[name]
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.accounts)
+
+    def run(
+        self,
+        operation: Union[str, Callable[..., Any]],
+        *args,
+        names: Optional[Iterable[str]] = None,
+        spread: float = 0.0,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> FleetResult:
+        """Runs ``operation`` on every account (or those in ``names``) and waits for all.
+
+        ``operation`` is a client method name such as ``"update"``, or a
+        callable taking the client as its first argument; ``args`` and
+        ``kwargs`` are passed on. Starts are spaced evenly over ``spread``
+        seconds so a sweep does not arrive at ecobee as one burst.
+        ``deadline`` bounds the whole sweep, spread included. Exceptions
+        are caught per account and reported in the result, never raised.
+        """
+        names = list(self.accounts) if names is None else list(names)
+        started = self._clock()
+        finish_by = None if deadline is None else started + deadline
+        futures = {}
+        for position, name in enumerate(names):
+            delay = started + position * spread / len(names) - self._clock()
+            if delay > 0:
+                self._sleep(delay)
+            futures[name] = self._executor.submit(
+                self._run_one, name, operation, args, kwargs, finish_by
+            )
+        return FleetResult((name, future.result()) for name, future in futures.items())
+
+    def _run_one(
+        self,
+        name: str,
+        operation: Union[str, Callable[..., Any]],
+        args: tuple,
+        kwargs: dict,
+        finish_by: Optional[float],
+    ) -> AccountResult:
+        client = self.accounts[name]
+        started = self._clock()
+        try:
+            # Context variables do not follow work into the pool; set the deadline here.
+            with deadline_scope(None if finish_by is None else finish_by - started):
+                if isinstance(operation, str):
+                    value = getattr(client, operation)(*args, **kwargs)
+                else:
+                    value = operation(client, *args, **kwargs)
+        except Exception as err:
+            _LOGGER.debug(f"Fleet operation failed for account {name}: {err!r}")
+            return AccountResult(name, None, err, self._clock() - started)
+        return AccountResult(name, value, None, self._clock() - started)
+
+    def update(
+        self,
+        changed_only: bool = False,
+        spread: float = 0.0,
+        deadline: Optional[float] = None,
+    ) -> FleetResult:
+        """Runs :meth:`Ecobee.update` across the fleet; see :meth:`run`."""
+        return self.run("update", changed_only, spread=spread, deadline=deadline)
+
+    def poll(
+        self,
+        stop: Optional[threading.Event] = None,
+        poll_scheduler: Optional[PollScheduler] = None,
+    ) -> Iterator[FleetResult]:
+        """Polls each account just after its thermostats report; yields each round's results.
+
+        Every round runs :meth:`Ecobee.get_changed_thermostats` on the
+        accounts the :class:`~pyecobee.cadence.PollScheduler` says are due,
+        which spreads accounts over the report period and learns when each
+        one's thermostats report. Runs until ``stop`` is set or the
+        generator is closed; accounts added or removed meanwhile are picked
+        up on the next round.
+        """
+        stop = stop or threading.Event()
+        poll_scheduler = poll_scheduler or PollScheduler()
+        while not stop.is_set():
+            for name in list(self.accounts):
+                poll_scheduler.add(name)
+            due = []
+            for name in poll_scheduler.due():
+                if name in self.accounts:
+                    due.append(name)
+                else:
+                    poll_scheduler.discard(name)
+            if not due:
+                stop.wait(poll_scheduler.wait_time())
+                continue
+            result = self.run("get_changed_thermostats", names=due)
+            for name in due:
+                client = self.accounts.get(name)
+                if client is None:
+                    # Removed while the round ran.
+                    poll_scheduler.discard(name)
+                else:
+                    poll_scheduler.observe(name, client)
+            yield result
+
+    def close(self) -> None:
+        """Waits for running work, closes every client, then the shared session."""
+        self._executor.shutdown(wait=True)
+        for client in self.accounts.values():
+            client.close()
+        if self._owns_session:
+            self._session.close()
+
+    def __enter__(self) -> "EcobeeFleet":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,228 @@
+"""NumPy-backed columnar storage for runtime report history.
+
+Requires ``numpy`` (``pip install python-ecobee-api[history]``). Each
+column is one typed array:
+
+* temperatures are ``int16`` tenths of a degree F, the same ``* 10``
+  encoding ``set_hold_temp`` sends, with ``TEMPERATURE_MISSING`` for gaps;
+* equipment runtime is ``uint16`` seconds per 5-minute interval, with
+  ``RUNTIME_MISSING`` for gaps (a full interval is 300 seconds, which
+  does not fit in ``uint8``);
+* other numeric columns are ``float32`` with NaN for gaps, and text
+  columns such as ``hvacMode`` are object arrays;
+* timestamps are ``datetime64[s]`` in the thermostat's local time.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional, Union
+
+import numpy as np
+
+from .const import (
+    ECOBEE_RUNTIME_INTERVAL_SECONDS,
+    ECOBEE_RUNTIME_REPORT_EQUIPMENT_COLUMNS,
+    ECOBEE_RUNTIME_REPORT_TEMPERATURE_COLUMNS,
+    ECOBEE_RUNTIME_REPORT_TEXT_COLUMNS,
+)
+from .runtime_report import RuntimeReport
+
+TEMPERATURE_MISSING = np.iinfo(np.int16).min
+RUNTIME_MISSING = np.iinfo(np.uint16).max
+
+_FREQUENCIES = {"hour": "h", "hourly": "h", "day": "D", "daily": "D"}
+
+Timestamp = Union[datetime, np.datetime64, str]
+
+
+class Resampled(NamedTuple):
+    """Per-bucket results of :meth:`RuntimeHistory.resample`."""
+
+    timestamps: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+
+def _is_temperature(name: str, sensor_types: Dict[str, str]) -> bool:
+    return (
+        name in ECOBEE_RUNTIME_REPORT_TEMPERATURE_COLUMNS
+        or sensor_types.get(name) == "temperature"
+    )
+
+
+def _encode(name: str, values, sensor_types: Dict[str, str]) -> np.ndarray:
+    """Converts one ``RuntimeReport`` column into its typed array."""
+    if name in ECOBEE_RUNTIME_REPORT_TEXT_COLUMNS:
+        return np.array(values, dtype=object)
+    floats = np.frombuffer(values, dtype=np.float64)
+    missing = np.isnan(floats)
+    if _is_temperature(name, sensor_types):
+        encoded = np.rint(np.where(missing, 0, floats) * 10).astype(np.int16)
+        encoded[missing] = TEMPERATURE_MISSING
+        return encoded
+    if name in ECOBEE_RUNTIME_REPORT_EQUIPMENT_COLUMNS:
+        encoded = np.where(missing, 0, floats).astype(np.uint16)
+        encoded[missing] = RUNTIME_MISSING
+        return encoded
+    return floats.astype(np.float32)
+
+
+def _missing(dtype: np.dtype):
+    """Returns the gap marker for a column of ``dtype``."""
+    if dtype == np.int16:
+        return TEMPERATURE_MISSING
+    if dtype == np.uint16:
+        return RUNTIME_MISSING
+    return None if dtype == object else np.nan
+
+
+class RuntimeHistory:
+    """Interval history for one thermostat, stored column-wise.
+
+    ``timestamps`` is sorted. ``columns`` maps a report column name to its
+    typed array, all the same length as ``timestamps``. Slices returned by
+    :meth:`between` are views, not copies.
+    """
+
+    __slots__ = ("identifier", "timestamps", "columns")
+
+    def __init__(self, identifier: str, timestamps: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.identifier = identifier
+        self.timestamps = timestamps
+        self.columns = columns
+
+    @classmethod
+    def from_report(
+        cls,
+        report: RuntimeReport,
+        sensors: bool = False,
+        sensor_types: Optional[Dict[str, str]] = None,
+    ) -> "RuntimeHistory":
+        """Builds a history from a :class:`~pyecobee.runtime_report.RuntimeReport`.
+
+        With ``sensors`` set the report's sensor columns are used instead of
+        its runtime columns; ``sensor_types`` maps a sensor column to its
+        ``sensorType`` so temperature sensors are stored as tenths too, and
+        defaults to the report's own ``sensor_types``.
+        """
+        if sensor_types is None:
+            sensor_types = report.sensor_types if sensors else {}
+        timestamps = report.sensor_timestamps if sensors else report.timestamps
+        columns = report.sensor_columns if sensors else report.columns
+        timestamps = np.array(timestamps, dtype="datetime64[s]")
+        encoded = {name: _encode(name, values, sensor_types) for name, values in columns.items()}
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+            encoded = {name: column[order] for name, column in encoded.items()}
+        return cls(report.identifier, timestamps, encoded)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def join(self, other: "RuntimeHistory") -> "RuntimeHistory":
+        """Returns both histories' columns on the union of their timestamps.
+
+        Intervals only one side has are gaps in the other side's columns.
+        """
+        if np.array_equal(self.timestamps, other.timestamps):
+            return RuntimeHistory(self.identifier, self.timestamps, {**self.columns, **other.columns})
+        timestamps = np.union1d(self.timestamps, other.timestamps)
+        columns = {}
+        for history in (self, other):
+            positions = np.searchsorted(timestamps, history.timestamps)
+            for name, column in history.columns.items():
+                joined = np.full(len(timestamps), _missing(column.dtype), dtype=column.dtype)
+                joined[positions] = column
+                columns[name] = joined
+        return RuntimeHistory(self.identifier, timestamps, columns)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def between(self, start: Optional[Timestamp] = None, end: Optional[Timestamp] = None) -> "RuntimeHistory":
+        """Returns the intervals in ``[start, end)``; either bound may be omitted."""
+        low = 0 if start is None else np.searchsorted(self.timestamps, np.datetime64(start, "s"))
+        high = (
+            len(self.timestamps)
+            if end is None
+            else np.searchsorted(self.timestamps, np.datetime64(end, "s"))
+        )
+        return RuntimeHistory(
+            self.identifier,
+            self.timestamps[low:high],
+            {name: column[low:high] for name, column in self.columns.items()},
+        )
+
+    def values(self, name: str) -> np.ndarray:
+        """Returns a numeric column as float64 in natural units, NaN for gaps.
+
+        Temperatures come back in degrees, runtime in seconds.
+        """
+        column = self.columns[name]
+        if column.dtype == np.int16:
+            return np.where(column == TEMPERATURE_MISSING, np.nan, column / 10.0)
+        if column.dtype == np.uint16:
+            return np.where(column == RUNTIME_MISSING, np.nan, column.astype(np.float64))
+        return column.astype(np.float64)
+
+    def resample(
+        self,
+        freq: str = "hour",
+        how: str = "mean",
+        columns: Optional[Iterable[str]] = None,
+    ) -> Resampled:
+        """Aggregates numeric columns into hourly or daily buckets.
+
+        ``how`` is ``"mean"`` or ``"sum"``; gaps are left out of both, and a
+        bucket with no data is NaN.
+        """
+        if how not in ("mean", "sum"):
+            raise ValueError(f"how must be 'mean' or 'sum', not {how!r}")
+        buckets, inverse = self._buckets(freq)
+        results = {}
+        for name in self._numeric(columns):
+            values = self.values(name)
+            valid = ~np.isnan(values)
+            totals = np.bincount(inverse, weights=np.where(valid, values, 0), minlength=len(buckets))
+            counts = np.bincount(inverse, weights=valid, minlength=len(buckets))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result = totals / counts if how == "mean" else totals
+            result[counts == 0] = np.nan
+            results[name] = result
+        return Resampled(buckets, results)
+
+    def duty_cycle(
+        self, columns: Optional[Iterable[str]] = None, freq: Optional[str] = None
+    ) -> Union[Dict[str, float], Resampled]:
+        """Returns the fraction of time each equipment column was running.
+
+        Over the whole history by default, or per hourly/daily bucket when
+        ``freq`` is given. Intervals with no data are left out.
+        """
+        names = [
+            name
+            for name in (self.columns if columns is None else columns)
+            if name in ECOBEE_RUNTIME_REPORT_EQUIPMENT_COLUMNS and name in self.columns
+        ]
+        if freq is None:
+            cycles = {}
+            for name in names:
+                values = self.values(name)
+                valid = ~np.isnan(values)
+                seconds = valid.sum() * ECOBEE_RUNTIME_INTERVAL_SECONDS
+                cycles[name] = float(values[valid].sum() / seconds) if seconds else float("nan")
+            return cycles
+        means = self.resample(freq, "mean", names)
+        return Resampled(
+            means.timestamps,
+            {name: mean / ECOBEE_RUNTIME_INTERVAL_SECONDS for name, mean in means.columns.items()},
+        )
+
+    def _buckets(self, freq: str):
+        unit = _FREQUENCIES.get(freq, freq)
+        return np.unique(self.timestamps.astype(f"datetime64[{unit}]"), return_inverse=True)
+
+    def _numeric(self, columns: Optional[Iterable[str]]):
+        return [
+            name
+            for name in (self.columns if columns is None else columns)
+            if self.columns[name].dtype != object
+        ]
@@ -0,0 +1,303 @@
+"""Persistent, memory-mappable cache of runtime report history.
+
+Requires ``numpy`` (``pip install python-ecobee-api[history]``). Each
+thermostat gets a directory under the cache root:
+
+* ``timestamps.col`` holds int64 seconds (``datetime64[s]``);
+* ``<column>.col`` holds one raw little-endian array per report column,
+  in the dtype :class:`~pyecobee.history.RuntimeHistory` uses. Text
+  columns are stored as uint16 codes into ``categories`` in the metadata;
+* ``meta.json`` records the committed row count, the dtypes, the last
+  interval that held data, and the last day synced.
+
+Column files are only ever appended to. ``meta.json`` is replaced
+atomically after the appends are synced to disk, so a crash mid-append
+leaves the previous rows intact; the uncommitted tail is cut off on the
+next append. One process should sync a given cache at a time, while any
+number may read it.
+"""
+import datetime
+import inspect
+import os
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .const import (
+    _LOGGER,
+    ECOBEE_RUNTIME_BACKFILL_DAYS,
+    ECOBEE_RUNTIME_INTERVAL_SECONDS,
+    ECOBEE_RUNTIME_REPORT_COLUMNS,
+    ECOBEE_RUNTIME_REPORT_LAG_DAYS,
+)
+from .history import RUNTIME_MISSING, TEMPERATURE_MISSING, RuntimeHistory
+from .util import atomic_write
+
+_META = "meta.json"
+_TIMESTAMPS = "timestamps"
+_TIMESTAMP_DTYPE = "<i8"
+_CODE_DTYPE = "<u2"
+
+# Kind, on-disk dtype and gap value for each in-memory RuntimeHistory dtype.
+_KINDS = {
+    np.dtype(np.int16): ("temperature", "<i2", TEMPERATURE_MISSING),
+    np.dtype(np.uint16): ("runtime", "<u2", RUNTIME_MISSING),
+    np.dtype(np.float32): ("numeric", "<f4", np.nan),
+    np.dtype(object): ("text", _CODE_DTYPE, 0),
+}
+_MISSING = {kind: missing for kind, _, missing in _KINDS.values()}
+
+
+def _has_data(column: np.ndarray) -> np.ndarray:
+    if column.dtype == object:
+        return np.array([value is not None for value in column], dtype=bool)
+    if column.dtype.kind == "f":
+        return ~np.isnan(column)
+    return column != _KINDS[column.dtype][2]
+
+
+class HistoryCache:
+    """Runtime history kept on disk per thermostat identifier.
+
+    ``sync`` asks the runtime report endpoint only for the days after the
+    last cached interval, and ``load`` memory-maps the cached columns into
+    a :class:`~pyecobee.history.RuntimeHistory` without parsing anything.
+    ``backfill_days`` is how far back from the last sync a thermostat that
+    has gone quiet is fetched again, in case it uploads late.
+    """
+
+    def __init__(self, directory: str, backfill_days: int = ECOBEE_RUNTIME_BACKFILL_DAYS):
+        self.directory = directory
+        self.backfill_days = backfill_days
+
+    def _path(self, identifier: str, name: Optional[str] = None) -> str:
+        if name is None:
+            return os.path.join(self.directory, identifier)
+        return os.path.join(self.directory, identifier, name)
+
+    def metadata(self, identifier: str) -> dict:
+        """Returns the cache metadata for a thermostat, or an empty dict."""
+        try:
+            with open(self._path(identifier, _META), "r") as fdesc:
+                return json.loads(fdesc.read())
+        except FileNotFoundError:
+            return {}
+
+    def last_interval(self, identifier: str) -> Optional[datetime.datetime]:
+        """Returns the timestamp of the newest cached interval that held data."""
+        last = self.metadata(identifier).get("last_interval")
+        return None if last is None else datetime.datetime.fromisoformat(last)
+
+    def load(self, identifier: str) -> Optional[RuntimeHistory]:
+        """Memory-maps a thermostat's cached history; None if nothing is cached."""
+        meta = self.metadata(identifier)
+        rows = meta.get("rows", 0)
+        if not rows:
+            return None
+        timestamps = self._map(identifier, _TIMESTAMPS, _TIMESTAMP_DTYPE, rows)
+        columns = {}
+        for name, spec in meta["columns"].items():
+            column = self._map(identifier, name, spec["dtype"], rows)
+            if spec["kind"] == "text":
+                column = np.array(spec["categories"], dtype=object)[column]
+            columns[name] = column
+        return RuntimeHistory(identifier, timestamps.view("datetime64[s]"), columns)
+
+    def _map(self, identifier: str, name: str, dtype: str, rows: int) -> np.ndarray:
+        return np.memmap(
+            self._path(identifier, f"{name}.col"), dtype=dtype, mode="r", shape=(rows,)
+        )
+
+    def append(self, history: RuntimeHistory) -> int:
+        """Appends the intervals newer than the cached ones; returns how many.
+
+        Trailing intervals without any data (the part of today the
+        thermostat has not reported yet) are not stored, so the next sync
+        fetches them again. Intervals missing between the cached ones and
+        ``history`` are stored as gaps, so the timeline has no holes.
+        """
+        identifier = history.identifier
+        meta = self.metadata(identifier) or {"rows": 0, "columns": {}, "last_interval": None}
+        if meta["last_interval"] is not None:
+            last = np.datetime64(meta["last_interval"], "s")
+            history = history.between(last + np.timedelta64(1, "s"))
+            step = np.timedelta64(ECOBEE_RUNTIME_INTERVAL_SECONDS, "s")
+            if len(history) and history.timestamps[0] > last + step:
+                _LOGGER.warning(
+                    f"No history for {identifier} from {last + step} to "
+                    f"{history.timestamps[0]}; caching it as gaps"
+                )
+                gaps = np.arange(last + step, history.timestamps[0], step)
+                history = RuntimeHistory(identifier, gaps, {}).join(history)
+        if len(history) and history.columns:
+            has_data = np.logical_or.reduce(
+                [_has_data(column) for column in history.columns.values()]
+            )
+            filled = np.flatnonzero(has_data)
+            keep = filled[-1] + 1 if len(filled) else 0
+            history = RuntimeHistory(
+                identifier,
+                history.timestamps[:keep],
+                {name: column[:keep] for name, column in history.columns.items()},
+            )
+        count = len(history)
+        if not count:
+            return 0
+
+        os.makedirs(self._path(identifier), exist_ok=True)
+        rows = meta["rows"]
+        self._append(identifier, _TIMESTAMPS, rows, history.timestamps.astype(_TIMESTAMP_DTYPE))
+        specs = meta["columns"]
+        for name, column in history.columns.items():
+            spec = specs.get(name)
+            if spec is None:
+                kind, dtype, _ = _KINDS[column.dtype]
+                spec = specs[name] = {"kind": kind, "dtype": dtype}
+                if kind == "text":
+                    spec["categories"] = [None]
+                # A column new to this cache has no values for the earlier rows.
+                self._append(identifier, name, 0, np.full(rows, _MISSING[kind], dtype=dtype))
+            self._append(identifier, name, rows, self._encode(spec, column))
+        for name, spec in specs.items():
+            if name not in history.columns:
+                missing = np.full(count, _MISSING[spec["kind"]], dtype=spec["dtype"])
+                self._append(identifier, name, rows, missing)
+
+        meta["rows"] = rows + count
+        meta["last_interval"] = str(history.timestamps[-1])
+        atomic_write(self._path(identifier, _META), json.dumps(meta))
+        return count
+
+    @staticmethod
+    def _encode(spec: dict, column: np.ndarray) -> np.ndarray:
+        if spec["kind"] != "text":
+            return column.astype(spec["dtype"])
+        categories = spec["categories"]
+        codes = {category: code for code, category in enumerate(categories)}
+        encoded = np.empty(len(column), dtype=spec["dtype"])
+        for position, value in enumerate(column):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(categories)
+                categories.append(value)
+            encoded[position] = code
+        return encoded
+
+    def _append(self, identifier: str, name: str, committed_rows: int, values: np.ndarray) -> None:
+        """Appends to a column file after cutting off any uncommitted tail."""
+        filename = self._path(identifier, f"{name}.col")
+        with open(filename, "ab") as fdesc:
+            fdesc.truncate(committed_rows * values.dtype.itemsize)
+            fdesc.write(values.tobytes())
+            fdesc.flush()
+            os.fsync(fdesc.fileno())
+
+    def _mark_synced(self, identifier: str, synced_through: datetime.date) -> None:
+        """Records the last day a sync fetched for a thermostat."""
+        meta = self.metadata(identifier) or {"rows": 0, "columns": {}, "last_interval": None}
+        previous = meta.get("synced_through")
+        if previous is not None and datetime.date.fromisoformat(previous) >= synced_through:
+            return
+        meta["synced_through"] = synced_through.isoformat()
+        os.makedirs(self._path(identifier), exist_ok=True)
+        atomic_write(self._path(identifier, _META), json.dumps(meta))
+
+    def _begin(self, identifier: str, start_date: Optional[datetime.date]) -> datetime.date:
+        """Returns the first day to fetch for a thermostat.
+
+        That is the day of the last interval with data, less the report
+        lag, but never more than ``backfill_days`` before the last day
+        synced: a thermostat that has been offline is looked at again over
+        that window rather than over everything since it went quiet.
+        """
+        meta = self.metadata(identifier)
+        begins = []
+        if meta.get("last_interval") is not None:
+            last = datetime.datetime.fromisoformat(meta["last_interval"]).date()
+            begins.append(last - datetime.timedelta(days=ECOBEE_RUNTIME_REPORT_LAG_DAYS))
+        if meta.get("synced_through") is not None:
+            synced_through = datetime.date.fromisoformat(meta["synced_through"])
+            begins.append(synced_through - datetime.timedelta(days=self.backfill_days))
+        if begins:
+            return max(begins)
+        if start_date is None:
+            raise ValueError(f"No cached history for {identifier}; a start_date is required")
+        return start_date
+
+    def sync(
+        self,
+        ecobee,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        end_date: Optional[datetime.date] = None,
+        start_date: Optional[datetime.date] = None,
+        columns: Sequence[str] = ECOBEE_RUNTIME_REPORT_COLUMNS,
+    ):
+        """Downloads the history missing from the cache; returns rows appended per thermostat.
+
+        Each thermostat is fetched from the day of its last cached interval
+        through ``end_date`` (today by default); ``start_date`` is only used
+        for thermostats with nothing cached yet. A thermostat that reported
+        nothing is fetched again from ``backfill_days`` before ``end_date``
+        on the next sync, so data it uploads once back online is cached
+        without every sync re-downloading a growing range. With an
+        :class:`~pyecobee.aio.AsyncEcobee` this returns an awaitable.
+        """
+        end_date = end_date or datetime.date.today()
+        groups = self._groups(ecobee, targets, end_date, start_date)
+        if inspect.iscoroutinefunction(inspect.unwrap(ecobee.get_runtime_report)):
+            return self._sync_async(ecobee, groups, end_date, columns)
+        appended = {}
+        for begin, identifiers in groups.items():
+            reports = ecobee.get_runtime_report(identifiers, begin, end_date, columns)
+            appended.update(self._store(reports, identifiers, end_date))
+        return appended
+
+    async def _sync_async(
+        self,
+        ecobee,
+        groups: Dict[datetime.date, List[str]],
+        end_date: datetime.date,
+        columns: Sequence[str],
+    ) -> Dict[str, int]:
+        appended = {}
+        for begin, identifiers in groups.items():
+            reports = await ecobee.get_runtime_report(identifiers, begin, end_date, columns)
+            appended.update(self._store(reports, identifiers, end_date))
+        return appended
+
+    def _groups(
+        self,
+        ecobee,
+        targets: Union[int, str, Sequence[Union[int, str]]],
+        end_date: datetime.date,
+        start_date: Optional[datetime.date],
+    ) -> Dict[datetime.date, List[str]]:
+        """Groups thermostat identifiers by the first day each needs fetched."""
+        if isinstance(targets, (int, str)):
+            targets = [targets]
+        groups: Dict[datetime.date, List[str]] = {}
+        for target in targets:
+            identifier = ecobee._identifier(target)
+            begin = self._begin(identifier, start_date)
+            if begin <= end_date:
+                groups.setdefault(begin, []).append(identifier)
+        return groups
+
+    def _store(
+        self, reports: dict, identifiers: List[str], end_date: datetime.date
+    ) -> Dict[str, int]:
+        """Appends downloaded reports and advances each thermostat's sync cursor."""
+        appended = {}
+        for identifier in identifiers:
+            report = reports.get(identifier)
+            appended[identifier] = (
+                0 if report is None else self.append(RuntimeHistory.from_report(report))
+            )
+            self._mark_synced(identifier, end_date)
+            _LOGGER.debug(f"Cached {appended[identifier]} intervals for {identifier}")
+        return appended
@@ -0,0 +1,211 @@
+"""Slotted, read-only views over the thermostat data returned by ecobee.
+
+The raw dicts in ``Ecobee.thermostats`` stay the source of truth; these
+classes wrap them without copying. Every field is a property that reads
+the dict, so a model holds nothing but its ``raw`` reference and follows
+in-place merges and optimistic writes. A :class:`Thermostat` decodes each
+section (runtime, sensors, program, events, weather) the first time it is
+accessed, and again only once that section has been replaced. Enum-like
+string values are interned in place so hundreds of thermostats share one
+copy of ``"heat"``, ``"occupancy"`` and so on. Keys need no interning: the
+json decoder already shares them per response.
+"""
+import sys
+from typing import List, Optional, Tuple
+
+_UNSET = object()
+
+
+def _intern(raw: dict, key: str):
+    value = raw.get(key)
+    if isinstance(value, str):
+        value = raw[key] = sys.intern(value)
+    return value
+
+
+def _field(key: str, interned: bool) -> property:
+    if interned:
+        return property(lambda self: _intern(self.raw, key))
+    return property(lambda self: self.raw.get(key))
+
+
+class _Model:
+    """Reads ``_fields`` from a raw dict on access; ``raw`` is the dict itself."""
+
+    __slots__ = ("raw",)
+    # (attribute, api key) pairs, and the api keys whose values are interned.
+    _fields: Tuple[Tuple[str, str], ...] = ()
+    _interned: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for attr, key in cls.__dict__.get("_fields", ()):
+            setattr(cls, attr, _field(key, key in cls._interned))
+
+    def __init__(self, raw: dict):
+        self.raw = raw
+        for key in self._interned:
+            _intern(raw, key)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self._fields[:2])
+        return f"{type(self).__name__}({fields})"
+
+    def _section(self, slot: str, source, build):
+        """Returns ``build(source)``, cached in ``slot`` until ``source`` is replaced."""
+        cached = getattr(self, slot)
+        if cached is _UNSET or cached[0] is not source:
+            cached = (source, build(source))
+            setattr(self, slot, cached)
+        return cached[1]
+
+
+class Capability(_Model):
+    """One reading (temperature, humidity, occupancy) of a remote sensor."""
+
+    _fields = (("id", "id"), ("type", "type"), ("value", "value"))
+    _interned = ("type",)
+    __slots__ = ()
+
+
+class RemoteSensor(_Model):
+    """A remote sensor, or the thermostat's own built-in sensor."""
+
+    _fields = (("id", "id"), ("name", "name"), ("type", "type"), ("code", "code"), ("in_use", "inUse"))
+    _interned = ("type",)
+    __slots__ = ()
+
+    def __init__(self, raw: dict):
+        super().__init__(raw)
+        for capability in raw.get("capability", ()):
+            _intern(capability, "type")
+
+    @property
+    def capabilities(self) -> List[Capability]:
+        return [Capability(capability) for capability in self.raw.get("capability", ())]
+
+    def capability(self, capability_type: str) -> Optional[Capability]:
+        """Returns the sensor's capability of the given type, or None."""
+        for capability in self.raw.get("capability", ()):
+            if capability.get("type") == capability_type:
+                return Capability(capability)
+        return None
+
+    @property
+    def occupied(self) -> Optional[bool]:
+        capability = self.capability("occupancy")
+        return None if capability is None else capability.value == "true"
+
+
+class Runtime(_Model):
+    """The thermostat's current readings and setpoints, in tenths of a degree F."""
+
+    _fields = (
+        ("connected", "connected"),
+        ("actual_temperature", "actualTemperature"),
+        ("actual_humidity", "actualHumidity"),
+        ("desired_heat", "desiredHeat"),
+        ("desired_cool", "desiredCool"),
+        ("desired_humidity", "desiredHumidity"),
+        ("desired_fan_mode", "desiredFanMode"),
+        ("last_status_modified", "lastStatusModified"),
+    )
+    _interned = ("desiredFanMode",)
+    __slots__ = ()
+
+
+class Climate(_Model):
+    """A comfort setting (Home, Away, Sleep, ...) from the thermostat's program."""
+
+    _fields = (
+        ("name", "name"),
+        ("climate_ref", "climateRef"),
+        ("is_occupied", "isOccupied"),
+        ("heat_temp", "heatTemp"),
+        ("cool_temp", "coolTemp"),
+        ("sensors", "sensors"),
+    )
+    _interned = ("climateRef",)
+    __slots__ = ()
+
+
+class Event(_Model):
+    """A hold, vacation or demand-response event."""
+
+    _fields = (
+        ("type", "type"),
+        ("name", "name"),
+        ("running", "running"),
+        ("start_date", "startDate"),
+        ("start_time", "startTime"),
+        ("end_date", "endDate"),
+        ("end_time", "endTime"),
+        ("hold_climate_ref", "holdClimateRef"),
+        ("heat_hold_temp", "heatHoldTemp"),
+        ("cool_hold_temp", "coolHoldTemp"),
+        ("fan", "fan"),
+    )
+    _interned = ("type", "holdClimateRef", "fan")
+    __slots__ = ()
+
+
+class Weather(_Model):
+    """The weather station reading and forecasts attached to a thermostat."""
+
+    _fields = (("timestamp", "timestamp"), ("weather_station", "weatherStation"), ("forecasts", "forecasts"))
+    __slots__ = ()
+
+
+class Thermostat(_Model):
+    """A thermostat whose sections are decoded on first access."""
+
+    _fields = (("identifier", "identifier"), ("name", "name"))
+    __slots__ = ("_runtime", "_remote_sensors", "_climates", "_events", "_weather")
+
+    def __init__(self, raw: dict):
+        super().__init__(raw)
+        self._runtime = self._remote_sensors = self._climates = _UNSET
+        self._events = self._weather = _UNSET
+
+    @property
+    def settings(self) -> dict:
+        return self.raw.get("settings", {})
+
+    @property
+    def hvac_mode(self) -> Optional[str]:
+        return _intern(self.settings, "hvacMode") if self.settings else None
+
+    @property
+    def equipment_status(self) -> Tuple[str, ...]:
+        """The running equipment, e.g. ``("heatPump", "fan")``; empty when idle."""
+        status = self.raw.get("equipmentStatus") or ""
+        return tuple(sys.intern(item) for item in status.split(",") if item)
+
+    @property
+    def runtime(self) -> Optional[Runtime]:
+        return self._section("_runtime", self.raw.get("runtime"), _wrap(Runtime))
+
+    @property
+    def remote_sensors(self) -> List[RemoteSensor]:
+        return self._section("_remote_sensors", self.raw.get("remoteSensors"), _wrap_all(RemoteSensor))
+
+    @property
+    def climates(self) -> List[Climate]:
+        program = self.raw.get("program", {})
+        return self._section("_climates", program.get("climates"), _wrap_all(Climate))
+
+    @property
+    def events(self) -> List[Event]:
+        return self._section("_events", self.raw.get("events"), _wrap_all(Event))
+
+    @property
+    def weather(self) -> Optional[Weather]:
+        return self._section("_weather", self.raw.get("weather"), _wrap(Weather))
+
+
+def _wrap(model):
+    return lambda raw: None if raw is None else model(raw)
+
+
+def _wrap_all(model):
+    return lambda raws: [model(raw) for raw in raws or ()]
@@ -0,0 +1,313 @@
+"""Streaming download and parsing of ecobee ``runtimeReport`` data.
+
+A year of 5-minute intervals is over 100,000 rows per thermostat, so
+responses are never loaded whole: :class:`RuntimeReportParser` is fed the
+body chunk by chunk and yields a :class:`ReportRow` as soon as each
+``rowList``/``data`` string is complete. :func:`collect` turns rows into
+columns (``array.array`` for numeric columns) for callers who want arrays.
+"""
+import codecs
+import re
+import sys
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .const import (
+    ECOBEE_RUNTIME_REPORT_INTERVALS,
+    ECOBEE_RUNTIME_REPORT_MAX_DAYS,
+    ECOBEE_RUNTIME_REPORT_TEXT_COLUMNS,
+)
+
+RUNTIME: str = "runtime"
+SENSOR: str = "sensor"
+
+
+class ReportRow(NamedTuple):
+    """One 5-minute interval for one thermostat.
+
+    ``kind`` is ``"runtime"`` for ``reportList`` rows and ``"sensor"`` for
+    ``sensorList`` rows; ``columns`` names ``values`` and is shared between
+    rows. Empty cells are None, numeric cells floats. Sensor rows also
+    carry each column's ``sensorType`` in ``types`` ("" if unknown).
+    """
+
+    kind: str
+    identifier: str
+    timestamp: datetime
+    columns: Tuple[str, ...]
+    values: tuple
+    types: Tuple[str, ...] = ()
+
+
+def report_windows(start_date: date, end_date: date) -> Iterator[Tuple[date, date]]:
+    """Splits an inclusive date range into the API's 31-day request windows."""
+    step = timedelta(days=ECOBEE_RUNTIME_REPORT_MAX_DAYS)
+    while start_date <= end_date:
+        window_end = min(start_date + step - timedelta(days=1), end_date)
+        yield start_date, window_end
+        start_date = window_end + timedelta(days=1)
+
+
+def report_params(
+    identifiers: Iterable[str],
+    start_date: date,
+    end_date: date,
+    columns: Iterable[str],
+    include_sensors: bool = False,
+) -> dict:
+    """Returns the query parameters for one runtimeReport window."""
+    body = {
+        "selection": {
+            "selectionType": "thermostats",
+            "selectionMatch": ",".join(identifiers),
+        },
+        "startDate": start_date.isoformat(),
+        "startInterval": 0,
+        "endDate": end_date.isoformat(),
+        "endInterval": ECOBEE_RUNTIME_REPORT_INTERVALS - 1,
+        "columns": ",".join(columns),
+        "includeSensors": include_sensors,
+    }
+    return {"format": "json", "body": json.dumps(body)}
+
+
+_WHITESPACE = re.compile(r"\s*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_SCALAR = re.compile(r"[^\s,:\]}]+")
+
+
+class _JsonScanner:
+    """Incremental JSON scanner that reports every scalar with its key path.
+
+    Array positions are not part of the path, so every string in
+    ``reportList[*].rowList`` arrives as ``("reportList", "rowList")``.
+    Only an unfinished token is ever buffered between chunks.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._path: List[Optional[str]] = []
+        self._objects: List[bool] = []
+        self._expect_key = False
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[tuple, object]]:
+        buffer = self._buffer + text if self._buffer else text
+        end = len(buffer)
+        position = 0
+        scalars = []
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position >= end:
+                break
+            char = buffer[position]
+            if char == '"':
+                match = _STRING.match(buffer, position)
+                if match is None:
+                    break
+                token = match.group()
+                value = json.loads(token) if "\\" in token else token[1:-1]
+                if self._expect_key:
+                    self._path[-1] = value
+                else:
+                    scalars.append((tuple(self._path), value))
+                position = match.end()
+            elif char == "{" or char == "[":
+                is_object = char == "{"
+                self._objects.append(is_object)
+                if is_object:
+                    self._path.append(None)
+                self._expect_key = is_object
+                position += 1
+            elif char == "}" or char == "]":
+                if self._objects.pop():
+                    self._path.pop()
+                self._expect_key = False
+                position += 1
+            elif char == ",":
+                self._expect_key = bool(self._objects) and self._objects[-1]
+                position += 1
+            elif char == ":":
+                self._expect_key = False
+                position += 1
+            else:
+                match = _SCALAR.match(buffer, position)
+                if match.end() == end and not final:
+                    break
+                scalars.append((tuple(self._path), json.loads(match.group())))
+                position = match.end()
+        self._buffer = buffer[position:]
+        return scalars
+
+
+def _cell(value: str):
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return sys.intern(value)
+
+
+class RuntimeReportParser:
+    """Turns a streamed runtimeReport body into :class:`ReportRow` objects.
+
+    Call :meth:`feed` with each chunk of bytes as it arrives, then
+    :meth:`close`. ``sensors`` collects the sensor metadata per thermostat.
+    """
+
+    def __init__(self):
+        self._scanner = _JsonScanner()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.columns: Tuple[str, ...] = ()
+        self.sensors: Dict[str, List[dict]] = {}
+        self._identifier = None
+        self._sensor_identifier = None
+        self._sensor_columns: List[str] = []
+        self._sensor_columns_tuple: Tuple[str, ...] = ()
+        self._sensor_types: Tuple[str, ...] = ()
+
+    def feed(self, chunk: bytes, final: bool = False) -> Iterator[ReportRow]:
+        text = self._decoder.decode(chunk, final)
+        for path, value in self._scanner.feed(text, final):
+            if path == ("reportList", "rowList"):
+                yield self._row(RUNTIME, self._identifier, self.columns, value)
+            elif path == ("sensorList", "data"):
+                if len(self._sensor_columns_tuple) != len(self._sensor_columns) - 2:
+                    # Skip the leading "date" and "time" columns.
+                    self._sensor_columns_tuple = tuple(self._sensor_columns[2:])
+                    self._sensor_types = self._types(self._sensor_columns_tuple)
+                yield self._row(
+                    SENSOR,
+                    self._sensor_identifier,
+                    self._sensor_columns_tuple,
+                    value,
+                    self._sensor_types,
+                )
+            elif path == ("columns",):
+                self.columns = tuple(value.split(","))
+            elif path == ("reportList", "thermostatIdentifier"):
+                self._identifier = value
+            elif path == ("sensorList", "thermostatIdentifier"):
+                self._sensor_identifier = value
+                self._sensor_columns = []
+                self._sensor_columns_tuple = ()
+                self._sensor_types = ()
+                self.sensors[value] = []
+            elif path == ("sensorList", "columns"):
+                self._sensor_columns.append(value)
+            elif path[:2] == ("sensorList", "sensors") and len(path) == 3:
+                sensors = self.sensors.setdefault(self._sensor_identifier, [])
+                if path[2] == "sensorId" or not sensors:
+                    sensors.append({})
+                sensors[-1][path[2]] = value
+
+    def close(self) -> Iterator[ReportRow]:
+        """Flushes anything still buffered at the end of the body."""
+        return self.feed(b"", final=True)
+
+    def _types(self, columns: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Looks up each sensor column's ``sensorType`` in the sensor metadata."""
+        types = {
+            sensor.get("sensorId"): sensor.get("sensorType", "")
+            for sensor in self.sensors.get(self._sensor_identifier, ())
+        }
+        return tuple(types.get(name, "") for name in columns)
+
+    @staticmethod
+    def _row(
+        kind: str,
+        identifier: str,
+        columns: Tuple[str, ...],
+        line: str,
+        types: Tuple[str, ...] = (),
+    ) -> ReportRow:
+        fields = line.split(",")
+        return ReportRow(
+            kind,
+            identifier,
+            datetime.fromisoformat(f"{fields[0]}T{fields[1]}"),
+            columns,
+            tuple(_cell(field) for field in fields[2:]),
+            types,
+        )
+
+
+class RuntimeReport:
+    """Columnar runtime report data for one thermostat.
+
+    ``columns`` and ``sensor_columns`` map a column name to an
+    ``array.array("d")`` (NaN for empty cells), or to a list for text
+    columns such as ``hvacMode``. ``timestamps`` and ``sensor_timestamps``
+    line up with them. Columns that only some rows have, such as a sensor
+    added or removed partway through the range, hold gaps for the others.
+    ``sensor_types`` maps a sensor column to its ``sensorType``.
+    """
+
+    __slots__ = (
+        "identifier",
+        "timestamps",
+        "columns",
+        "sensor_timestamps",
+        "sensor_columns",
+        "sensor_types",
+    )
+
+    def __init__(self, identifier: str):
+        self.identifier = identifier
+        self.timestamps: List[datetime] = []
+        self.columns: Dict[str, object] = {}
+        self.sensor_timestamps: List[datetime] = []
+        self.sensor_columns: Dict[str, object] = {}
+        self.sensor_types: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, row: ReportRow) -> None:
+        if row.kind == RUNTIME:
+            timestamps, columns = self.timestamps, self.columns
+        else:
+            timestamps, columns = self.sensor_timestamps, self.sensor_columns
+            for name, kind in zip(row.columns, row.types):
+                if kind:
+                    self.sensor_types[name] = kind
+        length = len(timestamps)
+        for name, value in zip(row.columns, row.values):
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = _empty_column(name, length)
+            if isinstance(column, array):
+                column.append(_NAN if value is None or isinstance(value, str) else value)
+            else:
+                column.append(value)
+        if len(columns) > len(row.columns):
+            for column in columns.values():
+                if len(column) == length:
+                    column.append(_NAN if isinstance(column, array) else None)
+        timestamps.append(row.timestamp)
+
+
+_NAN = float("nan")
+
+
+def _empty_column(name: str, length: int):
+    if name in ECOBEE_RUNTIME_REPORT_TEXT_COLUMNS:
+        return [None] * length
+    return array("d", [_NAN]) * length
+
+
+def collect(rows: Iterable[ReportRow]) -> Dict[str, RuntimeReport]:
+    """Gathers streamed rows into one :class:`RuntimeReport` per thermostat."""
+    reports: Dict[str, RuntimeReport] = {}
+    for row in rows:
+        report = reports.get(row.identifier)
+        if report is None:
+            report = reports[row.identifier] = RuntimeReport(row.identifier)
+        report.append(row)
+    return reports
@@ -0,0 +1,336 @@
+"""Request budgets, retries and priorities shared by ecobee clients.
+
+Every request a client makes first takes a token from two buckets: one
+for its account and one for its API key, which all accounts using that
+key share. Writes (POSTs) go ahead of polls waiting on the same bucket.
+Transient failures are retried with jittered exponential backoff, and a
+``Retry-After`` from ecobee pauses every request drawing on the same
+buckets, not just the one that was throttled. Writes are only retried
+when they provably never reached ecobee. The scheduler also holds
+the :mod:`~pyecobee.circuit` breaker for each host.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Sequence
+
+from .circuit import CircuitBreaker, CircuitState
+from .const import (
+    ECOBEE_CIRCUIT_FAILURES,
+    ECOBEE_CIRCUIT_RESET,
+    ECOBEE_DEFAULT_ACCOUNT_BURST,
+    ECOBEE_DEFAULT_ACCOUNT_RATE,
+    ECOBEE_DEFAULT_BACKOFF,
+    ECOBEE_DEFAULT_KEY_BURST,
+    ECOBEE_DEFAULT_KEY_RATE,
+    ECOBEE_DEFAULT_RETRIES,
+    ECOBEE_MAX_BACKOFF,
+    ECOBEE_RETRY_HTTP_STATUSES,
+    ECOBEE_RETRY_STATUS_CODES,
+)
+from .errors import EcobeeDeadlineError
+
+WRITE: int = 0
+POLL: int = 1
+
+# How often a poll stepping aside for a write re-checks its buckets.
+_YIELD_INTERVAL = 0.05
+
+
+class TokenBucket:
+    """Allows ``rate`` requests a second on average and bursts of ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until", "writes_waiting")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        # Set from Retry-After; no request is let through before then.
+        self.blocked_until = 0.0
+        self.writes_waiting = 0
+
+    def delay(self, now: float) -> float:
+        """Returns the seconds until a token is available; 0 if one is now."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+
+class SchedulerStats(NamedTuple):
+    """A snapshot of :meth:`RequestScheduler.stats`."""
+
+    queued_writes: int
+    queued_polls: int
+    requests: int
+    retries: int
+    total_wait: float
+    max_wait: float
+    backoff_wait: float = 0.0
+
+
+def retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Parses a ``Retry-After`` header (seconds or an HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+def is_transient(
+    status_code: int,
+    payload: Optional[dict] = None,
+    write: bool = False,
+    retry_after: Optional[float] = None,
+) -> bool:
+    """Returns True if a response is worth retrying.
+
+    ecobee answers most application errors with HTTP 500 and a status code
+    in the body, so a 500 is only retried for the codes in
+    ECOBEE_RETRY_STATUS_CODES; token errors are handled by the caller.
+    A ``write`` may already have been applied when it fails, so it is only
+    retried when ecobee turned it away unprocessed: a 429, or a 503 that
+    came with a ``Retry-After``.
+    """
+    if write:
+        return status_code == 429 or (status_code == 503 and retry_after is not None)
+    if status_code in ECOBEE_RETRY_HTTP_STATUSES:
+        return True
+    if status_code == 500 and payload:
+        return payload.get("status", {}).get("code") in ECOBEE_RETRY_STATUS_CODES
+    return False
+
+
+class RequestScheduler:
+    """Rate budgets and retry policy for one or more :class:`~pyecobee.Ecobee` clients.
+
+    Each client gets its own account bucket; clients built with the same
+    scheduler and API key share a key bucket, and all of them share one
+    circuit breaker per host. Pass one scheduler to every client of a
+    deployment to keep them all inside ecobee's limits. ``clock`` and
+    ``sleep`` can be replaced to test pacing without waiting; a ``sleep``
+    is called in place of waiting for a token or backing off to retry.
+    """
+
+    def __init__(
+        self,
+        account_rate: float = ECOBEE_DEFAULT_ACCOUNT_RATE,
+        account_burst: float = ECOBEE_DEFAULT_ACCOUNT_BURST,
+        key_rate: float = ECOBEE_DEFAULT_KEY_RATE,
+        key_burst: float = ECOBEE_DEFAULT_KEY_BURST,
+        retries: int = ECOBEE_DEFAULT_RETRIES,
+        backoff: float = ECOBEE_DEFAULT_BACKOFF,
+        max_backoff: float = ECOBEE_MAX_BACKOFF,
+        failure_threshold: int = ECOBEE_CIRCUIT_FAILURES,
+        reset_timeout: float = ECOBEE_CIRCUIT_RESET,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None,
+    ):
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.key_rate = key_rate
+        self.key_burst = key_burst
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._condition = threading.Condition()
+        self._key_buckets: Dict[Optional[str], TokenBucket] = {}
+        self._queued = [0, 0]
+        self._requests = 0
+        self._retries = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._backoff_wait = 0.0
+
+    def account_bucket(self) -> TokenBucket:
+        """Returns a new bucket for one account."""
+        return TokenBucket(self.account_rate, self.account_burst, self._clock())
+
+    def key_bucket(self, api_key: Optional[str]) -> TokenBucket:
+        """Returns the bucket shared by every account using ``api_key``."""
+        with self._condition:
+            bucket = self._key_buckets.get(api_key)
+            if bucket is None:
+                bucket = self._key_buckets[api_key] = TokenBucket(
+                    self.key_rate, self.key_burst, self._clock()
+                )
+            return bucket
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """Returns the circuit breaker for ``host``."""
+        with self._condition:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(
+                    host, self.failure_threshold, self.reset_timeout, self._clock
+                )
+            return breaker
+
+    def circuits(self) -> Dict[str, CircuitState]:
+        """Returns the state of every host's circuit, keyed by host."""
+        with self._condition:
+            breakers = list(self._breakers.values())
+        return {breaker.host: breaker.snapshot() for breaker in breakers}
+
+    def acquire(
+        self, buckets: Sequence[TokenBucket], priority: int = POLL, timeout: Optional[float] = None
+    ) -> float:
+        """Blocks until every bucket has a token, takes them; returns the seconds waited.
+
+        Raises EcobeeDeadlineError instead of waiting past ``timeout`` seconds.
+        """
+        started = self._clock()
+        with self._condition:
+            self._enqueue(buckets, priority, 1)
+            try:
+                while True:
+                    wait = self._take(buckets, priority)
+                    if wait <= 0:
+                        break
+                    self._check_timeout(started, wait, timeout)
+                    self._wait(wait)
+            finally:
+                self._enqueue(buckets, priority, -1)
+                self._condition.notify_all()
+            return self._record_wait(started)
+
+    async def acquire_async(
+        self, buckets: Sequence[TokenBucket], priority: int = POLL, timeout: Optional[float] = None
+    ) -> float:
+        """Like :meth:`acquire`, but waits with ``asyncio.sleep``."""
+        started = self._clock()
+        with self._condition:
+            self._enqueue(buckets, priority, 1)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._take(buckets, priority)
+                if wait <= 0:
+                    break
+                self._check_timeout(started, wait, timeout)
+                await self._sleep_async(wait)
+        finally:
+            with self._condition:
+                self._enqueue(buckets, priority, -1)
+                self._condition.notify_all()
+        with self._condition:
+            return self._record_wait(started)
+
+    def _wait(self, seconds: float) -> None:
+        """Waits with the condition released, waking early if another request finishes."""
+        if self._sleep is None:
+            self._condition.wait(seconds)
+            return
+        self._condition.release()
+        try:
+            self._sleep(seconds)
+        finally:
+            self._condition.acquire()
+
+    async def _sleep_async(self, seconds: float) -> None:
+        if self._sleep is None:
+            await asyncio.sleep(seconds)
+        else:
+            self._sleep(seconds)
+
+    def _check_timeout(self, started: float, wait: float, timeout: Optional[float]) -> None:
+        if timeout is not None and self._clock() + wait > started + timeout:
+            raise EcobeeDeadlineError("Deadline passed waiting for the request budget")
+
+    def _enqueue(self, buckets: Sequence[TokenBucket], priority: int, count: int) -> None:
+        self._queued[priority] += count
+        if priority == WRITE:
+            for bucket in buckets:
+                bucket.writes_waiting += count
+
+    def _take(self, buckets: Sequence[TokenBucket], priority: int) -> float:
+        """Takes a token from every bucket, or returns how long to wait first."""
+        now = self._clock()
+        wait = max(bucket.delay(now) for bucket in buckets)
+        if priority != WRITE and any(bucket.writes_waiting for bucket in buckets):
+            return max(wait, _YIELD_INTERVAL)
+        if wait > 0:
+            return wait
+        for bucket in buckets:
+            bucket.tokens -= 1
+        return 0.0
+
+    def _record_wait(self, started: float) -> float:
+        waited = self._clock() - started
+        self._requests += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def retry_delay(
+        self,
+        attempt: int,
+        retry_after: Optional[float] = None,
+        buckets: Sequence[TokenBucket] = (),
+    ) -> Optional[float]:
+        """Returns the seconds to wait before retry number ``attempt + 1``, or None to give up.
+
+        The delay is drawn uniformly from ``[0, backoff * 2 ** attempt]``
+        (capped at ``max_backoff``) so clients that failed together do not
+        retry together. A ``retry_after`` is a floor, and it also holds
+        back every other request on ``buckets`` until it has passed.
+        """
+        if attempt >= self.retries:
+            return None
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        with self._condition:
+            self._retries += 1
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+                until = self._clock() + retry_after
+                for bucket in buckets:
+                    bucket.blocked_until = max(bucket.blocked_until, until)
+        return delay
+
+    def backoff_wait(self, delay: float) -> None:
+        """Sleeps ``delay`` seconds before a retry; counted in :meth:`stats`."""
+        (self._sleep or time.sleep)(delay)
+        self._record_backoff(delay)
+
+    async def backoff_wait_async(self, delay: float) -> None:
+        """Like :meth:`backoff_wait`, but waits with ``asyncio.sleep``."""
+        await self._sleep_async(delay)
+        self._record_backoff(delay)
+
+    def _record_backoff(self, delay: float) -> None:
+        with self._condition:
+            self._total_wait += delay
+            self._backoff_wait += delay
+
+    def stats(self) -> SchedulerStats:
+        """Returns queue depths and wait times since the scheduler was created.
+
+        ``total_wait`` includes ``backoff_wait``, the time spent backing off
+        between retries.
+        """
+        with self._condition:
+            return SchedulerStats(
+                self._queued[WRITE],
+                self._queued[POLL],
+                self._requests,
+                self._retries,
+                self._total_wait,
+                self._max_wait,
+                self._backoff_wait,
+            )
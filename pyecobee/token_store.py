@@ -0,0 +1,111 @@
+"""Pluggable storage for the Ecobee client's config and tokens."""
+import abc
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking, single-process use only.
+    fcntl = None
+
+from .const import _LOGGER
+from .util import config_from_file
+
+
+class TokenStore(abc.ABC):
+    """Where an :class:`~pyecobee.Ecobee` client loads and saves its config.
+
+    Subclass this to keep tokens somewhere other than a local file. The
+    client calls :meth:`acquire`/:meth:`release` around every token refresh
+    and checks :meth:`changed` first, so a store shared between processes
+    lets one process refresh while the others pick up its result.
+    """
+
+    @abc.abstractmethod
+    def load(self) -> dict:
+        """Returns the stored config, or an empty dict if there is none."""
+
+    @abc.abstractmethod
+    def save(self, config: dict) -> bool:
+        """Replaces the stored config; returns False if it could not be written."""
+
+    def changed(self) -> bool:
+        """Returns True if someone else saved since this store last loaded or saved."""
+        return False
+
+    def acquire(self) -> None:
+        """Blocks until this client holds the store's refresh lock."""
+
+    def release(self) -> None:
+        """Releases the lock taken by :meth:`acquire`."""
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class FileTokenStore(TokenStore):
+    """Keeps the config as JSON in a file shared by any number of processes.
+
+    Writes go to a temporary file that is renamed into place, so a reader
+    never sees half-written JSON. Refreshes are serialised across processes
+    with an advisory ``flock`` on ``<filename>.lock``, and the file's mtime
+    tells a waiting process that another one already refreshed.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._mtime_ns = None
+        self._lock_file = None
+        self._thread_lock = threading.Lock()
+
+    def _stat_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self) -> dict:
+        mtime_ns = self._stat_mtime_ns()
+        config = config_from_file(self.filename)
+        if config is False:
+            return {}
+        self._mtime_ns = mtime_ns
+        return config
+
+    def save(self, config: dict) -> bool:
+        saved = config_from_file(self.filename, config)
+        if saved:
+            self._mtime_ns = self._stat_mtime_ns()
+        return saved
+
+    def changed(self) -> bool:
+        return self._stat_mtime_ns() != self._mtime_ns
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        if fcntl is None:
+            return
+        try:
+            self._lock_file = open(f"{self.filename}.lock", "a")
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        except OSError as err:
+            _LOGGER.debug(f"Unable to lock {self.filename}: {err}")
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def release(self) -> None:
+        try:
+            if self._lock_file is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                self._lock_file.close()
+                self._lock_file = None
+        finally:
+            self._thread_lock.release()
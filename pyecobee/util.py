@@ -1,5 +1,6 @@
 """Utility functions for the python-ecobee-api library."""
 import os
+import tempfile
 from typing import Optional
 
 try:
@@ -15,9 +16,8 @@ def config_from_file(filename: str, config: dict = None) -> Optional[str]:
     if config:
         # We're writing configuration
         try:
-            with open(filename, "w") as fdesc:
-                fdesc.write(json.dumps(config))
-                return True
+            atomic_write(filename, json.dumps(config))
+            return True
         except IOError as error:
             _LOGGER.exception(error)
             return False
@@ -33,5 +33,42 @@ def config_from_file(filename: str, config: dict = None) -> Optional[str]:
         else:
             return {}
 
+
+def atomic_write(filename: str, data: str) -> None:
+    """Writes ``data`` to ``filename`` so readers see the old or new file, never half of one.
+
+    The data goes to a temporary file in the same directory, which is then
+    renamed over ``filename``. ``mkstemp`` creates that file readable and
+    writable by its owner only, so the written file is mode 0600 whatever
+    the old file's mode was. The config holds tokens, so that is wanted.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(filename)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as fdesc:
+            fdesc.write(data)
+            fdesc.flush()
+            os.fsync(fdesc.fileno())
+        os.replace(tmp_name, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
 def convert_to_bool(input) -> bool:
-    return str(input).lower() in ["true", "1", "t", "y", "yes"]
\ No newline at end of file
+    return str(input).lower() in ["true", "1", "t", "y", "yes"]
+
+
+def deep_update(target: dict, patch: dict) -> dict:
+    """Recursively merges ``patch`` into ``target`` in place; later values win."""
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            deep_update(target[key], value)
+        else:
+            target[key] = value
+    return target
@@ -0,0 +1,82 @@
+"""Typed change events yielded by :meth:`pyecobee.Ecobee.watch`.
+
+Each poll's ``Ecobee.last_changes`` is translated into these events by
+:func:`change_events`; thermostats that were only just added or removed
+produce none.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Base class for everything :meth:`~pyecobee.Ecobee.watch` yields."""
+
+    identifier: str
+
+
+@dataclass(frozen=True)
+class SetpointChanged(ChangeEvent):
+    """The heat or cool setpoint moved; values are tenths of a degree F."""
+
+    setpoint: str  # "heat" or "cool"
+    old: Optional[int]
+    new: Optional[int]
+
+
+@dataclass(frozen=True)
+class HvacModeChanged(ChangeEvent):
+    old: Optional[str]
+    new: Optional[str]
+
+
+@dataclass(frozen=True)
+class EquipmentStatusChanged(ChangeEvent):
+    """The set of running equipment changed, e.g. ``()`` to ``("heatPump", "fan")``."""
+
+    old: Tuple[str, ...]
+    new: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class OccupancyChanged(ChangeEvent):
+    sensor_id: str
+    occupied: bool
+
+
+@dataclass(frozen=True)
+class EventAdded(ChangeEvent):
+    """A hold, vacation or other event appeared on the thermostat."""
+
+    event: dict
+
+
+_SETPOINTS = (("desiredHeat", "heat"), ("desiredCool", "cool"))
+
+
+def _equipment(status: Optional[str]) -> Tuple[str, ...]:
+    return tuple(item for item in (status or "").split(",") if item)
+
+
+def change_events(changes) -> List[ChangeEvent]:
+    """Returns the events for one :class:`~pyecobee.ThermostatChanges`."""
+    if changes.added or changes.removed:
+        return []
+    identifier = changes.identifier
+    events = []
+    for key, setpoint in _SETPOINTS:
+        if key in changes.runtime:
+            old, new = changes.runtime[key]
+            events.append(SetpointChanged(identifier, setpoint, old, new))
+    if "hvacMode" in changes.settings:
+        events.append(HvacModeChanged(identifier, *changes.settings["hvacMode"]))
+    if changes.equipment_status is not None:
+        old, new = changes.equipment_status
+        events.append(EquipmentStatusChanged(identifier, _equipment(old), _equipment(new)))
+    for sensor_id, capabilities in changes.sensors.items():
+        old, new = capabilities.get("occupancy", (None, None))
+        # Sensors that were only just paired, or removed, are not flips.
+        if old is not None and new is not None:
+            events.append(OccupancyChanged(identifier, sensor_id, new == "true"))
+    events.extend(EventAdded(identifier, event) for event in changes.events_added)
+    return events
@@ -41,6 +41,7 @@ setup(
     author_email="nkgilley@gmail.com",
     license="MIT",
     install_requires=["requests>=2.25"],
+    extras_require={"async": ["aiohttp>=3.8"], "history": ["numpy>=1.20"]},
     packages=["pyecobee"],
     zip_safe=True,
 )
@@ -0,0 +1,332 @@
+"""Tests for the asyncio client.
+
+``aioresponses`` stands in for ecobee the way ``requests_mock`` does for the
+sync tests; the module is skipped when the async extras are not installed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from datetime import date
+
+import pytest
+
+pytest.importorskip("aiohttp")
+aioresponses = pytest.importorskip("aioresponses").aioresponses
+from yarl import URL
+
+from pyecobee.aio import AsyncEcobee
+from pyecobee.const import (
+    ECOBEE_ACCESS_TOKEN,
+    ECOBEE_PASSWORD,
+    ECOBEE_REFRESH_TOKEN,
+    ECOBEE_USERNAME,
+)
+from pyecobee.errors import EcobeeAuthFailedError, InvalidTokenError
+
+
+AUTH_BASE = "https://auth.ecobee.com"
+TOKEN_URL = f"{AUTH_BASE}/oauth/token"
+CALLBACK_URL = "https://www.ecobee.com/home/authCallback"
+THERMOSTAT_URL = re.compile(r"^https://api\.ecobee\.com/1/thermostat.*$")
+
+
+def _thermostat_list() -> dict:
+    return {
+        "thermostatList": [{"identifier": "311000000001", "name": "Main Floor"}],
+        "status": {"code": 0, "message": ""},
+    }
+
+
+def _sent_body(mocked: aioresponses, method: str) -> dict:
+    calls = [c for (m, _), c in mocked.requests.items() if m == method]
+    return calls[-1][-1].kwargs["json"]
+
+
+def test_get_thermostats_and_write() -> None:
+    """Reads cache the thermostat list; writes reuse the sync body builders."""
+
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(THERMOSTAT_URL, payload=_thermostat_list())
+            mocked.post(THERMOSTAT_URL, payload={"status": {"code": 0}})
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+            ) as ecobee:
+                assert await ecobee.get_thermostats() is True
+                assert ecobee.thermostats[0]["name"] == "Main Floor"
+                await ecobee.set_hvac_mode(0, "cool")
+            assert _sent_body(mocked, "POST") == {
+                "selection": {
+                    "selectionType": "thermostats",
+                    "selectionMatch": "311000000001",
+                },
+                "thermostat": {"settings": {"hvacMode": "cool"}},
+            }
+
+    asyncio.run(run())
+
+
+def test_expired_token_refreshes_and_retries() -> None:
+    """Status code 14 triggers one refresh grant, then the call is retried."""
+
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(
+                THERMOSTAT_URL,
+                status=500,
+                payload={"status": {"code": 14, "message": "expired"}},
+            )
+            mocked.post(
+                TOKEN_URL,
+                payload={"access_token": "AT-2", "refresh_token": "RT-2", "expires_in": 3600},
+            )
+            mocked.get(THERMOSTAT_URL, payload=_thermostat_list())
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+            ) as ecobee:
+                assert await ecobee.get_thermostats() is True
+                assert ecobee.access_token == "AT-2"
+                assert ecobee.refresh_token == "RT-2"
+
+    asyncio.run(run())
+
+
+def test_invalid_grant_raises_invalid_token() -> None:
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.post(TOKEN_URL, status=400, payload={"error": "invalid_grant"})
+            async with AsyncEcobee(config={ECOBEE_REFRESH_TOKEN: "RT-old"}) as ecobee:
+                with pytest.raises(InvalidTokenError):
+                    await ecobee.refresh_tokens()
+
+    asyncio.run(run())
+
+
+def test_request_tokens_web_round_trip() -> None:
+    """The async Auth0 login walks the same identifier/password/callback hops."""
+
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(
+                re.compile(rf"^{AUTH_BASE}/authorize\?.*$"),
+                status=302,
+                headers={"Location": f"{AUTH_BASE}/u/login/identifier?state=S1"},
+            )
+            mocked.get(f"{AUTH_BASE}/u/login/identifier?state=S1", body="form")
+            mocked.post(
+                f"{AUTH_BASE}/u/login/identifier?state=S1",
+                status=302,
+                headers={"Location": f"{AUTH_BASE}/u/login/password?state=S1"},
+            )
+            mocked.get(f"{AUTH_BASE}/u/login/password?state=S1", body="form")
+            mocked.post(
+                f"{AUTH_BASE}/u/login/password?state=S1",
+                status=302,
+                headers={"Location": f"{CALLBACK_URL}?code=CODE_9"},
+            )
+            mocked.post(
+                TOKEN_URL,
+                payload={"access_token": "AT-w", "refresh_token": "RT-w", "expires_in": 3600},
+            )
+            async with AsyncEcobee(
+                config={ECOBEE_USERNAME: "user@example.com", ECOBEE_PASSWORD: "hunter2"}
+            ) as ecobee:
+                assert await ecobee.request_tokens_web() is True
+                assert ecobee.refresh_token == "RT-w"
+
+            token_call = mocked.requests[("POST", URL(TOKEN_URL))][0]
+            assert token_call.kwargs["data"]["code"] == "CODE_9"
+
+    asyncio.run(run())
+
+
+def test_request_tokens_web_wrong_password_raises_failed() -> None:
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(
+                re.compile(rf"^{AUTH_BASE}/authorize\?.*$"),
+                status=302,
+                headers={"Location": f"{AUTH_BASE}/u/login/identifier?state=S1"},
+            )
+            mocked.get(f"{AUTH_BASE}/u/login/identifier?state=S1", body="form")
+            mocked.post(
+                f"{AUTH_BASE}/u/login/identifier?state=S1",
+                status=302,
+                headers={"Location": f"{AUTH_BASE}/u/login/password?state=S1"},
+            )
+            mocked.get(f"{AUTH_BASE}/u/login/password?state=S1", body="form")
+            mocked.post(
+                f"{AUTH_BASE}/u/login/password?state=S1",
+                status=302,
+                headers={"Location": f"{AUTH_BASE}/u/login/password?state=S1&error=1"},
+            )
+            mocked.get(f"{AUTH_BASE}/u/login/password?state=S1&error=1", body="retry")
+            async with AsyncEcobee(
+                config={ECOBEE_USERNAME: "user@example.com", ECOBEE_PASSWORD: "bad"}
+            ) as ecobee:
+                with pytest.raises(EcobeeAuthFailedError):
+                    await ecobee.request_tokens_web()
+
+    asyncio.run(run())
+
+
+def test_async_batch_sends_one_request() -> None:
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(THERMOSTAT_URL, payload=_thermostat_list())
+            mocked.post(THERMOSTAT_URL, payload={"status": {"code": 0}})
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+            ) as ecobee:
+                await ecobee.get_thermostats()
+                async with ecobee.batch(0) as batch:
+                    batch.set_hvac_mode("cool")
+                    batch.resume_program()
+            body = _sent_body(mocked, "POST")
+            assert body["thermostat"] == {"settings": {"hvacMode": "cool"}}
+            assert body["functions"][0]["type"] == "resumeProgram"
+
+    asyncio.run(run())
+
+
+def test_sync_batch_on_async_client_raises() -> None:
+    ecobee = AsyncEcobee(config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"})
+    with pytest.raises(TypeError):
+        with ecobee.batch("311000000001") as batch:
+            batch.set_hvac_mode("cool")
+
+
+def test_async_runtime_report_streams_rows() -> None:
+    report = {
+        "columns": "zoneAveTemp",
+        "reportList": [
+            {"thermostatIdentifier": "311000000001", "rowList": ["2026-01-01,00:00:00,70.1"]}
+        ],
+        "status": {"code": 0},
+    }
+
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(re.compile(r"^https://api\.ecobee\.com/1/runtimeReport.*$"), payload=report)
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+            ) as ecobee:
+                rows = [
+                    row
+                    async for row in ecobee.iter_runtime_report(
+                        "311000000001", date(2026, 1, 1), date(2026, 1, 1)
+                    )
+                ]
+        assert [row.values for row in rows] == [(70.1,)]
+
+    asyncio.run(run())
+
+
+def test_async_max_age_read_is_awaitable() -> None:
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(THERMOSTAT_URL, payload=_thermostat_list())
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+            ) as ecobee:
+                thermostat = await ecobee.get_thermostat(0, max_age=60)
+                assert thermostat["name"] == "Main Floor"
+                # Fresh now, so this neither fetches nor needs awaiting.
+                assert ecobee.get_thermostat(0)["name"] == "Main Floor"
+                assert (await ecobee.get_thermostat("Main Floor", max_age=60)) is thermostat
+
+    asyncio.run(run())
+
+
+def test_async_coalesced_writes_share_one_request() -> None:
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(THERMOSTAT_URL, payload=_thermostat_list())
+            mocked.post(THERMOSTAT_URL, payload={"status": {"code": 0}})
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"},
+                coalesce_window=0.01,
+            ) as ecobee:
+                await ecobee.get_thermostats()
+                results = await asyncio.gather(
+                    ecobee.set_hold_temp(0, cool_temp=76, heat_temp=68),
+                    ecobee.set_hold_temp(0, cool_temp=75, heat_temp=68),
+                    ecobee.set_hvac_mode(0, "cool"),
+                )
+                assert results == [{"status": {"code": 0}}] * 3
+            posts = [c for (m, _), c in mocked.requests.items() if m == "POST"]
+            assert sum(len(calls) for calls in posts) == 1
+            body = _sent_body(mocked, "POST")
+            assert body["thermostat"] == {"settings": {"hvacMode": "cool"}}
+            assert [f["params"]["coolHoldTemp"] for f in body["functions"]] == [750]
+
+    asyncio.run(run())
+
+
+def test_async_unexpected_flush_error_reaches_every_writer() -> None:
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.post(THERMOSTAT_URL, exception=RuntimeError("session closed"))
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"},
+                coalesce_window=60,
+            ) as ecobee:
+                writes = [
+                    asyncio.ensure_future(ecobee.set_hvac_mode("311000000001", "cool")),
+                    asyncio.ensure_future(ecobee.set_fan_min_on_time("311000000001", 10)),
+                ]
+                await asyncio.sleep(0)
+                with pytest.raises(RuntimeError):
+                    await ecobee.flush_writes()
+                for write in writes:
+                    with pytest.raises(RuntimeError):
+                        await write
+
+    asyncio.run(run())
+
+
+def test_async_runtime_history_awaits_the_report() -> None:
+    np = pytest.importorskip("numpy")
+    report = {
+        "columns": "zoneAveTemp",
+        "reportList": [
+            {"thermostatIdentifier": "311000000001", "rowList": ["2026-01-01,00:00:00,70.1"]}
+        ],
+        "sensorList": [
+            {
+                "thermostatIdentifier": "311000000001",
+                "sensors": [{"sensorId": "rs1:100", "sensorType": "temperature"}],
+                "columns": ["date", "time", "rs1:100"],
+                "data": ["2026-01-01,00:00:00,68.5"],
+            }
+        ],
+        "status": {"code": 0},
+    }
+
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(
+                re.compile(r"^https://api\.ecobee\.com/1/runtimeReport.*$"),
+                payload=report,
+                repeat=True,
+            )
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+            ) as ecobee:
+                history = await ecobee.get_runtime_history(
+                    "311000000001", date(2026, 1, 1), date(2026, 1, 1)
+                )
+                assert history["311000000001"]["zoneAveTemp"][0] == 701
+                sensors = await ecobee.get_runtime_history(
+                    "311000000001", date(2026, 1, 1), date(2026, 1, 1), include_sensors=True
+                )
+                assert set(sensors["311000000001"].columns) == {"zoneAveTemp", "rs1:100"}
+                assert sensors["311000000001"]["zoneAveTemp"][0] == 701
+                assert sensors["311000000001"]["rs1:100"].dtype == np.int16
+                assert sensors["311000000001"]["rs1:100"][0] == 685
+            sent = [c for (m, u), calls in mocked.requests.items() for c in calls]
+            assert sent[-1].kwargs["params"]["body"].count('"includeSensors": true') == 1
+
+    asyncio.run(run())
@@ -532,3 +532,59 @@ def test_refresh_tokens_invalid_grant_raises_invalid_token(
     with pytest.raises(InvalidTokenError):
         ecobee.refresh_tokens()
 
+
+
+def test_expiry_persisted_and_refreshed_before_requests(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    """The token's expiry is saved with the tokens and triggers a refresh ahead of time."""
+    from pyecobee.const import ECOBEE_EXPIRES_AT
+
+    requests_mock.post(
+        TOKEN_URL,
+        status_code=200,
+        json={"access_token": "AT-2", "refresh_token": "RT-2", "expires_in": 30},
+    )
+    requests_mock.get(
+        "https://api.ecobee.com/1/thermostat",
+        json={"thermostatList": [], "status": {"code": 0}},
+    )
+
+    ecobee = _make_ecobee()
+    ecobee.refresh_token = "RT-1"
+    ecobee.refresh_tokens()
+    assert ecobee.config[ECOBEE_EXPIRES_AT] == ecobee.expires_at
+    # 30s left is inside the default 60s skew, so the next call refreshes first.
+    assert ecobee.token_expiring()
+
+    ecobee.get_thermostats()
+    methods = [c.method for c in requests_mock.request_history]
+    assert methods == ["POST", "POST", "GET"]
+    assert requests_mock.request_history[-1].headers["Authorization"] == "Bearer AT-2"
+
+
+def test_token_refresh_timer_refreshes_in_background(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    """The background timer fires once the token is inside the refresh skew."""
+    import time
+
+    requests_mock.post(
+        TOKEN_URL,
+        status_code=200,
+        json={"access_token": "AT-bg", "expires_in": 3600},
+    )
+
+    ecobee = _make_ecobee()
+    ecobee.refresh_token = "RT-1"
+    ecobee.expires_at = time.time() + ecobee.refresh_skew
+    ecobee.start_token_refresh_timer()
+    try:
+        deadline = time.time() + 5
+        while ecobee.access_token != "AT-bg" and time.time() < deadline:
+            time.sleep(0.01)
+        assert ecobee.access_token == "AT-bg"
+        assert ecobee.expires_at > time.time() + 3000
+    finally:
+        ecobee.close()
+    assert ecobee._refresh_timer is None
@@ -0,0 +1,165 @@
+"""Tests for learning thermostat report phases and aligning polls to them."""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import requests_mock as rm_module
+
+from pyecobee import ThermostatRevision
+from pyecobee.cadence import PollScheduler, UpdateCadence, report_times
+from pyecobee.const import ECOBEE_ACCESS_TOKEN, ECOBEE_REFRESH_TOKEN
+from pyecobee.fleet import EcobeeFleet
+
+from .test_client import SUMMARY_URL, THERMOSTAT_URL, _summary, _thermostat, _thermostat_response
+
+# 2026-10-18 12:00:00 UTC is a multiple of the 180 s period.
+BASE = datetime(2026, 10, 18, 12, tzinfo=timezone.utc).timestamp()
+
+
+class _Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _client(reports: dict) -> SimpleNamespace:
+    """A stand-in client whose thermostats last reported at the given offsets from BASE."""
+    revisions = {}
+    for identifier, offset in reports.items():
+        runtime = datetime.fromtimestamp(BASE + offset, timezone.utc).strftime("%y%m%d%H%M%S")
+        revisions[identifier] = ThermostatRevision.from_summary(
+            f"{identifier}:Main:true:T1:A1:{runtime}:I1"
+        )
+    return SimpleNamespace(revisions=revisions, thermostats=None)
+
+
+def test_phase_is_a_circular_mean() -> None:
+    cadence = UpdateCadence(period=180)
+    assert cadence.phase("t") is None
+    assert cadence.observe("t", BASE + 179)
+    assert not cadence.observe("t", BASE + 179)
+    cadence.observe("t", BASE + 181)
+    phase = cadence.phase("t")
+    assert min(phase, 180 - phase) < 0.01
+    assert abs(cadence.next_report("t", BASE + 10) - (BASE + 180)) < 0.01
+
+
+def test_report_times_reads_revisions_and_status_modified() -> None:
+    client = _client({"311000000001": 90})
+    client.thermostats = [_thermostat()]
+    assert report_times(client) == {"311000000001": [BASE + 90, BASE]}
+
+
+def test_unpolled_accounts_are_spread_over_the_period() -> None:
+    clock = _Clock(BASE)
+    poll_scheduler = PollScheduler(jitter=0, clock=clock)
+    for account in ("a", "b", "c"):
+        poll_scheduler.add(account)
+    assert [poll_scheduler.next_poll(account) - BASE for account in "abc"] == [0, 60, 120]
+    assert poll_scheduler.due() == ["a"]
+    assert poll_scheduler.wait_time() == 0
+    clock.now = BASE + 61
+    assert poll_scheduler.due() == ["a", "b"]
+
+
+def test_spread_closes_up_when_an_account_is_discarded() -> None:
+    clock = _Clock(BASE)
+    poll_scheduler = PollScheduler(jitter=0, clock=clock)
+    for account in ("a", "b", "c", "d"):
+        poll_scheduler.add(account)
+    poll_scheduler.discard("b")
+    assert [poll_scheduler.next_poll(account) - BASE for account in "acd"] == [0, 60, 120]
+
+
+def test_due_scales_to_large_fleets() -> None:
+    poll_scheduler = PollScheduler(jitter=0, clock=_Clock(BASE))
+    for account in range(10000):
+        poll_scheduler.add(account)
+    started = time.perf_counter()
+    assert poll_scheduler.due() == [0]
+    # Linear in the number of accounts: well under a second for 10,000.
+    assert time.perf_counter() - started < 0.5
+
+
+def test_polls_land_just_after_the_best_report_time() -> None:
+    clock = _Clock(BASE + 5)
+    poll_scheduler = PollScheduler(margin=20, jitter=0, clock=clock)
+    # Reports at phases 10, 20 and 100: polling after 20 leaves the least staleness.
+    client = _client({"t1": 10, "t2": 20, "t3": 100})
+    assert poll_scheduler.observe("account", client) == BASE + 40
+    clock.now = BASE + 41
+    assert poll_scheduler.observe("account", client) == BASE + 220
+
+    slower = PollScheduler(interval=600, margin=20, jitter=0, clock=clock)
+    # Never sooner than interval rounded down to a report time.
+    assert slower.observe("account", client) == BASE + 580
+
+
+def test_fleet_poll_runs_due_accounts(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        SUMMARY_URL, json=_summary("311000000001:Main Floor:true:T1:A1:261018120130:I1")
+    )
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    config = {ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+
+    with EcobeeFleet({"home": config}) as fleet:
+        poll_scheduler = PollScheduler()
+        rounds = fleet.poll(threading.Event(), poll_scheduler)
+        result = next(rounds)
+        rounds.close()
+
+    assert result.succeeded == ["home"]
+    assert poll_scheduler.cadence.phase("311000000001") is not None
+    assert poll_scheduler.next_poll("home") > poll_scheduler._last_poll["home"]
+
+
+class _Stop(threading.Event):
+    """Records how long poll() waits, and stops it at the first wait."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.waits = []
+
+    def wait(self, timeout=None) -> bool:
+        self.waits.append(timeout)
+        self.set()
+        return True
+
+
+def test_fleet_poll_waits_a_period_with_no_accounts() -> None:
+    assert PollScheduler(period=180).wait_time() == 180
+    stop = _Stop()
+    with EcobeeFleet({}) as fleet:
+        assert list(fleet.poll(stop, PollScheduler(period=180))) == []
+    assert stop.waits == [180]
+
+
+def test_fleet_poll_skips_accounts_removed_mid_round(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        SUMMARY_URL, json=_summary("311000000001:Main Floor:true:T1:A1:261018120130:I1")
+    )
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    config = {ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+
+    with EcobeeFleet({"home": config}) as fleet:
+        run = fleet.run
+
+        def run_then_remove(*args, **kwargs):
+            result = run(*args, **kwargs)
+            fleet.remove("home")
+            return result
+
+        fleet.run = run_then_remove
+        poll_scheduler = PollScheduler()
+        rounds = fleet.poll(threading.Event(), poll_scheduler)
+        result = next(rounds)
+        rounds.close()
+
+    assert result.succeeded == ["home"]
+    assert poll_scheduler.due() == []
@@ -0,0 +1,75 @@
+"""Tests for the per-host circuit breakers."""
+
+from __future__ import annotations
+
+import pytest
+import requests
+import requests_mock as rm_module
+
+from pyecobee import Ecobee
+from pyecobee.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from pyecobee.const import ECOBEE_ACCESS_TOKEN, ECOBEE_REFRESH_TOKEN
+from pyecobee.errors import EcobeeCircuitOpenError
+from pyecobee.scheduler import RequestScheduler
+
+
+THERMOSTAT_URL = "https://api.ecobee.com/1/thermostat"
+TOKEN_URL = "https://auth.ecobee.com/oauth/token"
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_consecutive_failures_and_probes() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker("api.ecobee.com", failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    breaker.record(200)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record(503)
+    assert breaker.snapshot() == ("api.ecobee.com", OPEN, 2, 30.0)
+    with pytest.raises(EcobeeCircuitOpenError):
+        breaker.before_request()
+
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    breaker.before_request()
+    # Only one probe at a time.
+    with pytest.raises(EcobeeCircuitOpenError):
+        breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    breaker.before_request()
+    breaker.record(500)
+    assert breaker.snapshot() == ("api.ecobee.com", CLOSED, 0, 0.0)
+
+
+def test_client_fails_fast_per_host(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, exc=requests.exceptions.ConnectTimeout)
+    requests_mock.post(TOKEN_URL, json={"access_token": "AT-2", "expires_in": 3600})
+    scheduler = RequestScheduler(retries=0, failure_threshold=3)
+    ecobee = Ecobee(
+        config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"},
+        scheduler=scheduler,
+    )
+
+    for _ in range(3):
+        assert ecobee.get_thermostats() is False
+    with pytest.raises(EcobeeCircuitOpenError):
+        ecobee.get_thermostats()
+    assert requests_mock.call_count == 3
+
+    # auth.ecobee.com has its own circuit and is still reachable.
+    assert ecobee.refresh_tokens() is True
+    circuits = scheduler.circuits()
+    assert circuits["api.ecobee.com"].state == OPEN
+    assert circuits["auth.ecobee.com"].state == CLOSED
@@ -0,0 +1,661 @@
+"""Tests for the ecobee API client: transport, reads and writes.
+
+As in ``test_auth.py``, ``requests_mock`` stands in for api.ecobee.com.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+import requests_mock as rm_module
+
+from pyecobee import Ecobee
+from pyecobee.const import ECOBEE_ACCESS_TOKEN, ECOBEE_REFRESH_TOKEN
+from pyecobee.errors import EcobeeError, InvalidSensorError, InvalidThermostatError
+
+
+API_BASE = "https://api.ecobee.com/1"
+THERMOSTAT_URL = f"{API_BASE}/thermostat"
+
+
+def _thermostat(identifier: str = "311000000001", name: str = "Main Floor") -> dict:
+    """Return a trimmed-down thermostat object in the shape ecobee sends."""
+    return {
+        "identifier": identifier,
+        "name": name,
+        "settings": {"hvacMode": "heat", "fanMinOnTime": 0, "humidity": "40"},
+        "runtime": {
+            "connected": True,
+            "actualTemperature": 701,
+            "desiredHeat": 690,
+            "desiredCool": 760,
+            "lastStatusModified": "2026-10-18 12:00:00",
+        },
+        "equipmentStatus": "",
+        "events": [],
+        "program": {
+            "currentClimateRef": "home",
+            "climates": [
+                {"name": "Home", "climateRef": "home", "sensors": []},
+                {"name": "Away", "climateRef": "away", "sensors": []},
+            ],
+        },
+        "remoteSensors": [
+            {
+                "id": "ei:0",
+                "name": name,
+                "type": "thermostat",
+                "capability": [
+                    {"id": "1", "type": "temperature", "value": "701"},
+                    {"id": "2", "type": "occupancy", "value": "false"},
+                ],
+            },
+            {
+                "id": "rs:100",
+                "name": "Bedroom",
+                "type": "ecobee3_remote_sensor",
+                "capability": [
+                    {"id": "1", "type": "temperature", "value": "688"},
+                    {"id": "2", "type": "occupancy", "value": "true"},
+                ],
+            },
+        ],
+    }
+
+
+def _thermostat_response(*thermostats: dict) -> dict:
+    return {
+        "thermostatList": list(thermostats),
+        "status": {"code": 0, "message": ""},
+    }
+
+
+def _make_ecobee(**kwargs) -> Ecobee:
+    """Build an Ecobee instance that already holds web-flow tokens."""
+    return Ecobee(
+        config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"},
+        **kwargs,
+    )
+
+
+def test_requests_reuse_one_session(requests_mock: rm_module.Mocker) -> None:
+    """Reads and writes must go through the client's pooled session."""
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0}})
+
+    session = requests.Session()
+    ecobee = _make_ecobee(session=session)
+    sent = []
+    original = session.request
+
+    def _tracking_request(*args, **kwargs):
+        sent.append(args[0])
+        return original(*args, **kwargs)
+
+    session.request = _tracking_request
+    assert ecobee.get_thermostats() is True
+    ecobee.set_hvac_mode(0, "cool")
+    assert sent == ["GET", "POST"]
+    assert json.loads(requests_mock.last_request.text)["thermostat"] == {
+        "settings": {"hvacMode": "cool"}
+    }
+
+
+def test_close_leaves_caller_session_open() -> None:
+    """A caller-supplied session is shared, so close() must not tear it down."""
+    session = requests.Session()
+    closed = []
+    session.close = lambda: closed.append(True)
+    with _make_ecobee(session=session) as ecobee:
+        assert ecobee._session is session
+    assert closed == []
+
+    owned = _make_ecobee()
+    owned._session.close = lambda: closed.append(True)
+    owned.close()
+    assert closed == [True]
+
+
+def test_auth_session_shares_connection_pool() -> None:
+    """The Auth0 login gets its own cookie jar but the client's adapters."""
+    ecobee = _make_ecobee(pool_maxsize=4)
+    auth_session = ecobee._new_auth_session()
+    assert auth_session.cookies is not ecobee._session.cookies
+    assert auth_session.get_adapter("https://auth.ecobee.com") is (
+        ecobee._session.get_adapter("https://auth.ecobee.com")
+    )
+    assert ecobee._session.get_adapter("https://api.ecobee.com")._pool_maxsize == 4
+    ecobee.close()
+
+
+SUMMARY_URL = f"{API_BASE}/thermostatSummary"
+
+
+def _summary(*revisions: str) -> dict:
+    return {
+        "thermostatCount": len(revisions),
+        "revisionList": list(revisions),
+        "status": {"code": 0, "message": ""},
+    }
+
+
+def _selection(request) -> dict:
+    query = parse_qs(urlparse(request.url).query)
+    return json.loads(query["json"][0])["selection"]
+
+
+def test_changed_only_skips_fetch_when_revisions_unchanged(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    """An idle poll costs one thermostatSummary request and nothing else."""
+    revision = "311000000001:Main Floor:true:R1:A1:T1:I1"
+    requests_mock.get(SUMMARY_URL, json=_summary(revision))
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+
+    ecobee = _make_ecobee()
+    assert ecobee.update(changed_only=True) is True
+    assert requests_mock.call_count == 2  # summary + initial full read
+
+    assert ecobee.update(changed_only=True) is True
+    assert requests_mock.call_count == 3
+    assert requests_mock.last_request.path == "/1/thermostatsummary"
+
+
+def test_changed_only_fetches_moved_sections_and_merges(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    """A runtime revision bump re-reads runtime sections only, for that thermostat."""
+    first, second = _thermostat("311000000001"), _thermostat("311000000002", "Upstairs")
+    requests_mock.get(
+        SUMMARY_URL,
+        [
+            {"json": _summary("311000000001:Main Floor:true:R1:A1:T1:I1",
+                              "311000000002:Upstairs:true:R1:A1:T1:I1")},
+            {"json": _summary("311000000001:Main Floor:true:R1:A1:T2:I1",
+                              "311000000002:Upstairs:true:R1:A1:T1:I1")},
+        ],
+    )
+    updated = {
+        "identifier": "311000000001",
+        "runtime": dict(first["runtime"], actualTemperature=712),
+        "remoteSensors": first["remoteSensors"],
+        "equipmentStatus": "heatPump,fan",
+    }
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [
+            {"json": _thermostat_response(first, second)},
+            {"json": _thermostat_response(updated)},
+        ],
+    )
+
+    ecobee = _make_ecobee()
+    ecobee.update(changed_only=True)
+    assert ecobee.update(changed_only=True) is True
+
+    selection = _selection(requests_mock.last_request)
+    assert selection["selectionType"] == "thermostats"
+    assert selection["selectionMatch"] == "311000000001"
+    assert "includeRuntime" in selection and "includeProgram" not in selection
+    assert ecobee.thermostats[0]["runtime"]["actualTemperature"] == 712
+    assert ecobee.thermostats[0]["equipmentStatus"] == "heatPump,fan"
+    assert ecobee.thermostats[0]["program"]["currentClimateRef"] == "home"
+    assert ecobee.revisions["311000000001"].runtime == "T2"
+
+
+def test_changed_only_chunks_selection_match(requests_mock: rm_module.Mocker) -> None:
+    identifiers = [f"3110000{n:05d}" for n in range(60)]
+    requests_mock.get(
+        SUMMARY_URL,
+        [
+            {"json": _summary(*(f"{i}:T:true:R1:A1:T1:I1" for i in identifiers))},
+            {"json": _summary(*(f"{i}:T:true:R1:A1:T2:I1" for i in identifiers))},
+        ],
+    )
+    requests_mock.get(
+        THERMOSTAT_URL, json=_thermostat_response(*(_thermostat(i, i) for i in identifiers))
+    )
+
+    ecobee = _make_ecobee()
+    ecobee.update(changed_only=True)
+    assert ecobee.update(changed_only=True) is True
+
+    reads = [r for r in requests_mock.request_history if r.path == "/1/thermostat"][1:]
+    assert [len(_selection(r)["selectionMatch"].split(",")) for r in reads] == [25, 25, 10]
+
+
+def test_changed_only_rereads_weather_after_its_ttl(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(SUMMARY_URL, json=_summary("311000000001:Main Floor:true:R1:A1:T1:I1"))
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+
+    ecobee = _make_ecobee()
+    ecobee.update(changed_only=True)
+    ecobee.fetched_at["311000000001"]["includeWeather"] -= ecobee.section_ttls["includeWeather"] + 1
+    assert ecobee.update(changed_only=True) is True
+
+    selection = _selection(requests_mock.last_request)
+    assert selection["includeWeather"] and "includeRuntime" not in selection
+    assert requests_mock.call_count == 4
+
+
+def test_profile_read_merges_into_cache(requests_mock: rm_module.Mocker) -> None:
+    """A runtime-only read refreshes runtime without discarding program or weather."""
+    full = dict(_thermostat(), weather={"forecasts": [{"temperature": 500}]})
+    runtime_only = {
+        "identifier": full["identifier"],
+        "runtime": dict(full["runtime"], actualTemperature=655),
+        "remoteSensors": full["remoteSensors"],
+        "equipmentStatus": "fan",
+    }
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [
+            {"json": _thermostat_response(full)},
+            {"json": _thermostat_response(runtime_only)},
+        ],
+    )
+
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    assert ecobee.get_thermostats(profile="runtime-only") is True
+
+    selection = _selection(requests_mock.last_request)
+    assert selection["selectionType"] == "registered"
+    assert "includeWeather" not in selection and "includeProgram" not in selection
+    thermostat = ecobee.get_thermostat(0)
+    assert thermostat["runtime"]["actualTemperature"] == 655
+    assert thermostat["weather"]["forecasts"][0]["temperature"] == 500
+    assert thermostat["program"]["currentClimateRef"] == "home"
+
+
+def test_full_read_merges_in_place_and_reports_changes(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    changed = _thermostat()
+    changed["runtime"]["actualTemperature"] = 705
+    changed["equipmentStatus"] = "heatPump,fan"
+    changed["remoteSensors"][1]["capability"][1]["value"] = "false"
+    changed["events"] = [{"type": "hold", "name": "auto", "running": True}]
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [
+            {"json": _thermostat_response(_thermostat(), _thermostat("311000000002", "Upstairs"))},
+            {"json": _thermostat_response(changed)},
+        ],
+    )
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    assert ecobee.last_changes["311000000002"].added
+    cached = ecobee.thermostats[0]
+    runtime = cached["runtime"]
+
+    ecobee.get_thermostats()
+    assert ecobee.thermostats[0] is cached
+    assert cached["runtime"] is runtime
+    assert runtime["actualTemperature"] == 705
+
+    changes = ecobee.last_changes["311000000001"]
+    assert changes.runtime == {"actualTemperature": (701, 705)}
+    assert changes.settings == {}
+    assert changes.equipment_status == ("", "heatPump,fan")
+    assert changes.sensors == {"rs:100": {"occupancy": ("true", "false")}}
+    assert changes.events_added == changed["events"]
+    assert ecobee.last_changes["311000000002"].removed
+
+
+def test_full_read_drops_what_the_api_no_longer_returns(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    full = dict(_thermostat(), weather={"forecasts": []})
+    trimmed = _thermostat()
+    del trimmed["remoteSensors"][1]
+    del trimmed["program"]["climates"][1]
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [{"json": _thermostat_response(full)}, {"json": _thermostat_response(trimmed)}],
+    )
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    assert ecobee.get_remote_sensor(0, "Bedroom")["id"] == "rs:100"
+    assert ecobee.get_climate(0, "Away") is not None
+    cached = ecobee.thermostats[0]
+
+    ecobee.get_thermostats()
+    assert ecobee.thermostats[0] is cached
+    assert "weather" not in cached
+    with pytest.raises(InvalidSensorError):
+        ecobee.get_remote_sensor(0, "Bedroom")
+    assert ecobee.get_climate(0, "Away") is None
+
+
+def test_unknown_profile_raises() -> None:
+    with pytest.raises(ValueError, match="Unknown selection profile"):
+        _make_ecobee().get_thermostats(profile="everything")
+
+
+def test_batch_sends_one_merged_request(requests_mock: rm_module.Mocker) -> None:
+    """Settings patches merge, functions queue in order, and one POST goes out."""
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0}})
+
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    with ecobee.batch(0) as batch:
+        batch.set_hvac_mode("heat")
+        batch.set_humidity(35)
+        batch.set_hvac_mode("cool")
+        batch.set_mic_mode(False)
+        batch.set_hold_temp(76, 68)
+        batch.send_message("hi")
+        assert requests_mock.call_count == 1  # nothing sent inside the block
+
+    assert requests_mock.call_count == 2
+    body = requests_mock.last_request.json()
+    assert body["selection"]["selectionMatch"] == "311000000001"
+    assert body["thermostat"] == {
+        "settings": {"hvacMode": "cool", "humidity": "35"},
+        "audio": {"microphoneEnabled": False},
+    }
+    assert [f["type"] for f in body["functions"]] == ["setHold", "sendMessage"]
+
+
+def test_batch_discarded_on_error(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    with pytest.raises(RuntimeError):
+        with ecobee.batch(0) as batch:
+            batch.set_hvac_mode("off")
+            raise RuntimeError("abort")
+    assert requests_mock.call_count == 1
+    with pytest.raises(AttributeError):
+        ecobee.batch(0).get_thermostats
+
+
+def test_optimistic_writes_patch_cache_until_next_read(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0, "message": ""}})
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    ecobee = _make_ecobee(optimistic=True)
+    ecobee.thermostats = [_thermostat()]
+
+    ecobee.set_hvac_mode("Main Floor", "cool")
+    ecobee.set_hold_temp(0, cool_temp=75, heat_temp=68)
+    thermostat = ecobee.get_thermostat(0)
+    assert thermostat["settings"]["hvacMode"] == "cool"
+    assert thermostat["settings"]["humidity"] == "40"
+    assert thermostat["runtime"]["desiredCool"] == 750
+    assert thermostat["events"][0]["provisional"] is True
+    assert thermostat["events"][0]["heatHoldTemp"] == 680
+    assert ecobee.provisional == {"311000000001": {"settings", "events", "runtime"}}
+
+    ecobee.set_climate_hold(0, "away")
+    assert len(thermostat["events"]) == 1
+    assert thermostat["events"][0]["holdClimateRef"] == "away"
+    ecobee.resume_program(0)
+    assert thermostat["events"] == []
+
+    ecobee.get_thermostats()
+    assert ecobee.provisional == {}
+    assert thermostat["settings"]["hvacMode"] == "heat"
+
+
+def test_writes_leave_cache_alone_by_default(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0, "message": ""}})
+    ecobee = _make_ecobee()
+    ecobee.thermostats = [_thermostat()]
+    ecobee.set_hvac_mode(0, "cool")
+    assert ecobee.thermostats[0]["settings"]["hvacMode"] == "heat"
+
+
+def test_coalesced_writes_go_out_as_one_request(requests_mock: rm_module.Mocker) -> None:
+    """Slider ticks fold into one setHold; settings merge with the last value winning."""
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0, "message": ""}})
+    ecobee = _make_ecobee(coalesce_window=60)
+    ecobee.thermostats = [_thermostat()]
+
+    futures = [
+        ecobee.set_hold_temp(0, cool_temp=76, heat_temp=68),
+        ecobee.set_hvac_mode(0, "cool"),
+        ecobee.set_hold_temp(0, cool_temp=75, heat_temp=68),
+        ecobee.set_hvac_mode(0, "auto"),
+    ]
+    assert requests_mock.call_count == 0
+
+    ecobee.flush_writes()
+    assert requests_mock.call_count == 1
+    body = requests_mock.last_request.json()
+    assert body["thermostat"] == {"settings": {"hvacMode": "auto"}}
+    assert len(body["functions"]) == 1
+    assert body["functions"][0]["params"]["coolHoldTemp"] == 750
+    for future in futures:
+        assert future.result(timeout=0)["status"]["code"] == 0
+
+
+def test_coalesced_hold_drops_superseded_params(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0, "message": ""}})
+    ecobee = _make_ecobee(coalesce_window=60)
+    ecobee.thermostats = [_thermostat()]
+
+    ecobee.set_hold_temp(0, cool_temp=75, heat_temp=68, hold_type="holdHours", hold_hours=2)
+    ecobee.set_climate_hold(0, "away")
+    ecobee.flush_writes()
+
+    params = requests_mock.last_request.json()["functions"][0]["params"]
+    assert params["holdClimateRef"] == "away"
+    assert "coolHoldTemp" not in params and "holdHours" not in params
+
+
+def test_coalesce_window_sends_after_it_elapses(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.post(THERMOSTAT_URL, status_code=500, json={"status": {"code": 7}})
+    ecobee = _make_ecobee(coalesce_window=0.01)
+    ecobee.thermostats = [_thermostat()]
+
+    future = ecobee.set_hvac_mode(0, "cool")
+    with pytest.raises(EcobeeError):
+        future.result(timeout=5)
+    assert requests_mock.call_count == 1
+    assert ecobee._pending_writes == {}
+
+
+def test_unexpected_flush_error_settles_every_future(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.post(THERMOSTAT_URL, exc=RuntimeError("session closed"))
+    ecobee = _make_ecobee(coalesce_window=60)
+    ecobee.thermostats = [_thermostat()]
+
+    futures = [ecobee.set_hvac_mode(0, "cool"), ecobee.set_fan_min_on_time(0, 10)]
+    with pytest.raises(RuntimeError):
+        ecobee.flush_writes()
+    for future in futures:
+        assert isinstance(future.exception(timeout=0), RuntimeError)
+    assert ecobee._pending_writes == {}
+
+
+def test_fleet_write_chunks_selection_match(requests_mock: rm_module.Mocker) -> None:
+    """30 targets go out as two requests of 25 and 5 comma-joined identifiers."""
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0}})
+    identifiers = [f"3110000000{n:02d}" for n in range(30)]
+
+    ecobee = _make_ecobee()
+    ecobee.set_climate_hold_many(identifiers, "away", "holdHours", 2)
+
+    assert requests_mock.call_count == 2
+    first, second = (r.json() for r in requests_mock.request_history)
+    assert first["selection"]["selectionMatch"] == ",".join(identifiers[:25])
+    assert second["selection"]["selectionMatch"] == ",".join(identifiers[25:])
+    assert first["functions"] == [
+        {
+            "type": "setHold",
+            "params": {"holdType": "holdHours", "holdClimateRef": "away", "holdHours": 2},
+        }
+    ]
+
+
+def test_fleet_write_accepts_indexes(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        THERMOSTAT_URL,
+        json=_thermostat_response(_thermostat("311000000001"), _thermostat("311000000002")),
+    )
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0}})
+
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    ecobee.set_hvac_mode_many([0, "311000000002"], "off")
+    body = requests_mock.last_request.json()
+    assert body["selection"]["selectionMatch"] == "311000000001,311000000002"
+    assert body["thermostat"] == {"settings": {"hvacMode": "off"}}
+
+
+def test_lookups_by_identifier_and_name_survive_reordering(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [
+            {"json": _thermostat_response(_thermostat(), _thermostat("311000000002", "Upstairs"))},
+            {"json": _thermostat_response(_thermostat("311000000002", "Upstairs"), _thermostat())},
+        ],
+    )
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    assert ecobee.get_thermostat("Upstairs")["identifier"] == "311000000002"
+    ecobee.get_thermostats()
+    assert ecobee.get_thermostat("311000000002")["name"] == "Upstairs"
+    assert ecobee.get_thermostat("Upstairs") is ecobee.thermostats[0]
+    assert ecobee.get_remote_sensor("Main Floor", "rs:100")["name"] == "Bedroom"
+    assert ecobee.get_remote_sensor(1, "Bedroom")["id"] == "rs:100"
+    assert ecobee.get_climate("Main Floor", "away")["name"] == "Away"
+    assert ecobee.get_climate("Main Floor", "Home")["climateRef"] == "home"
+    with pytest.raises(InvalidThermostatError):
+        ecobee.get_thermostat("Garage")
+    with pytest.raises(InvalidSensorError):
+        ecobee.get_remote_sensor(0, "Garage")
+
+
+def test_update_climate_sensors_by_name(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.post(THERMOSTAT_URL, json={"status": {"code": 0}})
+    ecobee = _make_ecobee()
+    ecobee.thermostats = [_thermostat()]
+    ecobee.update_climate_sensors("Main Floor", "Away", sensor_names=["Bedroom"])
+    program = requests_mock.last_request.json()["thermostat"]["program"]
+    assert program["climates"][1]["sensors"] == [{"id": "rs:100:1", "name": "Bedroom"}]
+    assert "currentClimateRef" not in program
+
+
+def test_max_age_fetches_only_stale_sections(requests_mock: rm_module.Mocker) -> None:
+    first, second = _thermostat(), _thermostat("311000000002", "Upstairs")
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [
+            {"json": _thermostat_response(first, second)},
+            {"json": _thermostat_response(
+                {"identifier": "311000000001", "remoteSensors": first["remoteSensors"]}
+            )},
+        ],
+    )
+    ecobee = _make_ecobee()
+    ecobee.get_thermostats()
+    assert ecobee.get_thermostat(0, max_age=60)["name"] == "Main Floor"
+    assert requests_mock.call_count == 1
+    assert ecobee.section_age(0, "includeRuntime") < 60
+
+    # Age the sensors past their TTL; everything else is still fresh.
+    ecobee.fetched_at["311000000001"]["includeSensors"] -= 3600
+    ecobee.get_remote_sensors("Main Floor", max_age=ecobee.section_ttls)
+    assert requests_mock.call_count == 2
+    selection = _selection(requests_mock.last_request)
+    assert selection["selectionMatch"] == "311000000001"
+    assert "includeSensors" in selection
+    assert "includeRuntime" not in selection
+    assert ecobee.section_age(0, "includeSensors") < 60
+
+
+def test_concurrent_stale_reads_coalesce(requests_mock: rm_module.Mocker) -> None:
+    def slow_response(request, context):
+        time.sleep(0.2)
+        return _thermostat_response(_thermostat())
+
+    requests_mock.get(THERMOSTAT_URL, json=slow_response)
+    ecobee = _make_ecobee()
+    ecobee.thermostats = [_thermostat()]
+    threads = [
+        threading.Thread(target=ecobee.get_thermostat, args=(0,), kwargs={"max_age": 60})
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert requests_mock.call_count == 1
+
+
+def test_concurrent_expiry_refreshes_once(requests_mock: rm_module.Mocker) -> None:
+    """Threads whose requests expire together share one refresh, then retry."""
+
+    callers = 5
+
+    def thermostat_callback(request, context):
+        if request.headers["Authorization"] == "Bearer AT-1":
+            context.status_code = 500
+            return {"status": {"code": 14, "message": "expired"}}
+        return _thermostat_response(_thermostat())
+
+    def token_callback(request, context):
+        time.sleep(0.3)  # long enough for every thread to be rejected meanwhile
+        return {"access_token": "AT-2", "refresh_token": "RT-2", "expires_in": 3600}
+
+    requests_mock.get(THERMOSTAT_URL, json=thermostat_callback)
+    requests_mock.post("https://auth.ecobee.com/oauth/token", json=token_callback)
+
+    ecobee = _make_ecobee()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(ecobee.get_thermostats()))
+        for _ in range(callers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * callers
+    token_calls = [c for c in requests_mock.request_history if c.method == "POST"]
+    assert len(token_calls) == 1
+
+
+def test_request_parses_response_once_without_debug_logging(
+    requests_mock: rm_module.Mocker, monkeypatch, caplog
+) -> None:
+    """Without DEBUG enabled, a read decodes its JSON once and logs nothing."""
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    parses = []
+    original_json = requests.Response.json
+
+    def counting_json(self, **kwargs):
+        parses.append(True)
+        return original_json(self, **kwargs)
+
+    monkeypatch.setattr(requests.Response, "json", counting_json)
+    caplog.set_level("INFO", logger="pyecobee")
+
+    assert _make_ecobee().get_thermostats() is True
+    assert len(parses) == 1
+    assert caplog.records == []
+
+
+def test_debug_logging_redacts_bearer_token(
+    requests_mock: rm_module.Mocker, caplog
+) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    caplog.set_level("DEBUG", logger="pyecobee")
+
+    _make_ecobee().get_thermostats()
+    assert "Making request to thermostat endpoint" in caplog.text
+    assert "Bearer <redacted>" in caplog.text
+    assert "AT-1" not in caplog.text
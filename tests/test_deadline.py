@@ -0,0 +1,82 @@
+"""Tests for connect/read timeouts and per-operation deadlines."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+
+import pytest
+import requests_mock as rm_module
+from aioresponses import aioresponses
+
+from pyecobee import Ecobee
+from pyecobee.aio import AsyncEcobee
+from pyecobee.const import ECOBEE_ACCESS_TOKEN, ECOBEE_REFRESH_TOKEN
+from pyecobee.deadline import deadline, remaining
+from pyecobee.errors import EcobeeDeadlineError
+from pyecobee.scheduler import RequestScheduler
+
+
+THERMOSTAT_URL = "https://api.ecobee.com/1/thermostat"
+THERMOSTAT_PATTERN = re.compile(r"^https://api\.ecobee\.com/1/thermostat.*$")
+CONFIG = {ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+THERMOSTATS = {
+    "thermostatList": [{"identifier": "311000000001", "name": "Main Floor"}],
+    "status": {"code": 0, "message": ""},
+}
+
+
+def test_nested_deadlines_keep_the_earliest() -> None:
+    assert remaining() is None
+    with deadline(1):
+        with deadline(60):
+            assert remaining() <= 1
+        with deadline(0.5):
+            assert remaining() <= 0.5
+    assert remaining() is None
+
+
+def test_timeouts_shrink_to_the_deadline(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=THERMOSTATS)
+    ecobee = Ecobee(config=CONFIG, timeout=30, connect_timeout=5)
+
+    ecobee.get_thermostats()
+    assert requests_mock.last_request.timeout == (5, 30)
+
+    ecobee.get_thermostats(deadline=2)
+    connect, read = requests_mock.last_request.timeout
+    assert connect <= 2 and read <= 2
+
+
+def test_expired_deadline_sends_nothing(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=THERMOSTATS)
+    ecobee = Ecobee(config=CONFIG)
+    with deadline(0):
+        with pytest.raises(EcobeeDeadlineError):
+            ecobee.get_thermostats()
+    assert requests_mock.call_count == 0
+
+
+def test_deadline_covers_retries(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, status_code=503, json={})
+    ecobee = Ecobee(config=CONFIG, scheduler=RequestScheduler(retries=10, backoff=0.1))
+
+    started = time.monotonic()
+    with pytest.raises(EcobeeDeadlineError):
+        ecobee.get_thermostats(deadline=0.3)
+    assert time.monotonic() - started < 1
+
+
+def test_async_deadline_covers_budget_waits() -> None:
+    async def run() -> None:
+        with aioresponses() as mocked:
+            mocked.get(THERMOSTAT_PATTERN, payload=THERMOSTATS, repeat=True)
+            scheduler = RequestScheduler(account_rate=0.1, account_burst=1)
+            async with AsyncEcobee(config=CONFIG, scheduler=scheduler) as ecobee:
+                assert await ecobee.get_thermostats(deadline=5) is True
+                # The next token is 10 s away; fail now rather than wait.
+                with pytest.raises(EcobeeDeadlineError):
+                    await ecobee.get_thermostats(deadline=1)
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+"""Tests for running many accounts through one EcobeeFleet."""
+
+from __future__ import annotations
+
+import pytest
+import requests_mock as rm_module
+
+from pyecobee.const import ECOBEE_ACCESS_TOKEN, ECOBEE_REFRESH_TOKEN
+from pyecobee.errors import InvalidTokenError
+from pyecobee.fleet import EcobeeFleet
+
+
+THERMOSTAT_URL = "https://api.ecobee.com/1/thermostat"
+
+
+def _config(token: str) -> dict:
+    return {ECOBEE_ACCESS_TOKEN: token, ECOBEE_REFRESH_TOKEN: f"RT-{token}"}
+
+
+def _respond(request, context) -> dict:
+    token = request.headers["Authorization"].split()[-1]
+    if token == "revoked":
+        context.status_code = 500
+        return {"status": {"code": 16, "message": "Invalid token"}}
+    return {
+        "thermostatList": [{"identifier": f"id-{token}", "name": token}],
+        "status": {"code": 0, "message": ""},
+    }
+
+
+class _FakeTime:
+    """A clock that only moves when slept on, recording each sleep."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_update_collects_results_and_errors_per_account(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=_respond)
+    configs = {name: _config(name) for name in ("north", "south", "revoked")}
+
+    with EcobeeFleet(configs, max_workers=2) as fleet:
+        assert fleet["north"]._session is fleet["south"]._session
+        assert fleet["north"].scheduler is fleet.scheduler
+        result = fleet.update()
+
+        assert list(result) == ["north", "south", "revoked"]
+        assert result.succeeded == ["north", "south"]
+        assert result.failed == ["revoked"]
+        assert isinstance(result.errors["revoked"], InvalidTokenError)
+        assert fleet["south"].thermostats[0]["identifier"] == "id-south"
+
+
+def test_run_spreads_starts_and_takes_callables(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=_respond)
+    configs = {name: _config(name) for name in ("a", "b", "c", "d")}
+
+    fake = _FakeTime()
+
+    with EcobeeFleet(configs, clock=fake.clock, sleep=fake.sleep) as fleet:
+        result = fleet.run(lambda client, suffix: client.access_token + suffix, "!", spread=0.2)
+        # Four starts spaced over 0.2 s: one at once, then one every 0.05 s.
+        assert fake.sleeps == pytest.approx([0.05, 0.05, 0.05])
+        assert {name: r.value for name, r in result.items()} == {
+            "a": "a!",
+            "b": "b!",
+            "c": "c!",
+            "d": "d!",
+        }
+
+        result = fleet.run("get_thermostats", names=["b"])
+        assert list(result) == ["b"] and result["b"].ok
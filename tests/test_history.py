@@ -0,0 +1,83 @@
+"""Tests for the NumPy-backed RuntimeHistory."""
+
+from __future__ import annotations
+
+import json
+import math
+from datetime import date, datetime
+
+import pytest
+import requests_mock as rm_module
+
+np = pytest.importorskip("numpy")
+
+from pyecobee.history import RUNTIME_MISSING, TEMPERATURE_MISSING, RuntimeHistory
+from pyecobee.runtime_report import RuntimeReportParser, collect
+
+from .test_runtime_report import REPORT_URL, _make_ecobee, _report
+
+
+def _history() -> RuntimeHistory:
+    rows = []
+    for hour in (0, 1):
+        for minute in range(0, 60, 5):
+            heat = "300" if hour == 0 else "150"
+            rows.append(f"2026-01-01,{hour:02d}:{minute:02d}:00,70.{minute // 5 % 10},heat,{heat}")
+    rows[-1] = "2026-01-01,01:55:00,,,"
+    body = {
+        "columns": "zoneAveTemp,hvacMode,compHeat1",
+        "reportList": [{"thermostatIdentifier": "311000000001", "rowList": rows}],
+    }
+    parser = RuntimeReportParser()
+    report = collect(parser.feed(json.dumps(body).encode(), final=True))["311000000001"]
+    return RuntimeHistory.from_report(report)
+
+
+def test_columns_are_typed() -> None:
+    history = _history()
+    assert len(history) == 24
+    assert history.timestamps.dtype == np.dtype("datetime64[s]")
+    assert history["zoneAveTemp"].dtype == np.int16
+    assert history["zoneAveTemp"][1] == 701
+    assert history["zoneAveTemp"][-1] == TEMPERATURE_MISSING
+    assert history["compHeat1"].dtype == np.uint16
+    assert history["compHeat1"][0] == 300
+    assert history["compHeat1"][-1] == RUNTIME_MISSING
+    assert history["hvacMode"][0] == "heat"
+
+
+def test_between_slices_views() -> None:
+    history = _history()
+    hour = history.between(datetime(2026, 1, 1, 1), datetime(2026, 1, 1, 2))
+    assert len(hour) == 12
+    assert hour["compHeat1"].base is not None
+    assert math.isnan(hour.values("zoneAveTemp")[-1])
+
+
+def test_resample_and_duty_cycle() -> None:
+    history = _history()
+    hourly = history.resample("hour", "sum", ["compHeat1"])
+    assert list(hourly.timestamps.astype(str)) == ["2026-01-01T00", "2026-01-01T01"]
+    assert list(hourly.columns["compHeat1"]) == [3600.0, 1650.0]
+    means = history.resample("day")
+    assert "hvacMode" not in means.columns
+    assert means.columns["zoneAveTemp"][0] == pytest.approx(np.nanmean(history.values("zoneAveTemp")))
+
+    assert history.duty_cycle()["compHeat1"] == pytest.approx((3600 + 1650) / (23 * 300))
+    per_hour = history.duty_cycle(freq="hour")
+    assert list(per_hour.columns["compHeat1"]) == [1.0, 0.5]
+
+
+def test_history_with_sensors_keeps_runtime_columns(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(REPORT_URL, json=_report())
+    history = _make_ecobee().get_runtime_history(
+        "311000000001", date(2026, 1, 1), date(2026, 1, 1), include_sensors=True
+    )["311000000001"]
+
+    assert set(history.columns) == {"zoneAveTemp", "hvacMode", "compHeat1", "rs:100:1"}
+    assert history["zoneAveTemp"].dtype == np.int16
+    assert history["compHeat1"].dtype == np.uint16
+    # The sensor is a temperature sensor, so it is stored as tenths too.
+    assert history["rs:100:1"].dtype == np.int16
+    assert list(history["rs:100:1"]) == [688, TEMPERATURE_MISSING]
+    assert len(history) == 2
@@ -0,0 +1,148 @@
+"""Tests for the on-disk runtime history cache."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests_mock as rm_module
+
+np = pytest.importorskip("numpy")
+
+from pyecobee.history import TEMPERATURE_MISSING
+from pyecobee.history_cache import HistoryCache
+
+from .test_client import API_BASE, _make_ecobee
+
+REPORT_URL = f"{API_BASE}/runtimeReport"
+
+
+def _report(*rows: str) -> dict:
+    return {
+        "columns": "zoneAveTemp,hvacMode,compHeat1",
+        "reportList": [{"thermostatIdentifier": "311000000001", "rowList": list(rows)}],
+        "status": {"code": 0, "message": ""},
+    }
+
+
+def _window(request) -> tuple:
+    body = json.loads(parse_qs(urlparse(request.url).query)["body"][0])
+    return body["startDate"], body["endDate"]
+
+
+def test_sync_appends_only_new_intervals(tmp_path, requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        REPORT_URL,
+        [
+            {"json": _report(
+                "2026-01-01,23:55:00,70.0,heat,300",
+                "2026-01-02,00:00:00,70.5,heat,150",
+                "2026-01-02,00:05:00,,,",
+            )},
+            {"json": _report(
+                "2026-01-01,23:55:00,70.0,heat,300",
+                "2026-01-02,00:00:00,70.5,heat,150",
+                "2026-01-02,00:05:00,71.0,cool,0",
+            )},
+        ],
+    )
+    ecobee = _make_ecobee()
+    cache = HistoryCache(str(tmp_path))
+
+    assert cache.sync(ecobee, "311000000001", date(2026, 1, 2), start_date=date(2026, 1, 1)) == {
+        "311000000001": 2
+    }
+    # The trailing interval with no data yet is left for the next sync.
+    assert cache.last_interval("311000000001") == datetime(2026, 1, 2, 0, 0)
+
+    assert cache.sync(ecobee, "311000000001", date(2026, 1, 2)) == {"311000000001": 1}
+    assert _window(requests_mock.last_request) == ("2026-01-01", "2026-01-02")
+
+    history = cache.load("311000000001")
+    assert isinstance(history["zoneAveTemp"], np.memmap)
+    assert list(history["zoneAveTemp"]) == [700, 705, 710]
+    assert list(history["compHeat1"]) == [300, 150, 0]
+    assert list(history["hvacMode"]) == ["heat", "heat", "cool"]
+    assert str(history.timestamps[-1]) == "2026-01-02T00:05:00"
+
+
+def test_uncommitted_tail_is_discarded(tmp_path, requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(REPORT_URL, json=_report("2026-01-01,00:00:00,70.0,heat,300"))
+    cache = HistoryCache(str(tmp_path))
+    cache.sync(_make_ecobee(), "311000000001", date(2026, 1, 1), start_date=date(2026, 1, 1))
+    # Simulate a crash after appending to a column but before meta.json was replaced.
+    with open(tmp_path / "311000000001" / "zoneAveTemp.col", "ab") as fdesc:
+        fdesc.write(b"\xff\xff")
+    assert list(cache.load("311000000001")["zoneAveTemp"]) == [700]
+
+    requests_mock.get(REPORT_URL, json=_report("2026-01-01,00:05:00,71.0,heat,300"))
+    cache.sync(_make_ecobee(), "311000000001", date(2026, 1, 1))
+    assert list(cache.load("311000000001")["zoneAveTemp"]) == [700, 710]
+
+
+def test_sync_without_history_needs_start_date(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        HistoryCache(str(tmp_path)).sync(_make_ecobee(), "311000000001", date(2026, 1, 1))
+
+
+def test_offline_thermostat_backfill_is_cached(
+    tmp_path, requests_mock: rm_module.Mocker
+) -> None:
+    requests_mock.get(
+        REPORT_URL,
+        [
+            {"json": _report("2026-01-01,00:00:00,70.0,heat,300")},
+            {"json": _report()},
+            {"json": _report()},
+            # Back online, the thermostat uploads what it buffered.
+            {"json": _report("2026-01-16,00:00:00,69.0,heat,300")},
+        ],
+    )
+    cache = HistoryCache(str(tmp_path), backfill_days=7)
+    ecobee = _make_ecobee()
+
+    cache.sync(ecobee, "311000000001", date(2026, 1, 1), start_date=date(2026, 1, 1))
+    assert cache.sync(ecobee, "311000000001", date(2026, 1, 10)) == {"311000000001": 0}
+    assert _window(requests_mock.last_request) == ("2025-12-31", "2026-01-10")
+    # Offline syncs look back a fixed window, not at everything since the last data.
+    cache.sync(ecobee, "311000000001", date(2026, 1, 20))
+    assert _window(requests_mock.last_request) == ("2026-01-03", "2026-01-20")
+
+    appended = cache.sync(ecobee, "311000000001", date(2026, 1, 21))
+    assert _window(requests_mock.last_request) == ("2026-01-13", "2026-01-21")
+    history = cache.load("311000000001")
+    # The days never fetched are cached as gaps, keeping the timeline even.
+    assert appended == {"311000000001": len(history) - 1}
+    assert np.all(np.diff(history.timestamps.astype("int64")) == 300)
+    assert list(history["zoneAveTemp"][[0, 1, -1]]) == [700, TEMPERATURE_MISSING, 690]
+    assert history["hvacMode"][1] is None
+
+
+def test_sync_awaits_async_clients(tmp_path) -> None:
+    pytest.importorskip("aiohttp")
+    from aioresponses import aioresponses
+
+    from pyecobee.aio import AsyncEcobee
+    from pyecobee.const import ECOBEE_ACCESS_TOKEN, ECOBEE_REFRESH_TOKEN
+
+    cache = HistoryCache(str(tmp_path))
+
+    async def run() -> dict:
+        with aioresponses() as mocked:
+            mocked.get(
+                re.compile(r"^https://api\.ecobee\.com/1/runtimeReport.*$"),
+                payload=_report("2026-01-01,00:00:00,70.0,heat,300"),
+            )
+            async with AsyncEcobee(
+                config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}
+            ) as ecobee:
+                return await cache.sync(
+                    ecobee, "311000000001", date(2026, 1, 1), start_date=date(2026, 1, 1)
+                )
+
+    assert asyncio.run(run()) == {"311000000001": 1}
+    assert list(cache.load("311000000001")["zoneAveTemp"]) == [700]
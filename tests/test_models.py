@@ -0,0 +1,81 @@
+"""Tests for the slotted thermostat models."""
+
+from __future__ import annotations
+
+import copy
+import sys
+import tracemalloc
+
+import pytest
+
+from pyecobee.models import _UNSET, RemoteSensor, Runtime, Thermostat
+
+from .test_client import _make_ecobee, _thermostat
+
+
+def test_sections_decode_lazily_and_share_raw() -> None:
+    raw = _thermostat()
+    thermostat = Thermostat(raw)
+    assert thermostat._runtime is _UNSET
+    assert thermostat.runtime is thermostat.runtime
+    assert thermostat.runtime.desired_heat == 690
+    assert thermostat.runtime.raw is raw["runtime"]
+    assert [climate.climate_ref for climate in thermostat.climates] == ["home", "away"]
+    bedroom = thermostat.remote_sensors[1]
+    assert bedroom.occupied is True
+    assert bedroom.capability("temperature").value == "688"
+    assert thermostat.hvac_mode == "heat"
+    assert thermostat.equipment_status == ()
+    assert thermostat.weather is None
+
+
+def test_models_are_slotted_and_intern_enum_values() -> None:
+    sensor = RemoteSensor({"id": "rs:1", "name": "Den", "type": "".join(["ecobee3_", "remote_sensor"])})
+    with pytest.raises(AttributeError):
+        sensor.extra = 1
+    assert sensor.type is sys.intern("ecobee3_remote_sensor")
+    assert sensor.raw["type"] is sensor.type
+
+
+def test_client_caches_model_until_next_fetch() -> None:
+    ecobee = _make_ecobee()
+    ecobee.thermostats = [_thermostat()]
+    model = ecobee.get_thermostat_model("Main Floor")
+    assert ecobee.get_thermostat_model(0) is model
+    assert model.raw is ecobee.get_thermostat(0)
+    ecobee.thermostats = [_thermostat()]
+    assert ecobee.get_thermostat_model(0) is not model
+
+
+def test_model_follows_merges_without_rebuilding() -> None:
+    ecobee = _make_ecobee()
+    ecobee.thermostats = [_thermostat()]
+    model = ecobee.get_thermostat_model(0)
+    runtime, sensors = model.runtime, model.remote_sensors
+    update = _thermostat()
+    update["runtime"]["desiredHeat"] = 700
+    update["remoteSensors"] = update["remoteSensors"][:1]
+    ecobee._merge_thermostats({"thermostatList": [update]}, ("includeRuntime", "includeSensors"))
+
+    assert ecobee.get_thermostat_model(0) is model
+    # The runtime dict is merged in place; the sensor list is replaced.
+    assert model.runtime is runtime and runtime.desired_heat == 700
+    assert model.remote_sensors is not sensors and len(model.remote_sensors) == 1
+
+
+def test_models_hold_no_copies_of_the_cached_data() -> None:
+    assert all(cls.__slots__ == () for cls in (RemoteSensor, Runtime))
+    raws = []
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        raws = [copy.deepcopy(_thermostat()) for _ in range(200)]
+        cached = tracemalloc.get_traced_memory()[0] - before
+        models = [Thermostat(raw) for raw in raws]
+        for model in models:
+            model.runtime, model.remote_sensors, model.climates, model.events, model.weather
+        views = tracemalloc.get_traced_memory()[0] - before - cached
+    finally:
+        tracemalloc.stop()
+    # Fully decoded views cost a small fraction of the dicts they wrap.
+    assert views < cached / 3
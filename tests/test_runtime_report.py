@@ -0,0 +1,144 @@
+"""Tests for runtimeReport windowing and streaming parsing."""
+
+from __future__ import annotations
+
+import json
+import math
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests_mock as rm_module
+
+from pyecobee.errors import EcobeeError
+from pyecobee.runtime_report import RuntimeReportParser, collect, report_windows
+
+from .test_client import API_BASE, _make_ecobee
+
+REPORT_URL = f"{API_BASE}/runtimeReport"
+
+
+def _report(identifier: str = "311000000001", day: str = "2026-01-01") -> dict:
+    return {
+        "startDate": day,
+        "startInterval": 0,
+        "endDate": day,
+        "endInterval": 287,
+        "columns": "zoneAveTemp,hvacMode,compHeat1",
+        "reportList": [
+            {
+                "thermostatIdentifier": identifier,
+                "rowCount": 2,
+                "rowList": [
+                    f"{day},00:00:00,70.1,heat,300",
+                    f"{day},00:05:00,,,",
+                ],
+            }
+        ],
+        "sensorList": [
+            {
+                "thermostatIdentifier": identifier,
+                "sensors": [
+                    {"sensorId": "rs:100:1", "sensorName": 'Bedroom "A"', "sensorType": "temperature"},
+                ],
+                "columns": ["date", "time", "rs:100:1"],
+                "data": [f"{day},00:00:00,68.8"],
+            }
+        ],
+        "status": {"code": 0, "message": ""},
+    }
+
+
+def test_report_windows_split_into_31_days() -> None:
+    assert list(report_windows(date(2026, 1, 1), date(2026, 3, 5))) == [
+        (date(2026, 1, 1), date(2026, 1, 31)),
+        (date(2026, 2, 1), date(2026, 3, 3)),
+        (date(2026, 3, 4), date(2026, 3, 5)),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_parser_is_independent_of_chunk_boundaries(chunk_size: int) -> None:
+    body = json.dumps(_report(), indent=1).encode()
+    parser = RuntimeReportParser()
+    rows = []
+    for start in range(0, len(body), chunk_size):
+        rows.extend(parser.feed(body[start:start + chunk_size]))
+    rows.extend(parser.close())
+
+    runtime, empty, sensor = rows
+    assert runtime.kind == "runtime" and runtime.identifier == "311000000001"
+    assert runtime.timestamp == datetime(2026, 1, 1, 0, 0)
+    assert runtime.columns == ("zoneAveTemp", "hvacMode", "compHeat1")
+    assert runtime.values == (70.1, "heat", 300.0)
+    assert empty.values == (None, None, None)
+    assert sensor.kind == "sensor" and sensor.columns == ("rs:100:1",)
+    assert sensor.values == (68.8,)
+    assert parser.sensors["311000000001"][0]["sensorName"] == 'Bedroom "A"'
+
+
+def test_collect_builds_typed_columns() -> None:
+    parser = RuntimeReportParser()
+    report = collect(parser.feed(json.dumps(_report()).encode(), final=True))["311000000001"]
+    assert len(report) == 2
+    assert report.columns["zoneAveTemp"].typecode == "d"
+    assert report.columns["zoneAveTemp"][0] == 70.1
+    assert math.isnan(report.columns["zoneAveTemp"][1])
+    assert report.columns["hvacMode"] == ["heat", None]
+    assert list(report.sensor_columns["rs:100:1"]) == [68.8]
+
+
+def test_sensor_change_mid_range_keeps_columns_aligned() -> None:
+    def sensors(day: str, *sensor_ids: str) -> dict:
+        body = _report(day=day)
+        body["sensorList"][0]["columns"] = ["date", "time", *sensor_ids]
+        body["sensorList"][0]["data"] = [
+            f"{day},00:00:00," + ",".join(str(60 + n) for n in range(len(sensor_ids)))
+        ]
+        return body
+
+    rows = []
+    # rs:100 is paired on the second day and rs:200 removed on the third.
+    for body in (
+        sensors("2026-01-01", "rs:200"),
+        sensors("2026-01-02", "rs:100", "rs:200"),
+        sensors("2026-01-03", "rs:100"),
+    ):
+        rows.extend(RuntimeReportParser().feed(json.dumps(body).encode(), final=True))
+    report = collect(rows)["311000000001"]
+
+    assert len(report.sensor_timestamps) == 3
+    assert all(len(column) == 3 for column in report.sensor_columns.values())
+    added, removed = report.sensor_columns["rs:100"], report.sensor_columns["rs:200"]
+    assert math.isnan(added[0]) and list(added[1:]) == [60.0, 60.0]
+    assert list(removed[:2]) == [60.0, 61.0] and math.isnan(removed[2])
+
+
+def test_client_requests_each_window_and_streams(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        REPORT_URL,
+        [
+            {"json": _report(day="2026-01-01")},
+            {"json": _report(day="2026-02-01")},
+        ],
+    )
+    ecobee = _make_ecobee()
+    reports = ecobee.get_runtime_report("311000000001", date(2026, 1, 1), date(2026, 2, 10))
+
+    bodies = [
+        json.loads(parse_qs(urlparse(request.url).query)["body"][0])
+        for request in requests_mock.request_history
+    ]
+    assert [(b["startDate"], b["endDate"]) for b in bodies] == [
+        ("2026-01-01", "2026-01-31"),
+        ("2026-02-01", "2026-02-10"),
+    ]
+    assert bodies[0]["selection"]["selectionMatch"] == "311000000001"
+    assert bodies[0]["columns"].startswith("zoneAveTemp,")
+    assert reports["311000000001"].timestamps[-1] == datetime(2026, 2, 1, 0, 5)
+
+
+def test_failed_window_raises(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(REPORT_URL, status_code=500, json={"status": {"code": 7, "message": "bad"}})
+    with pytest.raises(EcobeeError):
+        list(_make_ecobee().iter_runtime_report("311000000001", date(2026, 1, 1), date(2026, 1, 2)))
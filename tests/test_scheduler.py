@@ -0,0 +1,167 @@
+"""Tests for request budgets, retries and write priority."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import requests
+import requests_mock as rm_module
+
+from pyecobee import Ecobee
+from pyecobee.const import ECOBEE_ACCESS_TOKEN, ECOBEE_REFRESH_TOKEN
+from pyecobee.scheduler import POLL, WRITE, RequestScheduler, retry_after
+
+
+THERMOSTAT_URL = "https://api.ecobee.com/1/thermostat"
+THERMOSTATS = {
+    "thermostatList": [{"identifier": "311000000001", "name": "Main Floor"}],
+    "status": {"code": 0, "message": ""},
+}
+
+
+def _make_ecobee(scheduler: RequestScheduler) -> Ecobee:
+    return Ecobee(
+        config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"},
+        scheduler=scheduler,
+    )
+
+
+class _FakeTime:
+    """A clock that only moves when slept on, recording each sleep."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_bucket_allows_burst_then_paces() -> None:
+    fake = _FakeTime()
+    scheduler = RequestScheduler(
+        account_rate=4, account_burst=2, clock=fake.clock, sleep=fake.sleep
+    )
+    bucket = scheduler.account_bucket()
+    waits = [scheduler.acquire([bucket]) for _ in range(4)]
+    # Two go out at once, the other two wait 1/4 s each.
+    assert fake.sleeps == [0.25, 0.25]
+    assert waits == [0, 0, 0.25, 0.25]
+    stats = scheduler.stats()
+    assert stats.requests == 4
+    assert stats.queued_polls == stats.queued_writes == 0
+    assert stats.max_wait == 0.25
+
+
+def test_key_bucket_is_shared_per_api_key() -> None:
+    scheduler = RequestScheduler()
+    assert scheduler.key_bucket("key-1") is scheduler.key_bucket("key-1")
+    assert scheduler.key_bucket("key-1") is not scheduler.key_bucket("key-2")
+    assert scheduler.account_bucket() is not scheduler.account_bucket()
+
+
+def test_writes_go_ahead_of_waiting_polls() -> None:
+    scheduler = RequestScheduler(account_rate=10, account_burst=1)
+    bucket = scheduler.account_bucket()
+    scheduler.acquire([bucket])
+    order = []
+
+    def run(priority: int, name: str) -> None:
+        scheduler.acquire([bucket], priority)
+        order.append(name)
+
+    poll = threading.Thread(target=run, args=(POLL, "poll"))
+    write = threading.Thread(target=run, args=(WRITE, "write"))
+    poll.start()
+    time.sleep(0.02)
+    write.start()
+    poll.join(5)
+    write.join(5)
+    assert order == ["write", "poll"]
+
+
+def test_retry_delay_backs_off_and_honors_retry_after() -> None:
+    scheduler = RequestScheduler(retries=2, backoff=1.0)
+    bucket = scheduler.account_bucket()
+    assert 0 <= scheduler.retry_delay(0) <= 1.0
+    assert 0 <= scheduler.retry_delay(1) <= 2.0
+    assert scheduler.retry_delay(2) is None
+
+    assert scheduler.retry_delay(0, retry_after=5, buckets=[bucket]) >= 5
+    assert bucket.delay(time.monotonic()) > 4
+    assert scheduler.stats().retries == 3
+
+
+def test_retry_after_parses_seconds_and_dates() -> None:
+    assert retry_after("7") == 7
+    assert retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480) == 10
+    assert retry_after(None) is None
+    assert retry_after("soon") is None
+
+
+def test_throttled_read_is_retried(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [
+            {"status_code": 429, "headers": {"Retry-After": "0"}, "json": {}},
+            {"exc": requests.exceptions.ConnectTimeout},
+            {"json": THERMOSTATS},
+        ],
+    )
+    scheduler = RequestScheduler(backoff=0.001)
+    ecobee = _make_ecobee(scheduler)
+    assert ecobee.get_thermostats() is True
+    assert requests_mock.call_count == 3
+    assert scheduler.stats().retries == 2
+
+
+def test_retry_backoff_uses_the_scheduler_clock(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [{"status_code": 429, "headers": {"Retry-After": "3"}, "json": {}}, {"json": THERMOSTATS}],
+    )
+    fake = _FakeTime()
+    scheduler = RequestScheduler(backoff=0.001, clock=fake.clock, sleep=fake.sleep)
+    assert _make_ecobee(scheduler).get_thermostats() is True
+    # The Retry-After is slept out once; the buckets it blocked are free by then.
+    assert fake.sleeps == [3]
+    stats = scheduler.stats()
+    assert stats.backoff_wait == 3 and stats.total_wait == 3
+
+
+def test_gives_up_after_retries(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, status_code=503, json={})
+    ecobee = _make_ecobee(RequestScheduler(retries=2, backoff=0.001))
+    assert ecobee.get_thermostats() is False
+    assert requests_mock.call_count == 3
+
+
+def test_write_is_not_resent_after_read_timeout(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=THERMOSTATS)
+    requests_mock.post(THERMOSTAT_URL, exc=requests.exceptions.ReadTimeout)
+    ecobee = _make_ecobee(RequestScheduler(backoff=0.001))
+    ecobee.get_thermostats()
+    ecobee.send_message(0, "hello")
+    assert [r.method for r in requests_mock.request_history] == ["GET", "POST"]
+
+
+def test_write_is_retried_when_never_sent(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(THERMOSTAT_URL, json=THERMOSTATS)
+    requests_mock.post(
+        THERMOSTAT_URL,
+        [
+            {"exc": requests.exceptions.ConnectTimeout},
+            {"status_code": 503, "json": {}},
+            {"json": {"status": {"code": 0}}},
+        ],
+    )
+    ecobee = _make_ecobee(RequestScheduler(backoff=0.001))
+    ecobee.get_thermostats()
+    ecobee.resume_program(0)
+    # The 503 came without a Retry-After, so the write may have been applied.
+    assert [r.method for r in requests_mock.request_history] == ["GET", "POST", "POST"]
@@ -0,0 +1,152 @@
+"""Tests for the file token store shared between processes."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+import requests_mock as rm_module
+
+from pyecobee import Ecobee
+from pyecobee.const import (
+    ECOBEE_ACCESS_TOKEN,
+    ECOBEE_API_KEY,
+    ECOBEE_REFRESH_TOKEN,
+)
+from pyecobee.token_store import FileTokenStore, TokenStore
+
+
+TOKEN_URL = "https://auth.ecobee.com/oauth/token"
+THERMOSTAT_URL = "https://api.ecobee.com/1/thermostat"
+
+
+def _write_conf(path, access_token: str = "AT-1") -> None:
+    path.write_text(
+        json.dumps(
+            {
+                ECOBEE_API_KEY: None,
+                ECOBEE_ACCESS_TOKEN: access_token,
+                ECOBEE_REFRESH_TOKEN: "RT-1",
+            }
+        )
+    )
+
+
+def test_save_is_atomic_and_leaves_no_temp_files(tmp_path) -> None:
+    conf = tmp_path / "ecobee.conf"
+    store = FileTokenStore(str(conf))
+    assert store.save({ECOBEE_ACCESS_TOKEN: "AT-1"}) is True
+    assert store.load() == {ECOBEE_ACCESS_TOKEN: "AT-1"}
+    assert os.listdir(tmp_path) == ["ecobee.conf"]
+    assert store.changed() is False
+
+    FileTokenStore(str(conf)).save({ECOBEE_ACCESS_TOKEN: "AT-2"})
+    assert store.changed() is True
+
+
+def test_second_client_reuses_token_refreshed_by_first(
+    requests_mock: rm_module.Mocker, tmp_path
+) -> None:
+    """Two clients on one config file (as two processes would be) refresh once."""
+    conf = tmp_path / "ecobee.conf"
+    _write_conf(conf)
+
+    def thermostat_callback(request, context):
+        if request.headers["Authorization"] == "Bearer AT-1":
+            context.status_code = 500
+            return {"status": {"code": 14, "message": "expired"}}
+        return {"thermostatList": [], "status": {"code": 0}}
+
+    requests_mock.get(THERMOSTAT_URL, json=thermostat_callback)
+    requests_mock.post(
+        TOKEN_URL,
+        json={"access_token": "AT-2", "refresh_token": "RT-2", "expires_in": 3600},
+    )
+
+    first, second = Ecobee(config_filename=str(conf)), Ecobee(config_filename=str(conf))
+    first.read_config_from_file()
+    second.read_config_from_file()
+
+    assert first.get_thermostats() is True
+    assert second.get_thermostats() is True
+    assert second.access_token == "AT-2"
+    assert second.refresh_token == "RT-2"
+    token_calls = [c for c in requests_mock.request_history if c.url == TOKEN_URL]
+    assert len(token_calls) == 1
+
+
+class _MemoryTokenStore(TokenStore):
+    def __init__(self) -> None:
+        self.saved = []
+        self.held = False
+        self.released = threading.Event()
+        self.may_acquire = threading.Event()
+        self.may_acquire.set()
+
+    def load(self) -> dict:
+        return self.saved[-1] if self.saved else {}
+
+    def save(self, config: dict) -> bool:
+        self.saved.append(config)
+        return True
+
+    def acquire(self) -> None:
+        self.may_acquire.wait(5)
+        self.held = True
+
+    def release(self) -> None:
+        self.held = False
+        self.released.set()
+
+
+def test_token_store_must_implement_load_and_save() -> None:
+    with pytest.raises(TypeError):
+        TokenStore()
+
+
+def test_token_store_is_saved_to_alongside_config(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.post(
+        TOKEN_URL,
+        json={"access_token": "AT-2", "refresh_token": "RT-2", "expires_in": 3600},
+    )
+    store = _MemoryTokenStore()
+    ecobee = Ecobee(
+        config={ECOBEE_ACCESS_TOKEN: "AT-1", ECOBEE_REFRESH_TOKEN: "RT-1"}, token_store=store
+    )
+    assert ecobee.refresh_tokens() is True
+    assert store.saved[-1][ECOBEE_REFRESH_TOKEN] == "RT-2"
+    assert ecobee.config[ECOBEE_REFRESH_TOKEN] == "RT-2"
+
+
+def test_async_lock_is_released_when_cancelled_while_acquiring() -> None:
+    pytest.importorskip("aiohttp")
+    from pyecobee.aio import AsyncEcobee
+
+    store = _MemoryTokenStore()
+    store.may_acquire.clear()
+
+    async def run() -> None:
+        ecobee = AsyncEcobee(config={ECOBEE_ACCESS_TOKEN: "AT-1"}, token_store=store)
+
+        async def hold() -> None:
+            async with ecobee._async_token_store_lock():
+                pass
+
+        task = asyncio.ensure_future(hold())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        store.may_acquire.set()
+        # The release is scheduled back on the loop once the executor acquires.
+        for _ in range(100):
+            if store.released.is_set():
+                break
+            await asyncio.sleep(0.01)
+        await ecobee.close()
+
+    asyncio.run(run())
+    assert store.released.is_set() and not store.held
@@ -0,0 +1,101 @@
+"""Tests for Ecobee.watch() and the change events it yields."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+
+import requests
+import requests_mock as rm_module
+
+from pyecobee.scheduler import RequestScheduler
+from pyecobee.watch import (
+    EquipmentStatusChanged,
+    EventAdded,
+    HvacModeChanged,
+    OccupancyChanged,
+    SetpointChanged,
+)
+
+from .test_client import (
+    SUMMARY_URL,
+    THERMOSTAT_URL,
+    _make_ecobee,
+    _summary,
+    _thermostat,
+    _thermostat_response,
+)
+
+def test_watch_yields_typed_events_for_moved_sections(
+    requests_mock: rm_module.Mocker,
+) -> None:
+    thermostat = _thermostat()
+    requests_mock.get(
+        SUMMARY_URL,
+        [
+            {"json": _summary("311000000001:Main Floor:true:R1:A1:T1:I1")},
+            {"json": _summary("311000000001:Main Floor:true:R2:A1:T2:I1")},
+        ],
+    )
+    sensors = thermostat["remoteSensors"]
+    moved = {
+        "identifier": "311000000001",
+        "runtime": dict(thermostat["runtime"], desiredHeat=700),
+        "remoteSensors": [sensors[0], dict(sensors[1], capability=[
+            {"id": "1", "type": "temperature", "value": "688"},
+            {"id": "2", "type": "occupancy", "value": "false"},
+        ])],
+        "equipmentStatus": "heatPump",
+        "settings": dict(thermostat["settings"], hvacMode="auto"),
+        "events": [{"type": "hold", "running": True}],
+    }
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [{"json": _thermostat_response(thermostat)}, {"json": _thermostat_response(moved)}],
+    )
+
+    ecobee = _make_ecobee()
+    watcher = ecobee.watch(interval=0)
+    events = list(itertools.islice(watcher, 5))
+    watcher.close()
+
+    assert events == [
+        SetpointChanged("311000000001", "heat", 690, 700),
+        HvacModeChanged("311000000001", "heat", "auto"),
+        EquipmentStatusChanged("311000000001", (), ("heatPump",)),
+        OccupancyChanged("311000000001", "rs:100", False),
+        EventAdded("311000000001", {"type": "hold", "running": True}),
+    ]
+    # One summary plus one full read to prime, then one summary plus one partial read.
+    assert requests_mock.call_count == 4
+
+
+def test_watch_stops_when_stop_is_set(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(SUMMARY_URL, json=_summary("311000000001:Main Floor:true:R1:A1:T1:I1"))
+    requests_mock.get(THERMOSTAT_URL, json=_thermostat_response(_thermostat()))
+    stop = threading.Event()
+    stop.set()
+    assert list(_make_ecobee().watch(interval=0, stop=stop)) == []
+
+
+def test_watch_waits_out_an_open_circuit(requests_mock: rm_module.Mocker) -> None:
+    requests_mock.get(
+        SUMMARY_URL,
+        [
+            {"exc": requests.exceptions.ConnectTimeout},
+            {"json": _summary("311000000001:Main Floor:true:R1:A1:T1:I1")},
+            {"json": _summary("311000000001:Main Floor:true:R1:A1:T2:I1")},
+        ],
+    )
+    moved = dict(_thermostat(), equipmentStatus="heatPump")
+    requests_mock.get(
+        THERMOSTAT_URL,
+        [{"json": _thermostat_response(_thermostat())}, {"json": _thermostat_response(moved)}],
+    )
+    scheduler = RequestScheduler(retries=0, failure_threshold=1, reset_timeout=0.05)
+    watcher = _make_ecobee(scheduler=scheduler).watch(interval=0)
+
+    # The failed poll opens the circuit; the watch waits for the probe instead of dying.
+    assert next(watcher) == EquipmentStatusChanged("311000000001", (), ("heatPump",))
+    watcher.close()
+    assert requests_mock.call_count == 5